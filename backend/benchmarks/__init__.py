@@ -0,0 +1,10 @@
+"""
+Local benchmarks for the backend.
+
+Run from the backend directory against a real database, e.g.
+
+    python -m benchmarks.load_test --users 50 --iterations 20
+
+Each tool starts the app (and the mock Hubtel server) in-process on
+localhost unless --url points it at an already running deployment.
+"""
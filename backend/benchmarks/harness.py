@@ -0,0 +1,221 @@
+"""
+Shared pieces for the benchmarks: in-process servers, latency recording,
+user bootstrap and baseline files.
+"""
+
+import asyncio
+import json
+import math
+import os
+import socket
+import time
+import uuid
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Optional
+
+import httpx
+import uvicorn
+
+# Routes are declared as "/api/..." and mounted under the "/api" prefix
+API = "/api/api"
+
+BASELINE_DIR = Path(__file__).parent / "baselines"
+
+PASSWORD = "BenchPass123!"
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@asynccontextmanager
+async def serve(app, port: Optional[int] = None):
+    """Run an ASGI app on localhost for the duration of the block; yields its base URL."""
+    port = port or free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", lifespan="on"))
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        if task.done():
+            task.result()
+        await asyncio.sleep(0.05)
+    try:
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        server.should_exit = True
+        await task
+
+
+@asynccontextmanager
+async def local_stack(url: Optional[str] = None, mock_settings=None):
+    """Yield the base URL of the app under test.
+
+    With no url the app and a mock Hubtel are started in-process and wired
+    together: deposits/withdrawals hit the mock, whose signed callbacks
+    settle them through the real webhook.
+    """
+    if url:
+        yield url
+        return
+
+    from src.service.hubtel_mock_server import MockHubtelSettings, create_app
+
+    os.environ.setdefault("HUBTEL_WEBHOOK_SECRET", "bench-secret")
+    app_port = free_port()
+    settings = mock_settings or MockHubtelSettings(LATENCY="uniform:20,80", CALLBACK_DELAY="uniform:50,250")
+    settings.CALLBACK_URL = f"http://127.0.0.1:{app_port}{API}/wallet/hubtel/webhook"
+    settings.WEBHOOK_SECRET = os.environ["HUBTEL_WEBHOOK_SECRET"]
+
+    async with serve(create_app(settings)) as mock_url:
+        os.environ["HUBTEL_RECEIVE_URL"] = f"{mock_url}/merchantaccount/merchants/bench/receive/mobilemoney"
+        os.environ["HUBTEL_SEND_URL"] = f"{mock_url}/api/merchants/bench/send-mobilemoney"
+
+        from src import app
+        async with serve(app, app_port) as app_url:
+            yield app_url
+
+
+class LatencyRecorder:
+    """Per-endpoint latency samples and error counts."""
+
+    def __init__(self):
+        self.samples: dict = {}
+        self.errors: dict = {}
+        self.started = time.perf_counter()
+        self.finished: Optional[float] = None
+
+    def record(self, name: str, seconds: float, ok: bool = True):
+        self.samples.setdefault(name, []).append(seconds)
+        if not ok:
+            self.errors[name] = self.errors.get(name, 0) + 1
+
+    @asynccontextmanager
+    async def timed(self, name: str):
+        start = time.perf_counter()
+        ok = False
+        try:
+            yield
+            ok = True
+        finally:
+            self.record(name, time.perf_counter() - start, ok)
+
+    async def request(self, client: httpx.AsyncClient, name: str, method: str, path: str, expected=(200, 201), **kwargs) -> httpx.Response:
+        start = time.perf_counter()
+        try:
+            resp = await client.request(method, path, **kwargs)
+        except httpx.HTTPError:
+            self.record(name, time.perf_counter() - start, ok=False)
+            raise
+        self.record(name, time.perf_counter() - start, ok=resp.status_code in expected)
+        return resp
+
+    def stop(self):
+        self.finished = time.perf_counter()
+
+    def summary(self) -> dict:
+        elapsed = (self.finished or time.perf_counter()) - self.started
+        report = {}
+        for name, values in sorted(self.samples.items()):
+            report[name] = {
+                "count": len(values),
+                "errors": self.errors.get(name, 0),
+                "rps": round(len(values) / elapsed, 2) if elapsed else 0.0,
+                "mean_ms": round(sum(values) / len(values) * 1000, 2),
+                "p50_ms": round(percentile(values, 50) * 1000, 2),
+                "p95_ms": round(percentile(values, 95) * 1000, 2),
+                "p99_ms": round(percentile(values, 99) * 1000, 2),
+            }
+        return report
+
+
+def percentile(values: list, pct: float) -> float:
+    """Nearest-rank percentile."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    # Smallest value with at least pct% of samples at or below it
+    rank = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def print_table(report: dict):
+    print(f"{'endpoint':<34}{'count':>8}{'err':>6}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}")
+    for name, row in report.items():
+        print(
+            f"{name:<34}{row['count']:>8}{row['errors']:>6}{row['rps']:>9.1f}"
+            f"{row['p50_ms']:>9.1f}{row['p95_ms']:>9.1f}{row['p99_ms']:>9.1f}"
+        )
+
+
+def save_baseline(name: str, report: dict) -> Path:
+    BASELINE_DIR.mkdir(exist_ok=True)
+    path = BASELINE_DIR / f"{name}.json"
+    path.write_text(json.dumps(report, indent=2, sort_keys=True) + "\n")
+    return path
+
+
+def compare_baseline(name: str, report: dict, tolerance: float = 0.2) -> list:
+    """Return human-readable regressions against a saved baseline.
+
+    A regression is a p95 more than `tolerance` above the baseline, or a
+    non-zero error count where the baseline had none.
+    """
+    path = BASELINE_DIR / f"{name}.json"
+    if not path.exists():
+        raise FileNotFoundError(f"No baseline at {path}; run with --save-baseline first")
+
+    baseline = json.loads(path.read_text())
+    regressions = []
+    for endpoint, row in report.items():
+        base = baseline.get(endpoint)
+        if base is None:
+            continue
+        if base["p95_ms"] and row["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{endpoint}: p95 {row['p95_ms']}ms vs baseline {base['p95_ms']}ms")
+        if row["errors"] and not base["errors"]:
+            regressions.append(f"{endpoint}: {row['errors']} errors vs none in baseline")
+    return regressions
+
+
+async def register_user(client: httpx.AsyncClient, recorder: Optional[LatencyRecorder] = None) -> dict:
+    """Create a throwaway user and log in; returns uid, token and auth headers."""
+    tag = uuid.uuid4().hex[:10]
+    body = {
+        "email": f"bench_{tag}@example.com",
+        "phone": f"+233{int(tag, 16) % 10**9:09d}",
+        "name": f"Bench {tag}",
+        "password": PASSWORD,
+    }
+    recorder = recorder or LatencyRecorder()
+
+    resp = await recorder.request(client, "POST /auth/register", "POST", f"{API}/auth/register", json=body)
+    resp.raise_for_status()
+    user_uid = resp.json()["uid"]
+
+    resp = await recorder.request(client, "POST /auth/login", "POST", f"{API}/auth/login", json={"email": body["email"], "password": PASSWORD})
+    resp.raise_for_status()
+    token = resp.json()["access_token"]
+
+    return {"uid": user_uid, "token": token, "headers": {"Authorization": f"Bearer {token}"}, "phone": body["phone"]}
+
+
+async def fund_wallet(client: httpx.AsyncClient, user: dict, amount: float, timeout: float = 30.0, recorder: Optional[LatencyRecorder] = None) -> float:
+    """Deposit through Hubtel (normally the mock) and wait for the webhook to settle it."""
+    recorder = recorder or LatencyRecorder()
+    resp = await recorder.request(
+        client, "POST /wallet/deposit", "POST", f"{API}/wallet/deposit",
+        json={"amount": amount, "phone_number": user["phone"], "provider": "MTN"},
+        headers=user["headers"],
+    )
+    resp.raise_for_status()
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        resp = await client.get(f"{API}/wallet", headers=user["headers"])
+        balance = resp.json()["balance"]
+        if balance >= amount:
+            return balance
+        await asyncio.sleep(0.2)
+    raise TimeoutError(f"Deposit for {user['uid']} was not settled within {timeout}s")
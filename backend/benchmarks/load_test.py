@@ -0,0 +1,184 @@
+"""
+End-to-end load test.
+
+Virtual users register, log in, fund their wallet through the (mock) Hubtel
+deposit flow, form groups and then loop over a realistic session: dashboard
+reads, group detail, a contribution, a peer transfer and a chat message.
+Throughput and p50/p95/p99 are reported per endpoint.
+
+    python -m benchmarks.load_test --users 50 --iterations 20
+    python -m benchmarks.load_test --save-baseline main
+    python -m benchmarks.load_test --compare main --tolerance 0.2
+
+--compare exits non-zero on regressions so it can gate a deploy.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+
+import httpx
+import websockets
+
+from benchmarks.harness import (
+    API, LatencyRecorder, compare_baseline, fund_wallet, local_stack,
+    print_table, register_user, save_baseline,
+)
+
+SCENARIOS = ("dashboard", "group", "contribute", "transfer", "chat")
+
+
+async def setup_users(client: httpx.AsyncClient, recorder: LatencyRecorder, args) -> list:
+    semaphore = asyncio.Semaphore(args.users)
+
+    async def one():
+        async with semaphore:
+            user = await register_user(client, recorder)
+            await fund_wallet(client, user, args.initial_balance, recorder=recorder)
+            return user
+
+    return await asyncio.gather(*(one() for _ in range(args.users)))
+
+
+async def setup_groups(client: httpx.AsyncClient, recorder: LatencyRecorder, users: list, group_size: int):
+    """Split users into groups; the first member creates it, the rest join by invite code."""
+    cohorts = [users[i:i + group_size] for i in range(0, len(users), group_size)]
+
+    async def form(cohort: list):
+        owner = cohort[0]
+        resp = await recorder.request(
+            client, "POST /groups", "POST", f"{API}/groups",
+            json={"name": f"Bench group {owner['uid'][:8]}", "contribution_amount": 1.0},
+            headers=owner["headers"],
+        )
+        resp.raise_for_status()
+        group = resp.json()
+        for member in cohort[1:]:
+            await recorder.request(client, "POST /groups/join", "POST", f"{API}/groups/join/{group['invite_code']}", headers=member["headers"])
+        for member in cohort:
+            member["group_uid"] = group["uid"]
+            member["peers"] = [peer["uid"] for peer in cohort if peer is not member]
+
+    await asyncio.gather(*(form(cohort) for cohort in cohorts))
+
+
+async def send_chat(ws, recorder: LatencyRecorder, marker: str):
+    """Send a message and time until our own broadcast comes back."""
+
+    async def echoed() -> bool:
+        while True:
+            event = json.loads(await ws.recv())
+            if event.get("content") == marker:
+                return True
+            if event.get("reason") == "rate_limited":
+                return False
+
+    start = time.perf_counter()
+    await ws.send(json.dumps({"content": marker}))
+    try:
+        ok = await asyncio.wait_for(echoed(), timeout=10)
+    except asyncio.TimeoutError:
+        ok = False
+    recorder.record("WS chat round-trip", time.perf_counter() - start, ok)
+
+
+async def session(client: httpx.AsyncClient, recorder: LatencyRecorder, user: dict, ws_url: str, args):
+    headers = user["headers"]
+    group_uid = user["group_uid"]
+    ws = None
+    if "chat" in args.scenarios:
+        ws = await websockets.connect(f"{ws_url}{API}/ws/chat/{group_uid}?token={user['token']}")
+
+    try:
+        for i in range(args.iterations):
+            if "dashboard" in args.scenarios:
+                await asyncio.gather(
+                    recorder.request(client, "GET /auth/me", "GET", f"{API}/auth/me", headers=headers),
+                    recorder.request(client, "GET /wallet", "GET", f"{API}/wallet", headers=headers),
+                    recorder.request(client, "GET /groups", "GET", f"{API}/groups", headers=headers),
+                    recorder.request(client, "GET /transactions", "GET", f"{API}/transactions", headers=headers),
+                )
+
+            if "group" in args.scenarios:
+                await recorder.request(client, "GET /groups/{id}", "GET", f"{API}/groups/{group_uid}", headers=headers)
+                await recorder.request(client, "GET /groups/{id}/messages", "GET", f"{API}/groups/{group_uid}/messages", headers=headers)
+
+            if "contribute" in args.scenarios:
+                await recorder.request(
+                    client, "POST /groups/{id}/contribute", "POST", f"{API}/groups/{group_uid}/contribute",
+                    json={"group_uid": group_uid, "amount": args.amount}, headers=headers,
+                )
+
+            if "transfer" in args.scenarios and user["peers"]:
+                await recorder.request(
+                    client, "POST /wallet/transfer", "POST", f"{API}/wallet/transfer",
+                    json={"to_user_uid": random.choice(user["peers"]), "amount": args.amount}, headers=headers,
+                )
+
+            if ws is not None:
+                await send_chat(ws, recorder, f"bench {user['uid'][:8]} #{i}")
+
+            if args.think_ms:
+                await asyncio.sleep(random.uniform(0, 2 * args.think_ms) / 1000)
+    finally:
+        if ws is not None:
+            await ws.close()
+
+
+async def run(args) -> int:
+    async with local_stack(args.url) as base_url:
+        limits = httpx.Limits(max_connections=args.users * 4, max_keepalive_connections=args.users * 4)
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60.0) as client:
+            setup = LatencyRecorder()
+            users = await setup_users(client, setup, args)
+            await setup_groups(client, setup, users, args.group_size)
+            setup.stop()
+            print("Setup")
+            print_table(setup.summary())
+
+            recorder = LatencyRecorder()
+            ws_url = base_url.replace("http", "ws", 1)
+            await asyncio.gather(*(session(client, recorder, user, ws_url, args) for user in users))
+            recorder.stop()
+
+    report = recorder.summary()
+    total = sum(row["count"] for row in report.values())
+    print(f"\nLoad ({args.users} users x {args.iterations} iterations, {total / (recorder.finished - recorder.started):.1f} req/s overall)")
+    print_table(report)
+
+    if args.save_baseline:
+        print(f"\nBaseline written to {save_baseline(args.save_baseline, report)}")
+
+    if args.compare:
+        regressions = compare_baseline(args.compare, report, args.tolerance)
+        if regressions:
+            print("\nRegressions:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print(f"\nNo regressions against '{args.compare}'")
+    return 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="Target an already running app instead of starting one in-process")
+    parser.add_argument("--users", type=int, default=20, help="Concurrent virtual users")
+    parser.add_argument("--iterations", type=int, default=10, help="Session loops per user")
+    parser.add_argument("--group-size", type=int, default=5)
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--amount", type=float, default=1.0, help="Contribution/transfer amount")
+    parser.add_argument("--initial-balance", type=float, default=1000.0)
+    # Chat is throttled per sender (WS_MESSAGES_PER_SECOND), so sessions pause between loops
+    parser.add_argument("--think-ms", type=float, default=500.0, help="Mean pause between iterations")
+    parser.add_argument("--save-baseline", metavar="NAME")
+    parser.add_argument("--compare", metavar="NAME")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed p95 growth over baseline")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(run(parse_args())))
@@ -0,0 +1,316 @@
+"""
+Wallet concurrency stress test with ledger invariant checks.
+
+Seeds a pool of funded users and groups directly in the database, then fires
+concurrent transfer_money, contribute_to_group and disburse_from_group calls
+through the service layer (no HTTP) and verifies afterwards that:
+
+  * total money across the pool is conserved,
+  * no wallet or group wallet went negative,
+  * every wallet and group wallet balance equals its opening balance plus
+    its completed transactions (lost updates show up here even when totals
+    balance out).
+
+Reports throughput, per-operation latency, time spent blocked on row locks
+(sampled from pg_stat_activity) and retry rates for serialization failures
+and deadlocks. Run against a disposable database; seeded rows are left behind.
+
+    python -m benchmarks.wallet_stress --wallets 200 --groups 20 --operations 5000 --concurrency 100
+"""
+
+import argparse
+import asyncio
+import random
+import sys
+import time
+import uuid
+
+from fastapi import HTTPException
+from sqlalchemy import select, func, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from benchmarks.harness import LatencyRecorder, print_table
+from src.config import Config
+from src.db.models import User, Wallet, Group, GroupWallet, GroupMember, Transaction, TransactionStatus, TransactionType
+from src.schema.schemas import TransferRequest, ContributionRequest, DisbursementRequest
+from src.service.group_service import GroupService
+from src.service.wallet_service import WalletService
+from src.utils import generate_invite_code
+
+# SQLSTATEs worth retrying: serialization_failure, deadlock_detected
+RETRYABLE_SQLSTATES = {"40001", "40P01"}
+
+wallet_service = WalletService()
+group_service = GroupService()
+
+
+async def seed(Session, args) -> dict:
+    tag = uuid.uuid4().hex[:8]
+    users, groups = [], []
+    async with Session() as db:
+        for i in range(args.wallets):
+            user = User(
+                email=f"stress_{tag}_{i}@example.com",
+                phone=f"+1{tag}{i:06d}",
+                name=f"Stress {i}",
+                hashed_password="!",
+            )
+            db.add(user)
+            users.append(user)
+        await db.flush()
+        for user in users:
+            db.add(Wallet(user_uid=user.uid, balance=args.initial_balance))
+
+        members = args.wallets // args.groups
+        for g in range(args.groups):
+            cohort = users[g * members:(g + 1) * members]
+            group = Group(name=f"Stress {tag} {g}", invite_code=generate_invite_code(), created_by=cohort[0].uid)
+            db.add(group)
+            await db.flush()
+            db.add(GroupWallet(group_uid=group.uid, balance=args.initial_group_balance))
+            for j, user in enumerate(cohort):
+                db.add(GroupMember(group_uid=group.uid, user_uid=user.uid, is_admin=j == 0))
+            groups.append({"uid": group.uid, "admin": cohort[0], "members": cohort})
+
+        await db.commit()
+
+    return {"users": users, "groups": groups}
+
+
+async def money_snapshot(Session, pool: dict) -> dict:
+    user_uids = [user.uid for user in pool["users"]]
+    group_uids = [group["uid"] for group in pool["groups"]]
+    async with Session() as db:
+        wallets = (await db.execute(
+            select(Wallet.user_uid, Wallet.balance, Wallet.locked_balance).where(Wallet.user_uid.in_(user_uids))
+        )).all()
+        group_wallets = (await db.execute(
+            select(GroupWallet.group_uid, GroupWallet.balance).where(GroupWallet.group_uid.in_(group_uids))
+        )).all()
+    return {
+        "wallets": {row.user_uid: (row.balance, row.locked_balance) for row in wallets},
+        "group_wallets": {row.group_uid: row.balance for row in group_wallets},
+    }
+
+
+async def ledger_deltas(Session, pool: dict) -> dict:
+    """Net completed-transaction flow per user wallet and group wallet (seeded rows start with none)."""
+    user_uids = [user.uid for user in pool["users"]]
+    group_uids = [group["uid"] for group in pool["groups"]]
+    settled = Transaction.status == TransactionStatus.COMPLETED
+    async with Session() as db:
+        incoming = (await db.execute(
+            select(Transaction.to_user_uid, func.sum(Transaction.amount))
+            .where(settled, Transaction.to_user_uid.in_(user_uids))
+            .group_by(Transaction.to_user_uid)
+        )).all()
+        outgoing = (await db.execute(
+            select(Transaction.from_user_uid, func.sum(Transaction.amount))
+            .where(settled, Transaction.from_user_uid.in_(user_uids))
+            .group_by(Transaction.from_user_uid)
+        )).all()
+        group_flows = (await db.execute(
+            select(Transaction.group_uid, Transaction.transaction_type, func.sum(Transaction.amount))
+            .where(
+                settled,
+                Transaction.group_uid.in_(group_uids),
+                Transaction.transaction_type.in_((TransactionType.CONTRIBUTION, TransactionType.DISBURSEMENT)),
+            )
+            .group_by(Transaction.group_uid, Transaction.transaction_type)
+        )).all()
+    wallets = {uid: 0.0 for uid in user_uids}
+    for uid, amount in incoming:
+        wallets[uid] += amount
+    for uid, amount in outgoing:
+        wallets[uid] -= amount
+    group_wallets = {uid: 0.0 for uid in group_uids}
+    for uid, kind, amount in group_flows:
+        group_wallets[uid] += amount if kind == TransactionType.CONTRIBUTION else -amount
+    return {"wallets": wallets, "group_wallets": group_wallets}
+
+
+def check_invariants(before: dict, after: dict, deltas: dict, tolerance: float = 1e-6) -> list:
+    violations = []
+
+    total_before = sum(b + l for b, l in before["wallets"].values()) + sum(before["group_wallets"].values())
+    total_after = sum(b + l for b, l in after["wallets"].values()) + sum(after["group_wallets"].values())
+    if abs(total_after - total_before) > tolerance:
+        violations.append(f"money not conserved: {total_before:.2f} before, {total_after:.2f} after")
+
+    for uid, (balance, locked) in after["wallets"].items():
+        if balance < -tolerance or locked < -tolerance:
+            violations.append(f"wallet {uid} negative: balance={balance} locked={locked}")
+        expected = before["wallets"][uid][0] + deltas["wallets"][uid]
+        if abs(balance - expected) > tolerance:
+            violations.append(f"wallet {uid} diverged from ledger: balance={balance:.2f} expected={expected:.2f}")
+
+    for uid, balance in after["group_wallets"].items():
+        if balance < -tolerance:
+            violations.append(f"group wallet {uid} negative: {balance}")
+        expected = before["group_wallets"][uid] + deltas["group_wallets"][uid]
+        if abs(balance - expected) > tolerance:
+            violations.append(f"group wallet {uid} diverged from ledger: balance={balance:.2f} expected={expected:.2f}")
+
+    return violations
+
+
+class LockSampler:
+    """Samples pg_stat_activity for backends blocked on heavyweight locks."""
+
+    def __init__(self, engine, interval: float = 0.05):
+        self.engine = engine
+        self.interval = interval
+        self.samples = 0
+        self.waiting_backend_samples = 0
+        self.peak = 0
+
+    async def run(self, stop: asyncio.Event):
+        async with self.engine.connect() as conn:
+            while not stop.is_set():
+                waiting = (await conn.execute(text(
+                    "SELECT count(*) FROM pg_stat_activity "
+                    "WHERE datname = current_database() AND wait_event_type = 'Lock'"
+                ))).scalar_one()
+                await conn.commit()
+                self.samples += 1
+                self.waiting_backend_samples += waiting
+                self.peak = max(self.peak, waiting)
+                try:
+                    await asyncio.wait_for(stop.wait(), timeout=self.interval)
+                except asyncio.TimeoutError:
+                    pass
+
+    def summary(self) -> dict:
+        return {
+            "lock_wait_seconds_est": round(self.waiting_backend_samples * self.interval, 3),
+            "mean_waiting_backends": round(self.waiting_backend_samples / self.samples, 2) if self.samples else 0.0,
+            "peak_waiting_backends": self.peak,
+        }
+
+
+async def run_operation(Session, pool: dict, args, recorder: LatencyRecorder, counters: dict):
+    kind = random.choices(("transfer", "contribute", "disburse"), weights=args.mix)[0]
+    group = random.choice(pool["groups"])
+
+    if kind == "transfer":
+        sender, receiver = random.sample(pool["users"], 2)
+        call = lambda db: wallet_service.transfer_money(
+            TransferRequest(to_user_uid=receiver.uid, amount=args.amount), sender, db
+        )
+    elif kind == "contribute":
+        member = random.choice(group["members"])
+        call = lambda db: group_service.contribute_to_group(
+            group["uid"], ContributionRequest(group_uid=str(group["uid"]), amount=args.amount), member, db
+        )
+    else:
+        recipient = random.choice(group["members"])
+        call = lambda db: group_service.disburse_from_group(
+            group["uid"],
+            DisbursementRequest(group_uid=group["uid"], to_user_uid=recipient.uid, amount=args.amount, description="stress"),
+            group["admin"],
+            db,
+        )
+
+    start = time.perf_counter()
+    for attempt in range(args.max_retries + 1):
+        async with Session() as db:
+            try:
+                await call(db)
+                counters["completed"] += 1
+                break
+            except HTTPException:
+                # Business rejection (e.g. insufficient balance) is a valid outcome
+                counters["rejected"] += 1
+                break
+            except DBAPIError as e:
+                await db.rollback()
+                if getattr(e.orig, "sqlstate", None) in RETRYABLE_SQLSTATES and attempt < args.max_retries:
+                    counters["retries"] += 1
+                    continue
+                counters["failed"] += 1
+                break
+    recorder.record(kind, time.perf_counter() - start)
+
+
+async def run(args) -> int:
+    # One extra connection for the lock sampler
+    engine = create_async_engine(Config.DATABASE_URL, pool_size=args.concurrency + 1, max_overflow=0)
+    Session = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+    pool = await seed(Session, args)
+    before = await money_snapshot(Session, pool)
+
+    counters = {"completed": 0, "rejected": 0, "failed": 0, "retries": 0}
+    recorder = LatencyRecorder()
+    sampler = LockSampler(engine)
+    stop = asyncio.Event()
+    sampler_task = asyncio.create_task(sampler.run(stop))
+
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def bounded():
+        async with semaphore:
+            await run_operation(Session, pool, args, recorder, counters)
+
+    await asyncio.gather(*(bounded() for _ in range(args.operations)))
+    recorder.stop()
+    stop.set()
+    await sampler_task
+
+    after = await money_snapshot(Session, pool)
+    deltas = await ledger_deltas(Session, pool)
+    await engine.dispose()
+
+    elapsed = recorder.finished - recorder.started
+    print(f"{args.operations} operations, concurrency {args.concurrency}, {elapsed:.2f}s, {args.operations / elapsed:.1f} ops/s")
+    print_table(recorder.summary())
+    print(
+        f"\ncompleted={counters['completed']} rejected={counters['rejected']} failed={counters['failed']} "
+        f"retries={counters['retries']} ({counters['retries'] / args.operations:.2%} of operations)"
+    )
+    print(", ".join(f"{k}={v}" for k, v in sampler.summary().items()))
+
+    violations = check_invariants(before, after, deltas)
+    if violations:
+        print(f"\n{len(violations)} invariant violation(s):")
+        for line in violations[:50]:
+            print(f"  {line}")
+        return 1
+    print("\nLedger invariants hold")
+    return 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--wallets", type=int, default=100)
+    parser.add_argument("--groups", type=int, default=10)
+    parser.add_argument("--operations", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50, help="Concurrent sessions (and pool size)")
+    parser.add_argument("--mix", type=float, nargs=3, default=[6, 3, 1], metavar=("TRANSFER", "CONTRIBUTE", "DISBURSE"))
+    parser.add_argument("--amount", type=float, default=1.0, help="Whole amounts keep float balances exact")
+    parser.add_argument("--initial-balance", type=float, default=100.0)
+    parser.add_argument("--initial-group-balance", type=float, default=100.0)
+    parser.add_argument("--max-retries", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    # Transfers need two users and every group needs at least one member (its admin)
+    if args.wallets < 2:
+        parser.error("--wallets must be at least 2")
+    if not 1 <= args.groups <= args.wallets:
+        parser.error("--groups must be between 1 and --wallets")
+    if args.operations < 1 or args.concurrency < 1:
+        parser.error("--operations and --concurrency must be positive")
+    if args.amount <= 0:
+        parser.error("--amount must be positive")
+    if min(args.mix) < 0 or sum(args.mix) <= 0:
+        parser.error("--mix weights must be non-negative and not all zero")
+    if args.max_retries < 0:
+        parser.error("--max-retries must not be negative")
+    return args
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(run(parse_args())))
@@ -0,0 +1,257 @@
+"""
+Hubtel webhook replay benchmark.
+
+Builds a stream of status callbacks from one of three sources:
+
+  --synthetic N   seed N fresh users with a pending deposit each and generate
+                  their success callbacks (self-contained; the default),
+  --from-db       payloads recorded in hubtel_events (optionally --since),
+  --fixture PATH  a JSON array or NDJSON file of payloads,
+
+re-signs every body with the webhook secret (HMAC-SHA1, as checked by
+verify_hubtel_signature) and replays it against hubtel_webhook with injected
+duplicates and stale out-of-order statuses, at a fixed rate or as fast as
+--concurrency allows. Reports settlement throughput and latency, then replays
+the whole stream a second time and checks that no wallet or transaction
+changed (idempotency). Synthetic runs also check each wallet was credited
+exactly once.
+
+    python -m benchmarks.webhook_replay --synthetic 2000 --duplicate-rate 0.3 --reorder-rate 0.1 --concurrency 100
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+import httpx
+from sqlalchemy import and_, select
+
+from benchmarks.harness import API, LatencyRecorder, local_stack, print_table
+from src.db.main import get_db_session
+from src.db.models import User, Wallet, Transaction, TransactionExternalRef, TransactionStatus, TransactionType, HubtelEvent
+from src.service.hubtel_mock_server import callback_payload, sign
+
+
+def event_data(payload: dict) -> dict:
+    return payload.get("Data") or payload
+
+
+def external_id_of(payload: dict):
+    data = event_data(payload)
+    return data.get("ExternalId") or data.get("TransactionId") or data.get("ClientReference")
+
+
+async def seed_synthetic(count: int, amount: float) -> list:
+    tag = uuid.uuid4().hex[:8]
+    payloads = []
+    async with get_db_session() as db:
+        users = [
+            User(email=f"replay_{tag}_{i}@example.com", phone=f"+3{tag}{i:06d}", name=f"Replay {i}", hashed_password="!")
+            for i in range(count)
+        ]
+        db.add_all(users)
+        await db.flush()
+        for user in users:
+            external_id = str(uuid.uuid4())
+            db.add(Wallet(user_uid=user.uid))
+            db.add(Transaction(
+                transaction_type=TransactionType.DEPOSIT,
+                amount=amount,
+                status=TransactionStatus.PENDING,
+                to_user_uid=user.uid,
+                external_reference=external_id,
+                description="Replay benchmark deposit",
+            ))
+            payloads.append(callback_payload(external_id, uuid.uuid4().hex, "Success", f"{amount:.2f}"))
+        await db.commit()
+    return payloads
+
+
+async def load_recorded(since) -> list:
+    query = select(HubtelEvent.payload).where(HubtelEvent.signature_valid == True).order_by(HubtelEvent.created_at)
+    if since is not None:
+        query = query.where(HubtelEvent.created_at >= since)
+    async with get_db_session() as db:
+        return list((await db.execute(query)).scalars())
+
+
+def load_fixture(path: Path) -> list:
+    text = path.read_text()
+    if text.lstrip().startswith("["):
+        return json.loads(text)
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+def build_stream(payloads: list, duplicate_rate: float, reorder_rate: float, window: int, rng: random.Random) -> list:
+    """Add duplicate deliveries and stale statuses, then shuffle within a window."""
+    stream = []
+    for payload in payloads:
+        stream.append(payload)
+        while rng.random() < duplicate_rate:
+            stream.append(payload)
+        if rng.random() < reorder_rate and event_data(payload).get("Status", "").lower() != "pending":
+            stale = json.loads(json.dumps(payload))
+            event_data(stale)["Status"] = "Pending"
+            stream.append(stale)
+
+    if window > 1:
+        for start in range(0, len(stream), window):
+            chunk = stream[start:start + window]
+            rng.shuffle(chunk)
+            stream[start:start + window] = chunk
+    return stream
+
+
+async def replay(client: httpx.AsyncClient, stream: list, secret: str, rate: float, concurrency: int, recorder: LatencyRecorder) -> dict:
+    outcomes: dict = {}
+    semaphore = asyncio.Semaphore(concurrency)
+    url = f"{API}/wallet/hubtel/webhook"
+
+    async def deliver(payload: dict):
+        body = json.dumps(payload).encode()
+        headers = {"Content-Type": "application/json"}
+        if secret:
+            headers["X-Hubtel-Signature"] = sign(body, secret)
+        async with semaphore:
+            resp = await recorder.request(client, "POST /wallet/hubtel/webhook", "POST", url, expected=(200, 400), content=body, headers=headers)
+        try:
+            result = resp.json()
+            outcome = result.get("message") or result.get("reason") or result.get("detail") or ("settled" if result.get("success") else "rejected")
+        except ValueError:
+            outcome = f"http {resp.status_code}"
+        outcomes[outcome] = outcomes.get(outcome, 0) + 1
+
+    tasks = []
+    started = time.monotonic()
+    for i, payload in enumerate(stream):
+        if rate:
+            await asyncio.sleep(max(0.0, started + i / rate - time.monotonic()))
+        tasks.append(asyncio.create_task(deliver(payload)))
+    await asyncio.gather(*tasks)
+    return outcomes
+
+
+async def ledger_state(external_ids: list) -> dict:
+    """Status of every replayed transaction and balances of the wallets it touches."""
+    async with get_db_session() as db:
+        # Resolve through the claim table, as the webhook does, so a missing
+        # claim shows up here as "not found"
+        rows = (await db.execute(
+            select(Transaction)
+            .join(
+                TransactionExternalRef,
+                and_(
+                    Transaction.uid == TransactionExternalRef.transaction_uid,
+                    Transaction.created_at == TransactionExternalRef.created_at,
+                ),
+            )
+            .where(TransactionExternalRef.external_reference.in_(external_ids))
+        )).scalars().all()
+        owners = {tx.to_user_uid or tx.from_user_uid for tx in rows}
+        wallets = (await db.execute(
+            select(Wallet.user_uid, Wallet.balance, Wallet.locked_balance).where(Wallet.user_uid.in_(owners))
+        )).all()
+    return {
+        "transactions": {tx.external_reference: (tx.status, tx.amount, tx.to_user_uid) for tx in rows},
+        "wallets": {row.user_uid: (row.balance, row.locked_balance) for row in wallets},
+    }
+
+
+def diff_states(first: dict, second: dict) -> list:
+    problems = []
+    for ref, state in first["transactions"].items():
+        if second["transactions"].get(ref) != state:
+            problems.append(f"transaction {ref} changed on re-delivery: {state[0].value} -> {second['transactions'][ref][0].value}")
+    for uid, state in first["wallets"].items():
+        if second["wallets"].get(uid) != state:
+            problems.append(f"wallet {uid} changed on re-delivery: {state} -> {second['wallets'][uid]}")
+    return problems
+
+
+def check_synthetic(state: dict, external_ids: list) -> list:
+    problems = [f"transaction {ref} not found" for ref in external_ids if ref not in state["transactions"]]
+    for ref, (status, amount, owner) in state["transactions"].items():
+        if status != TransactionStatus.COMPLETED:
+            problems.append(f"transaction {ref} ended {status.value}, expected completed")
+        balance = state["wallets"][owner][0]
+        if balance != amount:
+            problems.append(f"wallet {owner} credited {balance} for a single {amount} deposit")
+    return problems
+
+
+async def run(args) -> int:
+    rng = random.Random(args.seed)
+    if args.fixture:
+        payloads = load_fixture(Path(args.fixture))
+    elif args.from_db:
+        payloads = await load_recorded(args.since)
+    else:
+        payloads = await seed_synthetic(args.synthetic, args.amount)
+
+    stream = build_stream(payloads, args.duplicate_rate, args.reorder_rate, args.window, rng)
+    external_ids = sorted({external_id_of(p) for p in payloads if external_id_of(p)})
+    print(f"{len(payloads)} distinct payloads, {len(stream)} deliveries after duplication/reordering")
+
+    async with local_stack(args.url) as base_url:
+        secret = args.secret or os.getenv("HUBTEL_WEBHOOK_SECRET", "")
+        async with httpx.AsyncClient(base_url=base_url, timeout=60.0) as client:
+            recorder = LatencyRecorder()
+            outcomes = await replay(client, stream, secret, args.rate, args.concurrency, recorder)
+            recorder.stop()
+            first = await ledger_state(external_ids)
+
+            elapsed = recorder.finished - recorder.started
+            print(f"\nReplay: {len(stream) / elapsed:.1f} deliveries/s, {outcomes.get('settled', 0) / elapsed:.1f} settlements/s")
+            print_table(recorder.summary())
+            print("outcomes: " + ", ".join(f"{k}={v}" for k, v in sorted(outcomes.items())))
+
+            # Second pass: every delivery is now a duplicate and must change nothing
+            recorder = LatencyRecorder()
+            outcomes = await replay(client, stream, secret, args.rate, args.concurrency, recorder)
+            recorder.stop()
+            second = await ledger_state(external_ids)
+            print("\nRe-delivery pass")
+            print_table(recorder.summary())
+            print("outcomes: " + ", ".join(f"{k}={v}" for k, v in sorted(outcomes.items())))
+
+    problems = diff_states(first, second)
+    if not (args.fixture or args.from_db):
+        problems += check_synthetic(second, external_ids)
+
+    if problems:
+        print(f"\n{len(problems)} idempotency problem(s):")
+        for line in problems[:50]:
+            print(f"  {line}")
+        return 1
+    print("\nIdempotency checks passed")
+    return 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--synthetic", type=int, default=500, metavar="N")
+    source.add_argument("--from-db", action="store_true")
+    source.add_argument("--fixture", metavar="PATH")
+    parser.add_argument("--since", type=datetime.fromisoformat, help="With --from-db, only events received after this")
+    parser.add_argument("--amount", type=float, default=10.0, help="Synthetic deposit amount")
+    parser.add_argument("--duplicate-rate", type=float, default=0.2, help="Chance of each extra duplicate delivery")
+    parser.add_argument("--reorder-rate", type=float, default=0.05, help="Chance of a stale Pending after the final status (must be ignored)")
+    parser.add_argument("--window", type=int, default=50, help="Deliveries shuffled together")
+    parser.add_argument("--rate", type=float, default=0.0, help="Deliveries per second (0 = unthrottled)")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--secret", help="Defaults to HUBTEL_WEBHOOK_SECRET")
+    parser.add_argument("--url", help="Already running app; otherwise one is started in-process")
+    parser.add_argument("--seed", type=int)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(run(parse_args())))
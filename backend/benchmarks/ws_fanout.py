@@ -0,0 +1,238 @@
+"""
+WebSocket fan-out benchmark for /api/ws/chat/{group_uid}.
+
+Seeds M groups with N/M members each, opens one socket per member, then has
+members post at a fixed per-group rate. Every message carries its send time
+so receivers can measure end-to-end delivery latency. The app runs in a
+separate uvicorn process so its memory and CPU can be read from /proc:
+
+  * memory per connection: server RSS growth while the sockets connect,
+    divided by the number of sockets,
+  * CPU per broadcast: server user+system CPU time during the send phase,
+    divided by messages sent.
+
+    python -m benchmarks.ws_fanout --sockets 2000 --groups 20 --rate 5 --duration 30
+
+Pass --url and --server-pid to measure an already running server. Linux only
+(/proc). Raise the open-file limit (ulimit -n) for large socket counts.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+import uuid
+from datetime import timedelta
+
+import websockets
+
+from benchmarks.harness import API, free_port, percentile
+from src.auth.auth import create_access_token
+from src.db.main import get_db_session
+from src.db.models import User, Group, GroupMember
+from src.utils import generate_invite_code
+
+MARKER = "fanout"
+PONG_FRAME = json.dumps({"type": "pong"})
+
+
+def read_rss(pid: int) -> int:
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) * 1024
+    return 0
+
+
+def read_cpu_seconds(pid: int) -> float:
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    # utime and stime are fields 14 and 15 of the full line
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+async def start_server() -> tuple:
+    port = free_port()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "src:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError("uvicorn exited during startup")
+        try:
+            _, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.close()
+            return proc, f"http://127.0.0.1:{port}"
+        except OSError:
+            await asyncio.sleep(0.2)
+    proc.terminate()
+    raise TimeoutError("uvicorn did not start within 30s")
+
+
+async def seed(sockets: int, groups: int) -> list:
+    """Create groups of members; returns [{group_uid, tokens: [...]}]."""
+    tag = uuid.uuid4().hex[:8]
+    per_group = sockets // groups
+    layout = []
+    async with get_db_session() as db:
+        for g in range(groups):
+            users = [
+                User(email=f"fanout_{tag}_{g}_{i}@example.com", phone=f"+2{tag}{g:04d}{i:05d}", name=f"Fanout {i}", hashed_password="!")
+                for i in range(per_group)
+            ]
+            db.add_all(users)
+            await db.flush()
+            group = Group(name=f"Fanout {tag} {g}", invite_code=generate_invite_code(), created_by=users[0].uid)
+            db.add(group)
+            await db.flush()
+            db.add_all(GroupMember(group_uid=group.uid, user_uid=user.uid, is_admin=i == 0) for i, user in enumerate(users))
+            layout.append({
+                "group_uid": str(group.uid),
+                "tokens": [create_access_token({"sub": str(user.uid)}, timedelta(hours=2)) for user in users],
+            })
+        await db.commit()
+    return layout
+
+
+class FanoutClient:
+    def __init__(self, ws, group_uid: str):
+        self.ws = ws
+        self.group_uid = group_uid
+        self.latencies: list = []
+        self.received = 0
+        self.rate_limited = 0
+
+    async def read(self):
+        try:
+            async for frame in self.ws:
+                event = json.loads(frame)
+                if event.get("type") == "ping":
+                    # Idle members are evicted after WS_IDLE_TIMEOUT_SECONDS otherwise
+                    await self.ws.send(PONG_FRAME)
+                    continue
+                content = event.get("content")
+                if isinstance(content, str) and content.startswith(MARKER):
+                    sent_ns = int(content.split(":", 2)[1])
+                    self.latencies.append((time.time_ns() - sent_ns) / 1e9)
+                    self.received += 1
+                elif event.get("reason") == "rate_limited":
+                    self.rate_limited += 1
+        except websockets.ConnectionClosed:
+            pass
+
+
+async def connect_all(ws_url: str, layout: list, concurrency: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    clients: dict = {entry["group_uid"]: [] for entry in layout}
+    failures = 0
+
+    async def one(group_uid: str, token: str):
+        nonlocal failures
+        async with semaphore:
+            try:
+                ws = await websockets.connect(f"{ws_url}{API}/ws/chat/{group_uid}?token={token}", max_queue=None)
+            except Exception:
+                failures += 1
+                return
+            clients[group_uid].append(FanoutClient(ws, group_uid))
+
+    await asyncio.gather(*(one(entry["group_uid"], token) for entry in layout for token in entry["tokens"]))
+    return {"clients": clients, "failures": failures}
+
+
+async def send_loop(members: list, rate: float, duration: float, counter: dict):
+    """Post `rate` messages per second into one group, rotating senders."""
+    interval = 1 / rate
+    next_at = time.monotonic()
+    end = next_at + duration
+    i = 0
+    while next_at < end:
+        sender = members[i % len(members)]
+        await sender.ws.send(json.dumps({"content": f"{MARKER}:{time.time_ns()}:{i}"}))
+        counter["sent"] += 1
+        counter["expected"] += len(members)
+        i += 1
+        next_at += interval
+        await asyncio.sleep(max(0.0, next_at - time.monotonic()))
+
+
+async def run(args) -> int:
+    proc = None
+    if args.url:
+        base_url, pid = args.url, args.server_pid
+    else:
+        proc, base_url = await start_server()
+        pid = proc.pid
+
+    try:
+        layout = await seed(args.sockets, args.groups)
+        ws_url = base_url.replace("http", "ws", 1)
+
+        rss_before = read_rss(pid) if pid else 0
+        connect_started = time.perf_counter()
+        connected = await connect_all(ws_url, layout, args.connect_concurrency)
+        connect_seconds = time.perf_counter() - connect_started
+        clients = connected["clients"]
+        all_clients = [client for members in clients.values() for client in members]
+        # Let presence snapshots and join events settle before measuring memory
+        await asyncio.sleep(2)
+        rss_after = read_rss(pid) if pid else 0
+
+        readers = [asyncio.create_task(client.read()) for client in all_clients]
+        counter = {"sent": 0, "expected": 0}
+        cpu_before = read_cpu_seconds(pid) if pid else 0.0
+        await asyncio.gather(*(
+            send_loop(members, args.rate, args.duration, counter) for members in clients.values() if members
+        ))
+        await asyncio.sleep(args.grace)
+        cpu_spent = (read_cpu_seconds(pid) - cpu_before) if pid else 0.0
+
+        for client in all_clients:
+            await client.ws.close()
+        await asyncio.gather(*readers, return_exceptions=True)
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait()
+
+    latencies = [value for client in all_clients for value in client.latencies]
+    received = sum(client.received for client in all_clients)
+    rate_limited = sum(client.rate_limited for client in all_clients)
+    sockets = len(all_clients)
+
+    print(f"sockets: {sockets} connected, {connected['failures']} failed, {connect_seconds:.2f}s to connect")
+    print(f"groups: {len(clients)}, ~{sockets // max(1, len(clients))} members each")
+    print(f"messages: {counter['sent']} sent, {received}/{counter['expected']} deliveries, {rate_limited} rate limited")
+    if latencies:
+        print(
+            "delivery latency ms: "
+            f"p50={percentile(latencies, 50) * 1000:.1f} p95={percentile(latencies, 95) * 1000:.1f} "
+            f"p99={percentile(latencies, 99) * 1000:.1f} max={max(latencies) * 1000:.1f}"
+        )
+    if pid and sockets:
+        print(f"server memory: {(rss_after - rss_before) / sockets / 1024:.1f} KiB per connection (RSS {rss_after / 2**20:.1f} MiB)")
+    if pid and counter["sent"]:
+        print(f"server CPU: {cpu_spent / counter['sent'] * 1000:.3f} ms per broadcast ({cpu_spent:.2f}s total)")
+
+    return 0 if received == counter["expected"] and not connected["failures"] else 1
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sockets", type=int, default=500, help="Total sockets (N)")
+    parser.add_argument("--groups", type=int, default=10, help="Groups to spread them across (M)")
+    parser.add_argument("--rate", type=float, default=2.0, help="Messages per second per group")
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds of sending")
+    parser.add_argument("--grace", type=float, default=3.0, help="Seconds to wait for stragglers")
+    parser.add_argument("--connect-concurrency", type=int, default=200)
+    parser.add_argument("--url", help="Already running server; memory/CPU need --server-pid")
+    parser.add_argument("--server-pid", type=int)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(run(parse_args())))
@@ -0,0 +1,176 @@
+"""monthly range partitioning for transactions
+
+This rewrites the whole table: `transactions` is renamed and copied into the
+new partitioned table inside the migration's transaction, holding an ACCESS
+EXCLUSIVE lock on it throughout. Every read and write of transactions (deposits,
+withdrawals, transfers, the Hubtel webhook and wallet history) blocks until it
+commits, so run it in a maintenance window sized for a full copy plus index
+builds. It refuses to run while any row has a NULL created_at; backfill those
+with a deliberate value first rather than letting them all land in this month.
+
+Revision ID: 0a6b3c9d5e21
+Revises: f1c4d8e2b7a6
+Create Date: 2026-10-19 13:05:47.918352
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa 
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0a6b3c9d5e21'
+down_revision: Union[str, None] = 'f1c4d8e2b7a6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Months of empty partitions created ahead of now
+MONTHS_AHEAD = 3
+
+COLUMNS = (
+    "uid, transaction_type, amount, status, description, from_user_uid, to_user_uid, "
+    "group_uid, phone_number, mobile_money_provider, external_reference, created_at, "
+    "updated_at, completed_at"
+)
+
+INDEXES = [
+    ("ix_transactions_external_reference", ["external_reference"]),
+    ("ix_transactions_from_user_uid", ["from_user_uid"]),
+    ("ix_transactions_to_user_uid", ["to_user_uid"]),
+    ("ix_transactions_group_uid", ["group_uid"]),
+    # Statements, history and reconciliation are time-bounded per owner
+    ("ix_transactions_group_created", ["group_uid", "created_at"]),
+    ("ix_transactions_from_user_created", ["from_user_uid", "created_at"]),
+    ("ix_transactions_to_user_created", ["to_user_uid", "created_at"]),
+]
+
+
+def upgrade() -> None:
+    missing = op.get_bind().execute(
+        sa.text("SELECT count(*) FROM transactions WHERE created_at IS NULL")
+    ).scalar_one()
+    if missing:
+        raise RuntimeError(
+            f"{missing} transaction(s) have no created_at; backfill them before partitioning"
+        )
+
+    op.execute("ALTER TABLE transactions RENAME TO transactions_legacy")
+
+    op.execute(
+        """
+        CREATE TABLE transactions (LIKE transactions_legacy INCLUDING DEFAULTS)
+        PARTITION BY RANGE (created_at)
+        """
+    )
+    op.execute("ALTER TABLE transactions ALTER COLUMN created_at SET DEFAULT now()")
+    op.execute("ALTER TABLE transactions ALTER COLUMN created_at SET NOT NULL")
+
+    # Creates any missing monthly partitions from `from_month` through
+    # `months_ahead` months past now. Bounds are UTC month starts.
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION ensure_transaction_partitions(from_month date, months_ahead integer)
+        RETURNS integer AS $$
+        DECLARE
+            month_start date := date_trunc('month', from_month)::date;
+            last_month date := (date_trunc('month', now() AT TIME ZONE 'UTC') + make_interval(months => months_ahead))::date;
+            partition_name text;
+            created integer := 0;
+        BEGIN
+            WHILE month_start <= last_month LOOP
+                partition_name := format('transactions_%s', to_char(month_start, 'YYYY_MM'));
+                IF to_regclass(partition_name) IS NULL THEN
+                    EXECUTE format(
+                        'CREATE TABLE %I PARTITION OF transactions FOR VALUES FROM (%L) TO (%L)',
+                        partition_name,
+                        month_start::timestamp AT TIME ZONE 'UTC',
+                        (month_start + interval '1 month')::timestamp AT TIME ZONE 'UTC'
+                    );
+                    created := created + 1;
+                END IF;
+                month_start := (month_start + interval '1 month')::date;
+            END LOOP;
+            RETURN created;
+        END
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        """
+        SELECT ensure_transaction_partitions(
+            coalesce((SELECT min(created_at) FROM transactions_legacy), now())::date,
+            %d
+        )
+        """ % MONTHS_AHEAD
+    )
+    # No DEFAULT partition: a row in it would block creating its month's
+    # partition later. PartitionService keeps months created ahead instead.
+
+    op.execute(f"INSERT INTO transactions ({COLUMNS}) SELECT {COLUMNS} FROM transactions_legacy")
+    op.execute("DROP TABLE transactions_legacy")
+
+    # The primary key must include the partition key
+    op.create_primary_key('transactions_pkey', 'transactions', ['uid', 'created_at'])
+    op.create_foreign_key('transactions_from_user_uid_fkey', 'transactions', 'users', ['from_user_uid'], ['uid'])
+    op.create_foreign_key('transactions_to_user_uid_fkey', 'transactions', 'users', ['to_user_uid'], ['uid'])
+    op.create_foreign_key('transactions_group_uid_fkey', 'transactions', 'groups', ['group_uid'], ['uid'])
+    for name, columns in INDEXES:
+        op.create_index(name, 'transactions', columns, unique=False)
+
+    # Partitioned tables can't carry a global unique index on external_reference,
+    # so uniqueness is enforced through a small claim table filled by trigger.
+    op.create_table('transaction_external_refs',
+    sa.Column('external_reference', sa.String(), nullable=False),
+    sa.Column('transaction_uid', sa.Uuid(), nullable=False),
+    sa.Column('created_at', sa.TIMESTAMP(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('external_reference')
+    )
+    op.execute(
+        """
+        INSERT INTO transaction_external_refs (external_reference, transaction_uid, created_at)
+        SELECT external_reference, uid, created_at FROM transactions WHERE external_reference IS NOT NULL
+        """
+    )
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION transactions_claim_external_ref() RETURNS trigger AS $$
+        BEGIN
+            IF NEW.external_reference IS NOT NULL THEN
+                INSERT INTO transaction_external_refs (external_reference, transaction_uid, created_at)
+                VALUES (NEW.external_reference, NEW.uid, NEW.created_at);
+            END IF;
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER transactions_claim_external_ref
+        AFTER INSERT ON transactions
+        FOR EACH ROW EXECUTE FUNCTION transactions_claim_external_ref()
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS transactions_claim_external_ref ON transactions")
+    op.execute("DROP FUNCTION IF EXISTS transactions_claim_external_ref()")
+    op.drop_table('transaction_external_refs')
+
+    op.execute("ALTER TABLE transactions RENAME TO transactions_partitioned")
+    op.execute("CREATE TABLE transactions (LIKE transactions_partitioned INCLUDING DEFAULTS)")
+    op.execute(f"INSERT INTO transactions ({COLUMNS}) SELECT {COLUMNS} FROM transactions_partitioned")
+    op.execute("DROP TABLE transactions_partitioned CASCADE")
+    op.execute("DROP FUNCTION IF EXISTS ensure_transaction_partitions(date, integer)")
+
+    op.create_primary_key('transactions_pkey', 'transactions', ['uid'])
+    op.create_foreign_key('transactions_from_user_uid_fkey', 'transactions', 'users', ['from_user_uid'], ['uid'])
+    op.create_foreign_key('transactions_to_user_uid_fkey', 'transactions', 'users', ['to_user_uid'], ['uid'])
+    op.create_foreign_key('transactions_group_uid_fkey', 'transactions', 'groups', ['group_uid'], ['uid'])
+    op.create_index('ix_transactions_external_reference', 'transactions', ['external_reference'], unique=True)
+    op.create_index('ix_transactions_from_user_uid', 'transactions', ['from_user_uid'], unique=False)
+    op.create_index('ix_transactions_to_user_uid', 'transactions', ['to_user_uid'], unique=False)
+    op.create_index('ix_transactions_group_uid', 'transactions', ['group_uid'], unique=False)
@@ -0,0 +1,75 @@
+"""hubtel_events jsonb, dedup key, unprocessed index and archive table
+
+Revision ID: 1b7e4f2a9c83
+Revises: 0a6b3c9d5e21
+Create Date: 2026-10-19 13:52:30.447091
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa 
+import sqlmodel
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1b7e4f2a9c83'
+down_revision: Union[str, None] = '0a6b3c9d5e21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.alter_column('hubtel_events', 'payload',
+               existing_type=sa.JSON(),
+               type_=postgresql.JSONB(),
+               postgresql_using='payload::jsonb',
+               existing_nullable=False)
+    op.add_column('hubtel_events', sa.Column('dedup_key', sa.String(), nullable=True))
+
+    # Claim each (transaction_id, status) already settled by the oldest processed event
+    op.execute(
+        """
+        UPDATE hubtel_events AS e
+        SET dedup_key = first.transaction_id || ':' || lower(first.status)
+        FROM (
+            SELECT DISTINCT ON (transaction_id, lower(status)) uid, transaction_id, status
+            FROM hubtel_events
+            WHERE processed AND transaction_id IS NOT NULL AND status IS NOT NULL
+            ORDER BY transaction_id, lower(status), created_at
+        ) AS first
+        WHERE e.uid = first.uid
+        """
+    )
+    op.create_unique_constraint('uq_hubtel_events_dedup_key', 'hubtel_events', ['dedup_key'])
+    op.create_index('ix_hubtel_events_unprocessed', 'hubtel_events', ['created_at'], unique=False,
+                    postgresql_where=sa.text('processed = false'))
+
+    op.create_table('hubtel_events_archive',
+    sa.Column('uid', sa.UUID(), nullable=False),
+    sa.Column('external_id', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.Column('transaction_id', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.Column('status', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.Column('signature_valid', sa.Boolean(), nullable=False),
+    sa.Column('processed', sa.Boolean(), nullable=False),
+    sa.Column('processing_error', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.Column('dedup_key', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.Column('payload', postgresql.JSONB(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('uid')
+    )
+    op.create_index(op.f('ix_hubtel_events_archive_created_at'), 'hubtel_events_archive', ['created_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_hubtel_events_archive_created_at'), table_name='hubtel_events_archive')
+    op.drop_table('hubtel_events_archive')
+    op.drop_index('ix_hubtel_events_unprocessed', table_name='hubtel_events')
+    op.drop_constraint('uq_hubtel_events_dedup_key', 'hubtel_events', type_='unique')
+    op.drop_column('hubtel_events', 'dedup_key')
+    op.alter_column('hubtel_events', 'payload',
+               existing_type=postgresql.JSONB(),
+               type_=sa.JSON(),
+               postgresql_using='payload::json',
+               existing_nullable=False)
@@ -0,0 +1,33 @@
+"""entity versions for conditional GETs
+
+Revision ID: b3e1c7d9a2f4
+Revises: 4a8f255ba28c
+Create Date: 2026-10-19 09:12:04.118230
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa 
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3e1c7d9a2f4'
+down_revision: Union[str, None] = '4a8f255ba28c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('wallets', sa.Column('version', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('group_wallets', sa.Column('version', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('groups', sa.Column('version', sa.Integer(), server_default='0', nullable=False))
+    op.create_index('ix_messages_group_created', 'messages', ['group_uid', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_messages_group_created', table_name='messages')
+    op.drop_column('groups', 'version')
+    op.drop_column('group_wallets', 'version')
+    op.drop_column('wallets', 'version')
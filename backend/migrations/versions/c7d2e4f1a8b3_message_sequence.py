@@ -0,0 +1,55 @@
+"""per-group message sequence numbers
+
+Revision ID: c7d2e4f1a8b3
+Revises: b3e1c7d9a2f4
+Create Date: 2026-10-19 10:03:41.502117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa 
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7d2e4f1a8b3'
+down_revision: Union[str, None] = 'b3e1c7d9a2f4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('groups', sa.Column('message_seq', sa.BigInteger(), server_default='0', nullable=False))
+    op.add_column('messages', sa.Column('seq', sa.BigInteger(), nullable=True))
+
+    # Backfill existing history in creation order, then seed each group's counter
+    op.execute(
+        """
+        UPDATE messages AS m
+        SET seq = numbered.rn
+        FROM (
+            SELECT uid, row_number() OVER (PARTITION BY group_uid ORDER BY created_at, uid) AS rn
+            FROM messages
+        ) AS numbered
+        WHERE m.uid = numbered.uid
+        """
+    )
+    op.execute(
+        """
+        UPDATE groups AS g
+        SET message_seq = counts.max_seq
+        FROM (
+            SELECT group_uid, max(seq) AS max_seq FROM messages GROUP BY group_uid
+        ) AS counts
+        WHERE g.uid = counts.group_uid
+        """
+    )
+
+    op.create_index('ix_messages_group_seq', 'messages', ['group_uid', 'seq'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_messages_group_seq', table_name='messages')
+    op.drop_column('messages', 'seq')
+    op.drop_column('groups', 'message_seq')
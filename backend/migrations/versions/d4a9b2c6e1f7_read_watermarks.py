@@ -0,0 +1,39 @@
+"""read watermarks per group member
+
+Revision ID: d4a9b2c6e1f7
+Revises: c7d2e4f1a8b3
+Create Date: 2026-10-19 10:48:19.774305
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa 
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4a9b2c6e1f7'
+down_revision: Union[str, None] = 'c7d2e4f1a8b3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('group_members', sa.Column('last_read_seq', sa.BigInteger(), server_default='0', nullable=False))
+    # Existing members start fully caught up rather than with their whole history unread
+    op.execute(
+        """
+        UPDATE group_members AS gm
+        SET last_read_seq = g.message_seq
+        FROM groups AS g
+        WHERE gm.group_uid = g.uid
+        """
+    )
+    # get_user_groups drives from the member's rows
+    op.create_index('ix_group_members_user_group', 'group_members', ['user_uid', 'group_uid'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_group_members_user_group', table_name='group_members')
+    op.drop_column('group_members', 'last_read_seq')
@@ -0,0 +1,80 @@
+"""full-text search over messages
+
+Revision ID: e8f3a1b5c9d2
+Revises: d4a9b2c6e1f7
+Create Date: 2026-10-19 11:37:52.260941
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa 
+import sqlmodel
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8f3a1b5c9d2'
+down_revision: Union[str, None] = 'd4a9b2c6e1f7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Rows updated per backfill statement; each batch commits on its own so the
+# backfill never holds locks on the whole table.
+BACKFILL_BATCH_SIZE = 5000
+
+
+def upgrade() -> None:
+    op.add_column('messages', sa.Column('search_vector', postgresql.TSVECTOR(), nullable=True))
+
+    # Keep the document current for every insert (and content edit) from any code path
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION messages_search_vector_update() RETURNS trigger AS $$
+        BEGIN
+            NEW.search_vector := to_tsvector('simple', coalesce(NEW.content, ''));
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER messages_search_vector_update
+        BEFORE INSERT OR UPDATE OF content ON messages
+        FOR EACH ROW EXECUTE FUNCTION messages_search_vector_update()
+        """
+    )
+
+    backfill = (
+        """
+        UPDATE messages SET search_vector = to_tsvector('simple', coalesce(content, ''))
+        WHERE uid IN (
+            SELECT uid FROM messages WHERE search_vector IS NULL LIMIT %d
+        )
+        """ % BACKFILL_BATCH_SIZE
+    )
+
+    with op.get_context().autocommit_block():
+        if context.is_offline_mode():
+            op.execute(backfill.replace("LIMIT %d" % BACKFILL_BATCH_SIZE, ""))
+        else:
+            bind = op.get_bind()
+            while bind.execute(sa.text(backfill)).rowcount:
+                pass
+
+        op.create_index(
+            'ix_messages_search_vector',
+            'messages',
+            ['search_vector'],
+            unique=False,
+            postgresql_using='gin',
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_messages_search_vector', table_name='messages', postgresql_using='gin')
+    op.execute("DROP TRIGGER IF EXISTS messages_search_vector_update ON messages")
+    op.execute("DROP FUNCTION IF EXISTS messages_search_vector_update()")
+    op.drop_column('messages', 'search_vector')
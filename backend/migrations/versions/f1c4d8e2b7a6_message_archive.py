@@ -0,0 +1,44 @@
+"""message retention and archive segments
+
+Revision ID: f1c4d8e2b7a6
+Revises: e8f3a1b5c9d2
+Create Date: 2026-10-19 12:21:09.634418
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa 
+import sqlmodel
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f1c4d8e2b7a6'
+down_revision: Union[str, None] = 'e8f3a1b5c9d2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('groups', sa.Column('message_retention_days', sa.Integer(), nullable=True))
+    op.create_table('message_archive_segments',
+    sa.Column('uid', sa.UUID(), nullable=False),
+    sa.Column('group_uid', sa.Uuid(), nullable=False),
+    sa.Column('first_seq', sa.BigInteger(), nullable=False),
+    sa.Column('last_seq', sa.BigInteger(), nullable=False),
+    sa.Column('first_created_at', postgresql.TIMESTAMP(timezone=True), nullable=False),
+    sa.Column('last_created_at', postgresql.TIMESTAMP(timezone=True), nullable=False),
+    sa.Column('message_count', sa.Integer(), nullable=False),
+    sa.Column('data', postgresql.BYTEA(), nullable=False),
+    sa.Column('created_at', postgresql.TIMESTAMP(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['group_uid'], ['groups.uid'], ),
+    sa.PrimaryKeyConstraint('uid')
+    )
+    op.create_index('ix_message_archive_group_seq', 'message_archive_segments', ['group_uid', 'last_seq'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_message_archive_group_seq', table_name='message_archive_segments')
+    op.drop_table('message_archive_segments')
+    op.drop_column('groups', 'message_retention_days')
@@ -1,10 +1,16 @@
+import logging
 from fastapi import FastAPI 
 # from fastapi_pagination import Page, add_pagination, paginate
 from src.route.auth_route import auth_router
 from src.route.group_route import group_router 
 from src.route.socket_route import socket_router
 from src.route.wallet_route import wallet_router
+from src.route.metrics_route import metrics_router
+from src.route.profile_route import profile_router
+from src.db.main import get_db_session
+from src.service.partition_service import PartitionService
 from .middleware import register_middleware
+from .logging_config import configure_logging
 
 
 
@@ -34,10 +40,26 @@ app = FastAPI(
 )
 
 
+configure_logging()
 register_middleware(app)
 
 app.include_router(auth_router, prefix=f"{version_prefix}", tags=["Auth"]) 
 app.include_router(group_router, prefix=f"{version_prefix}", tags=["Group"]) 
 app.include_router(socket_router, prefix=f"{version_prefix}", tags=["Socket"]) 
 app.include_router(wallet_router, prefix=f"{version_prefix}", tags=["Wallet"])
+app.include_router(metrics_router, prefix=f"{version_prefix}", tags=["Metrics"])
+app.include_router(profile_router, prefix=f"{version_prefix}", tags=["Admin"])
+
+
+@app.on_event("startup")
+async def ensure_transaction_partitions():
+    # Transactions has no default partition, so a missing month breaks every
+    # payment insert; don't wait for the daily maintenance job to create it.
+    try:
+        async with get_db_session() as db:
+            created = await PartitionService().ensure_partitions(db)
+        if created:
+            logging.getLogger(__name__).info("created %d transaction partition(s)", created)
+    except Exception:
+        logging.getLogger(__name__).exception("could not ensure transaction partitions")
 
@@ -2,7 +2,10 @@ from passlib.context import CryptContext
 from jose import JWTError, jwt
 from datetime import datetime, timedelta, timezone
 from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
 import os 
+from src.metrics import bcrypt_in_flight
 
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -10,12 +13,34 @@ SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-change-in-production-min-3
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
 
+# bcrypt is deliberately slow (~100ms+ per call); run it off the event loop on
+# a bounded pool so a login burst queues here instead of stalling every request
+BCRYPT_WORKERS = int(os.getenv("BCRYPT_WORKERS", "4"))
+bcrypt_executor = ThreadPoolExecutor(max_workers=BCRYPT_WORKERS, thread_name_prefix="bcrypt")
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
+async def _run_bcrypt(fn, *args):
+    bcrypt_in_flight.inc()
+    try:
+        return await asyncio.get_running_loop().run_in_executor(bcrypt_executor, fn, *args)
+    finally:
+        bcrypt_in_flight.dec()
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await _run_bcrypt(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    return await _run_bcrypt(get_password_hash, password)
+
+def bcrypt_queue_depth() -> int:
+    """Jobs waiting for a free bcrypt worker."""
+    return max(0, int(bcrypt_in_flight.get()) - BCRYPT_WORKERS)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
     if expires_delta:
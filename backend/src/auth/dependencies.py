@@ -1,4 +1,6 @@
 import uuid
+import asyncio
+import logging
 from fastapi import Depends, HTTPException, status, WebSocket
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -8,9 +10,13 @@ from src.db.main import get_db
 from src.db.models import User
 from src.auth.auth import  verify_token
 from fastapi import Request
+from typing import Optional
+from src.config import Config
+from src.wire import JSON, EncodedEvent, send_frame
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
 
 
 class TokenBearer(HTTPBearer):
@@ -47,27 +53,204 @@ class RefreshTokenBearer(TokenBearer):
 class ConnectionManager:
     def __init__(self):
         self.active_connections: dict = {}  # group_id -> list of websockets
+        self.connection_users: dict = {}  # websocket -> user_id
+        self.user_counts: dict = {}  # user_id -> number of live sockets
+        self.connection_encodings: dict = {}  # websocket -> wire encoding
+        # Presence and typing state; never persisted
+        self.group_presence: dict = {}  # group_id -> {user_id: socket count}
+        self.typing_pending: dict = {}  # group_id -> {user_id: name}
+        self.typing_timers: dict = {}  # group_id -> pending flush TimerHandle
+        # The loop only holds weak references to tasks; keep ours until they finish
+        self.background_tasks: set = set()
+
+    @property
+    def live_connections(self) -> int:
+        return len(self.connection_users)
+
+    def exceeded_budget(self, group_uid: uuid.UUID, user_uid) -> Optional[str]:
+        """Return the name of the exceeded budget, or None if the socket may connect."""
+        if live_socket_count() >= Config.WS_MAX_CONNECTIONS_PER_NODE:
+            return "node"
+        if len(self.active_connections.get(group_uid, [])) >= Config.WS_MAX_CONNECTIONS_PER_GROUP:
+            return "group"
+        if self.user_counts.get(str(user_uid), 0) >= Config.WS_MAX_CONNECTIONS_PER_USER:
+            return "user"
+        return None
     
-    async def connect(self, websocket: WebSocket, group_uid: uuid.UUID):
+    async def connect(self, websocket: WebSocket, group_uid: uuid.UUID, user_uid=None, encoding: str = JSON):
         await websocket.accept()
         if group_uid not in self.active_connections:
             self.active_connections[group_uid] = []
         self.active_connections[group_uid].append(websocket)
+        self.connection_users[websocket] = str(user_uid)
+        self.connection_encodings[websocket] = encoding
+        self.user_counts[str(user_uid)] = self.user_counts.get(str(user_uid), 0) + 1
+
+        # Snapshot to the new socket, then announce only a user's first socket in the group
+        presence = self.group_presence.setdefault(group_uid, {})
+        first_socket = str(user_uid) not in presence
+        presence[str(user_uid)] = presence.get(str(user_uid), 0) + 1
+        await self.send_event(websocket, {"type": "presence", "online": list(presence)})
+        if first_socket:
+            await self.broadcast_event({"type": "presence_join", "user_id": str(user_uid)}, group_uid, exclude=websocket)
     
     def disconnect(self, websocket: WebSocket, group_uid: uuid.UUID):
-        if group_uid in self.active_connections:
-            self.active_connections[group_uid].remove(websocket)
+        connections = self.active_connections.get(group_uid)
+        if connections and websocket in connections:
+            connections.remove(websocket)
+            if not connections:
+                del self.active_connections[group_uid]
+
+        self.connection_encodings.pop(websocket, None)
+        user_uid = self.connection_users.pop(websocket, None)
+        if user_uid is not None:
+            remaining = self.user_counts.get(user_uid, 1) - 1
+            if remaining > 0:
+                self.user_counts[user_uid] = remaining
+            else:
+                self.user_counts.pop(user_uid, None)
+            self._leave_group(group_uid, user_uid)
+
+    def _leave_group(self, group_uid: uuid.UUID, user_uid: str):
+        presence = self.group_presence.get(group_uid)
+        if not presence or user_uid not in presence:
+            return
+        presence[user_uid] -= 1
+        if presence[user_uid] > 0:
+            return
+        del presence[user_uid]
+        if not presence:
+            del self.group_presence[group_uid]
+            self.typing_pending.pop(group_uid, None)
+            timer = self.typing_timers.pop(group_uid, None)
+            if timer is not None:
+                timer.cancel()
+            return
+        # disconnect() is sync, so the leave event goes out on the loop
+        self._spawn(self.broadcast_event({"type": "presence_leave", "user_id": user_uid}, group_uid))
+
+    def _spawn(self, coro):
+        task = asyncio.get_running_loop().create_task(coro)
+        self.background_tasks.add(task)
+        task.add_done_callback(self._task_done)
+        return task
+
+    def _task_done(self, task: asyncio.Task):
+        self.background_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("Chat background task failed", exc_info=task.exception())
 
-    async def broadcast(self, message: str, group_uid: uuid.UUID):
+    def online_users(self, group_uid: uuid.UUID) -> list:
+        return list(self.group_presence.get(group_uid, {}))
+
+    def typing(self, group_uid: uuid.UUID, user_uid, name: str):
+        """Record a typing signal; at most one typing event per group per interval is sent."""
+        self.typing_pending.setdefault(group_uid, {})[str(user_uid)] = name
+        if group_uid in self.typing_timers:
+            return
+        self.typing_timers[group_uid] = asyncio.get_running_loop().call_later(
+            Config.WS_TYPING_BROADCAST_MS / 1000,
+            lambda: self._spawn(self._flush_typing(group_uid)),
+        )
+
+    async def _flush_typing(self, group_uid: uuid.UUID):
+        self.typing_timers.pop(group_uid, None)
+        typists = self.typing_pending.pop(group_uid, None)
+        if not typists:
+            return
+        users = [{"user_id": uid, "name": name} for uid, name in typists.items()]
+        await self.broadcast_event({"type": "typing", "users": users}, group_uid)
+
+    def encoding_for(self, websocket: WebSocket) -> str:
+        return self.connection_encodings.get(websocket, JSON)
+
+    async def send_event(self, websocket: WebSocket, event: dict):
+        try:
+            await send_frame(websocket, EncodedEvent(event).frame(self.encoding_for(websocket)))
+        except Exception:
+            pass
+
+    async def broadcast(self, message: str, group_uid: uuid.UUID, exclude: Optional[WebSocket] = None):
         if group_uid in self.active_connections:
-            for connection in self.active_connections[group_uid]:
+            for connection in list(self.active_connections[group_uid]):
+                if connection is exclude:
+                    continue
                 try:
                     await connection.send_text(message)
                 except:
                     pass
 
+    async def broadcast_event(self, event: dict, group_uid: uuid.UUID, exclude: Optional[WebSocket] = None):
+        """Fan an event out to a group, encoding it once per wire encoding in use."""
+        if group_uid not in self.active_connections:
+            return
+        encoded = EncodedEvent(event)
+        for connection in list(self.active_connections[group_uid]):
+            if connection is exclude:
+                continue
+            try:
+                await send_frame(connection, encoded.frame(self.encoding_for(connection)))
+            except Exception:
+                pass
+
+    def stats(self) -> dict:
+        return {
+            "connections": self.live_connections,
+            "groups": len(self.active_connections),
+            "users": len(self.user_counts),
+        }
+
 manager = ConnectionManager()
 
+
+# Per-user notification channel (transaction status pushes)
+class UserConnectionManager:
+    def __init__(self):
+        self.active_connections: dict = {}  # user_id -> list of websockets
+
+    @property
+    def live_connections(self) -> int:
+        return sum(len(connections) for connections in self.active_connections.values())
+
+    def exceeded_budget(self, user_uid) -> Optional[str]:
+        """Return the name of the exceeded budget, or None if the socket may connect."""
+        if live_socket_count() >= Config.WS_MAX_CONNECTIONS_PER_NODE:
+            return "node"
+        if len(self.active_connections.get(str(user_uid), [])) >= Config.WS_MAX_CONNECTIONS_PER_USER:
+            return "user"
+        return None
+
+    async def connect(self, websocket: WebSocket, user_uid: str):
+        await websocket.accept()
+        self.active_connections.setdefault(str(user_uid), []).append(websocket)
+
+    def disconnect(self, websocket: WebSocket, user_uid: str):
+        connections = self.active_connections.get(str(user_uid))
+        if connections and websocket in connections:
+            connections.remove(websocket)
+            if not connections:
+                del self.active_connections[str(user_uid)]
+
+    async def send_to_user(self, message: str, user_uid):
+        for connection in list(self.active_connections.get(str(user_uid), [])):
+            try:
+                await connection.send_text(message)
+            except Exception:
+                self.disconnect(connection, user_uid)
+
+    def stats(self) -> dict:
+        return {
+            "connections": self.live_connections,
+            "users": len(self.active_connections),
+        }
+
+notifier = UserConnectionManager()
+
+
+def live_socket_count() -> int:
+    """Gauge of websockets currently held open by this process."""
+    return manager.live_connections + notifier.live_connections
+
 # Dependency to get current user
 async def get_current_user(token_data: dict = Depends(AccessTokenBearer()), db: AsyncSession = Depends(get_db)) -> User:
     credentials_exception = HTTPException(
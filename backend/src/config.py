@@ -1,3 +1,4 @@
+from typing import Optional
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -10,6 +11,82 @@ class Settings(BaseSettings):
    HUBTEL_API_KEY:str
    HUBTEL_MERCHANT_ACCOUNT:str 
    ALLOWED_HOSTS: list
+   # Minimum seconds between read-watermark writes per chat connection
+   READ_WATERMARK_FLUSH_SECONDS: float = 2.0
+   # Websocket liveness and connection budgets
+   WS_HEARTBEAT_SECONDS: float = 20.0
+   WS_IDLE_TIMEOUT_SECONDS: float = 60.0
+   WS_MAX_CONNECTIONS_PER_USER: int = 10
+   WS_MAX_CONNECTIONS_PER_GROUP: int = 2000
+   WS_MAX_CONNECTIONS_PER_NODE: int = 20000
+   # Typing indicators are batched per group into one broadcast per window
+   WS_TYPING_BROADCAST_MS: int = 500
+   # Chat flood control: frame size cap, per (user, group) token bucket and
+   # optional merging of messages sent within WS_MERGE_WINDOW_MS (0 disables)
+   WS_MAX_FRAME_BYTES: int = 8192
+   WS_MAX_MESSAGE_BYTES: int = 4000  # UTF-8 encoded; larger messages are rejected
+   WS_MESSAGES_PER_SECOND: float = 2.0
+   WS_MESSAGE_BURST: float = 10.0
+   WS_MERGE_WINDOW_MS: int = 0
+   # Chat retention: messages per archive segment, and the fallback policy for
+   # groups without message_retention_days (None keeps history hot forever)
+   MESSAGE_ARCHIVE_SEGMENT_SIZE: int = 1000
+   MESSAGE_RETENTION_DEFAULT_DAYS: Optional[int] = None
+   # Transaction partitions: months created ahead, and how many months stay
+   # attached (None never detaches)
+   TRANSACTION_PARTITION_MONTHS_AHEAD: int = 3
+   TRANSACTION_PARTITION_RETENTION_MONTHS: Optional[int] = None
+   # hubtel_events older than this move to hubtel_events_archive
+   HUBTEL_EVENT_RETENTION_DAYS: int = 30
+   HUBTEL_EVENT_ARCHIVE_BATCH: int = 5000
+   # Settled (transaction_id, status) keys remembered in memory by the webhook
+   HUBTEL_SEEN_EVENTS_MAX: int = 100_000
+   # Per-request query accounting: Server-Timing header, slow-query and N+1
+   # warnings (a statement repeated this many times in one request)
+   SERVER_TIMING_ENABLED: bool = True
+   DB_SLOW_QUERY_MS: float = 200.0
+   DB_N_PLUS_ONE_THRESHOLD: int = 5
+   # /metrics is served only when METRICS_TOKEN is set, and then requires
+   # "Authorization: Bearer <METRICS_TOKEN>". METRICS_ENABLED=true serves it
+   # without a token (for deployments where only an internal network reaches it)
+   METRICS_ENABLED: Optional[bool] = None
+   METRICS_TOKEN: Optional[str] = None
+   # JSON logs go to stdout (and LOG_FILE) from a background thread. Access
+   # lines for the routes below are sampled at the given rate; errors and
+   # requests slower than LOG_SLOW_REQUEST_MS are always logged
+   LOG_LEVEL: str = "INFO"
+   LOG_FILE: Optional[str] = None
+   LOG_SLOW_REQUEST_MS: float = 1000.0
+   LOG_SAMPLE_RATES: dict = {
+      "/api/api/metrics": 0.0,
+      "/api/api/wallet": 0.1,
+      "/api/api/auth/me": 0.1,
+      "/api/api/groups": 0.1,
+      "/api/api/groups/{group_uid}/messages": 0.1,
+   }
+   DB_ECHO: bool = False
+   # Load shedding: low-priority reads (history, exports) get 503 while the
+   # smoothed loop lag or the in-flight request count is over its threshold
+   LOADSHED_ENABLED: bool = True
+   LOADSHED_LAG_MS: float = 200.0
+   LOADSHED_MAX_IN_FLIGHT: int = 500
+   LOADSHED_RETRY_AFTER_SECONDS: int = 2
+   LOOP_LAG_SAMPLE_SECONDS: float = 0.1
+   # Sampling profiler: cap on admin profile runs, and the secret a client
+   # must send in X-Profile to profile a single request (unset disables it)
+   PROFILER_MAX_SECONDS: float = 60.0
+   PROFILE_HEADER_TOKEN: Optional[str] = None
+   # Request deadlines (seconds; 0 = none). Overrides are regexes on the
+   # request path, first match wins. Streaming exports run until done.
+   REQUEST_TIMEOUT_SECONDS: float = 30.0
+   REQUEST_TIMEOUT_OVERRIDES: dict = {
+      r"/transactions/export$": 0,
+      r"/wallet/statement$": 0,
+      r"/admin/profile$": 0,
+      r"/wallet/hubtel/webhook$": 10,
+      r"/messages/search$": 5,
+      r"/groups/[^/]+/messages(/archive)?$": 5,
+   }
 
    model_config = SettingsConfigDict(
         
@@ -2,23 +2,42 @@ from sqlalchemy.ext.asyncio import create_async_engine
 from sqlalchemy.orm import sessionmaker
 from sqlmodel import SQLModel
 from contextlib import asynccontextmanager
+from sqlalchemy import event
+from sqlalchemy.orm import Session as SyncSession
 from src.config import Config
+from src.deadline import statement_budget
 from sqlmodel import SQLModel, create_engine
 from sqlalchemy.ext.asyncio import AsyncEngine
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 # ✅ Use `create_async_engine` for async operations
-async_engine = create_async_engine(Config.DATABASE_URL, echo=True, future=True)
+async_engine = create_async_engine(Config.DATABASE_URL, echo=Config.DB_ECHO, future=True)
 
 # ✅ Create a session factory once, not inside `get_session`
 AsyncSessionLocal = sessionmaker(
     bind=async_engine, class_=AsyncSession, expire_on_commit=False
 )
 
+# Cap every transaction opened while serving a request at the request's remaining
+# budget, so Postgres cancels statements the client has stopped waiting for.
+# Money-movement routes are exempt (see statement_budget).
+# SET LOCAL ends with the transaction, so pooled connections are unaffected.
+@event.listens_for(SyncSession, "after_begin")
+def _apply_request_deadline(session, transaction, connection):
+    left = statement_budget()
+    if left is not None:
+        connection.exec_driver_sql(f"SET LOCAL statement_timeout = {max(1, int(left * 1000))}")
+
 # ✅ Initialize DB (Only run at startup)
 async def init_db() -> None:
+    from src.service.partition_service import PartitionService
+
     async with async_engine.begin() as conn:
         await conn.run_sync(SQLModel.metadata.create_all)
+    # create_all makes `transactions` partitioned but empty of partitions,
+    # which rejects every insert until the months exist
+    async with get_db_session() as db:
+        await PartitionService().ensure_partitions(db)
 
 # ✅ Correct async session generator
 @asynccontextmanager
@@ -5,7 +5,8 @@ import enum
 import sqlalchemy.dialects.postgresql as pg
 from sqlmodel import SQLModel, Field, Relationship ,Column
 from sqlalchemy import Column as SAColumn, String as SAString, Enum as SAEnum 
-from sqlalchemy import JSON, Boolean, Index 
+from sqlalchemy import DDL, BigInteger, Index, UniqueConstraint, event
+from sqlalchemy.orm import object_session
 from sqlalchemy.sql import func 
 
 
@@ -61,6 +62,8 @@ class Wallet(SQLModel, table=True):
     user_uid:Optional[uuid.UUID] =  Field( nullable=True, foreign_key="users.uid",default=None)
     balance: float = Field(default=0.0)
     locked_balance: float = Field(default=0.0)
+    # Bumped on every update; used to build cheap ETags for GET /wallet
+    version: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
     created_at: datetime = Field(default_factory=now_utc, sa_column=SAColumn(pg.TIMESTAMP(timezone=True)))
     updated_at: datetime = Field(default_factory=now_utc, sa_column=SAColumn(pg.TIMESTAMP(timezone=True)))
 
@@ -82,6 +85,12 @@ class Group(SQLModel, table=True):
     created_at: datetime = Field(default_factory=now_utc, sa_column=SAColumn(pg.TIMESTAMP(timezone=True)))
     # Free-form rules/policies text set by group admins
     policies: Optional[str] = Field(default=None, sa_column=SAColumn(SAString, nullable=True))
+    # Bumped on every update and on membership changes (see GroupService)
+    version: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+    # Messages older than this many days move to the cold archive (None keeps them hot)
+    message_retention_days: Optional[int] = Field(default=None, nullable=True)
+    # Last chat sequence number handed out for this group
+    message_seq: int = Field(default=0, sa_column=SAColumn(BigInteger, nullable=False, server_default="0"))
 
     group_members: List["GroupMember"] = Relationship(back_populates="group")
     group_wallet: Optional["GroupWallet"] = Relationship(back_populates="group")
@@ -98,6 +107,8 @@ class GroupMember(SQLModel, table=True):
     group_uid:Optional[uuid.UUID] =  Field( nullable=True, foreign_key="groups.uid",default=None)
     user_uid:Optional[uuid.UUID] =  Field( nullable=True, foreign_key="users.uid",default=None)
     is_admin: bool = Field(default=False)
+    # Highest Message.seq this member has read; unread = Group.message_seq - last_read_seq
+    last_read_seq: int = Field(default=0, sa_column=SAColumn(BigInteger, nullable=False, server_default="0"))
     joined_at: datetime = Field(default_factory=now_utc, sa_column=SAColumn(pg.TIMESTAMP(timezone=True)))
 
     group: Optional[Group] = Relationship(back_populates="group_members")
@@ -112,6 +123,7 @@ class GroupWallet(SQLModel, table=True):
     )
     group_uid:Optional[uuid.UUID] =  Field( nullable=True, foreign_key="groups.uid",default=None)
     balance: float = Field(default=0.0)
+    version: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
     created_at: datetime = Field(default_factory=now_utc, sa_column=SAColumn(pg.TIMESTAMP(timezone=True)))
     updated_at: datetime = Field(default_factory=now_utc, sa_column=SAColumn(pg.TIMESTAMP(timezone=True)))
 
@@ -120,6 +132,8 @@ class GroupWallet(SQLModel, table=True):
 
 class Transaction(SQLModel, table=True):
     __tablename__ = "transactions"
+    # Monthly range partitions on created_at (see PartitionService)
+    __table_args__ = {"postgresql_partition_by": "RANGE (created_at)"}
 
     uid: uuid.UUID = Field(
         sa_column=SAColumn(pg.UUID, nullable=False, primary_key=True, default=uuid.uuid4)
@@ -135,15 +149,26 @@ class Transaction(SQLModel, table=True):
 
     phone_number: Optional[str] = None
     mobile_money_provider: Optional[str] = None
-    external_reference: Optional[str] = Field(default=None, sa_column=SAColumn(SAString, unique=True, index=True))
+    # Unique across partitions via transaction_external_refs
+    external_reference: Optional[str] = Field(default=None, sa_column=SAColumn(SAString, index=True))
 
-    created_at: datetime = Field(default_factory=now_utc, sa_column=SAColumn(pg.TIMESTAMP(timezone=True)))  
+    # Partition key, so it is part of the primary key
+    created_at: datetime = Field(default_factory=now_utc, sa_column=SAColumn(pg.TIMESTAMP(timezone=True), primary_key=True, nullable=False))  
     updated_at: datetime = Field(default_factory=now_utc, sa_column=SAColumn(pg.TIMESTAMP(timezone=True)))
     completed_at: Optional[datetime] = Field(default=None, sa_column=SAColumn(pg.TIMESTAMP(timezone=True), nullable=True))
 
     group: Optional[Group] = Relationship(back_populates="transactions")
 
 
+class TransactionExternalRef(SQLModel, table=True):
+    """Claims an external_reference for exactly one transaction (filled by trigger)."""
+    __tablename__ = "transaction_external_refs"
+
+    external_reference: str = Field(sa_column=SAColumn(SAString, primary_key=True))
+    transaction_uid: uuid.UUID
+    created_at: datetime = Field(sa_column=SAColumn(pg.TIMESTAMP(timezone=True), nullable=False))
+
+
 class Message(SQLModel, table=True):
     __tablename__ = "messages"
 
@@ -152,14 +177,36 @@ class Message(SQLModel, table=True):
     )
     group_uid:Optional[uuid.UUID] =  Field( nullable=True, foreign_key="groups.uid",default=None)
     sender_uid: uuid.UUID = Field(foreign_key="users.uid", index=True)
+    # Per-group monotonic sequence, allocated from Group.message_seq at insert
+    seq: Optional[int] = Field(default=None, sa_column=SAColumn(BigInteger, nullable=True))
     content: str
+    # Full-text document for search; filled by the messages_search_vector_update trigger
+    search_vector: Optional[str] = Field(default=None, sa_column=SAColumn(pg.TSVECTOR, nullable=True))
     created_at: datetime = Field(default_factory=now_utc, sa_column=SAColumn(pg.TIMESTAMP(timezone=True)))
 
     group: Optional[Group] = Relationship(back_populates="messages")
     sender: Optional[User] = Relationship(back_populates="messages") 
 
+class MessageArchiveSegment(SQLModel, table=True):
+    """A gzip-compressed JSONL block of archived messages for one group."""
+    __tablename__ = "message_archive_segments"
+
+    uid: uuid.UUID = Field(
+        sa_column=SAColumn(pg.UUID, nullable=False, primary_key=True, default=uuid.uuid4)
+    )
+    group_uid: uuid.UUID = Field(foreign_key="groups.uid")
+    first_seq: int = Field(sa_column=SAColumn(BigInteger, nullable=False))
+    last_seq: int = Field(sa_column=SAColumn(BigInteger, nullable=False))
+    first_created_at: datetime = Field(sa_column=SAColumn(pg.TIMESTAMP(timezone=True), nullable=False))
+    last_created_at: datetime = Field(sa_column=SAColumn(pg.TIMESTAMP(timezone=True), nullable=False))
+    message_count: int
+    data: bytes = Field(sa_column=SAColumn(pg.BYTEA, nullable=False))
+    created_at: datetime = Field(default_factory=now_utc, sa_column=SAColumn(pg.TIMESTAMP(timezone=True)))
+
 class HubtelEvent(SQLModel, table=True):
     __tablename__ = "hubtel_events"
+    # Named to match the migration so autogenerate sees no drift
+    __table_args__ = (UniqueConstraint("dedup_key", name="uq_hubtel_events_dedup_key"),)
 
     uid: uuid.UUID = Field(
         sa_column=SAColumn(pg.UUID, nullable=False, primary_key=True, default=uuid.uuid4)
@@ -174,14 +221,16 @@ class HubtelEvent(SQLModel, table=True):
     signature_valid: bool = Field(default=False, nullable=False)
     processed: bool = Field(default=False, nullable=False)
     processing_error: Optional[str] = Field(default=None)
+    # "<transaction_id>:<status>", set only on the event that settled that status
+    dedup_key: Optional[str] = Field(default=None, sa_column=SAColumn(SAString, nullable=True))
 
     # Raw payload from Hubtel
     payload: Dict[str, Any] = Field(
-        sa_column=Column(JSON, nullable=False)
+        sa_column=Column(pg.JSONB, nullable=False)
     )
 
     created_at: datetime = Field(
-        default_factory=datetime.utcnow,
+        default_factory=now_utc,
         sa_column_kwargs={"server_default": func.now()},
     )
 
@@ -191,4 +240,118 @@ Index(
     "ix_hubtel_events_external_status",
     HubtelEvent.external_id,
     HubtelEvent.status,
-)
\ No newline at end of file
+)
+
+# Only the unprocessed backlog is scanned by reconciliation
+Index(
+    "ix_hubtel_events_unprocessed",
+    HubtelEvent.created_at,
+    postgresql_where=HubtelEvent.processed == False,
+)
+
+
+class HubtelEventArchive(SQLModel, table=True):
+    """Cold copy of hubtel_events rows moved out by the archival job."""
+    __tablename__ = "hubtel_events_archive"
+
+    uid: uuid.UUID = Field(
+        sa_column=SAColumn(pg.UUID, nullable=False, primary_key=True)
+    )
+    external_id: Optional[str] = None
+    transaction_id: Optional[str] = None
+    status: Optional[str] = None
+    signature_valid: bool = Field(default=False, nullable=False)
+    processed: bool = Field(default=False, nullable=False)
+    processing_error: Optional[str] = None
+    dedup_key: Optional[str] = None
+    payload: Dict[str, Any] = Field(sa_column=Column(pg.JSONB, nullable=False))
+    created_at: datetime = Field(sa_column=SAColumn(pg.TIMESTAMP(), nullable=False, index=True))
+
+# Time-bounded history and statements per owner
+Index("ix_transactions_group_created", Transaction.group_uid, Transaction.created_at)
+Index("ix_transactions_from_user_created", Transaction.from_user_uid, Transaction.created_at)
+Index("ix_transactions_to_user_created", Transaction.to_user_uid, Transaction.created_at)
+
+# Chat history and conditional GETs look up the latest messages per group
+Index(
+    "ix_messages_group_created",
+    Message.group_uid,
+    Message.created_at,
+)
+
+# Full-text search over chat history
+Index(
+    "ix_messages_search_vector",
+    Message.search_vector,
+    postgresql_using="gin",
+)
+
+# Archive lookups walk a group's segments by sequence range
+Index(
+    "ix_message_archive_group_seq",
+    MessageArchiveSegment.group_uid,
+    MessageArchiveSegment.last_seq,
+)
+
+# Membership lookups and the unread-count query start from the user
+Index(
+    "ix_group_members_user_group",
+    GroupMember.user_uid,
+    GroupMember.group_uid,
+)
+
+# Resume replays messages after a given sequence number
+Index(
+    "ix_messages_group_seq",
+    Message.group_uid,
+    Message.seq,
+    unique=True,
+)
+
+
+def _bump_version(mapper, connection, target):
+    session = object_session(target)
+    if session is not None and not session.is_modified(target, include_collections=False):
+        return
+    target.version = (target.version or 0) + 1
+
+
+for _versioned in (Wallet, GroupWallet, Group):
+    event.listen(_versioned, "before_update", _bump_version)
+
+
+# Same claim trigger the partitioning migration installs, so schemas built by
+# create_all (init_db) keep external_reference unique and visible to the webhook
+event.listen(Transaction.__table__, "after_create", DDL("""
+    CREATE OR REPLACE FUNCTION transactions_claim_external_ref() RETURNS trigger AS $$
+    BEGIN
+        IF NEW.external_reference IS NOT NULL THEN
+            INSERT INTO transaction_external_refs (external_reference, transaction_uid, created_at)
+            VALUES (NEW.external_reference, NEW.uid, NEW.created_at);
+        END IF;
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+""").execute_if(dialect="postgresql"))
+event.listen(Transaction.__table__, "after_create", DDL("""
+    CREATE TRIGGER transactions_claim_external_ref
+    AFTER INSERT ON transactions
+    FOR EACH ROW EXECUTE FUNCTION transactions_claim_external_ref()
+""").execute_if(dialect="postgresql"))
+
+
+# Search trigger from the message search migration, for the same reason: without
+# it search_vector stays NULL on a create_all schema and search finds nothing
+event.listen(Message.__table__, "after_create", DDL("""
+    CREATE OR REPLACE FUNCTION messages_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector := to_tsvector('simple', coalesce(NEW.content, ''));
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+""").execute_if(dialect="postgresql"))
+event.listen(Message.__table__, "after_create", DDL("""
+    CREATE TRIGGER messages_search_vector_update
+    BEFORE INSERT OR UPDATE OF content ON messages
+    FOR EACH ROW EXECUTE FUNCTION messages_search_vector_update()
+""").execute_if(dialect="postgresql"))
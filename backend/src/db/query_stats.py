@@ -0,0 +1,126 @@
+"""
+Per-request database query accounting.
+
+Engine cursor events attribute every statement to the QueryStats active in
+the current context (the request being served, set by QueryStatsMiddleware).
+SQLAlchemy's async layer runs the events in a greenlet that shares the
+caller's contextvars, so the attribution survives the asyncpg hop.
+"""
+
+import re
+import time
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+class QueryStats:
+    """Query count, total DB time and slowest statement for one unit of work."""
+
+    def __init__(self):
+        self.count = 0
+        self.total_seconds = 0.0
+        self.slowest_seconds = 0.0
+        self.slowest_statement: Optional[str] = None
+        self.statements: dict = {}  # normalised SQL -> executions
+
+    def record(self, statement: str, seconds: float):
+        self.count += 1
+        self.total_seconds += seconds
+        statement = _WHITESPACE.sub(" ", statement).strip()
+        self.statements[statement] = self.statements.get(statement, 0) + 1
+        if seconds > self.slowest_seconds:
+            self.slowest_seconds = seconds
+            self.slowest_statement = statement
+
+    def repeated(self, threshold: int) -> list:
+        """Statements executed at least `threshold` times (likely N+1 loops)."""
+        return [(sql, n) for sql, n in self.statements.items() if n >= threshold]
+
+    def server_timing(self) -> str:
+        value = f'db;dur={self.total_seconds * 1000:.2f};desc="{self.count} queries"'
+        if self.count:
+            value += f", db-slowest;dur={self.slowest_seconds * 1000:.2f}"
+        return value
+
+
+current_query_stats: ContextVar[Optional[QueryStats]] = ContextVar("current_query_stats", default=None)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if current_query_stats.get() is not None:
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = current_query_stats.get()
+    starts = conn.info.get("query_start")
+    if stats is None or not starts:
+        return
+    stats.record(statement, time.perf_counter() - starts.pop())
+
+
+@contextmanager
+def track_queries():
+    """Attribute queries issued in this context to a fresh QueryStats."""
+    stats = QueryStats()
+    token = current_query_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        current_query_stats.reset(token)
+
+
+# Budget collectors see every finished request, whichever thread served it
+# (TestClient runs the app in a worker thread, outside the test's context).
+_budget_collectors: list = []
+_collectors_lock = threading.Lock()
+
+
+def publish_request_stats(path: str, stats: QueryStats):
+    if not _budget_collectors:
+        return
+    with _collectors_lock:
+        for collector in _budget_collectors:
+            collector.append((path, stats))
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+@contextmanager
+def query_budget(max_queries: int):
+    """Test helper: fail if any request served inside the block runs more than max_queries.
+
+        with query_budget(5):
+            client.get(f"/api/api/groups/{group_uid}", headers=headers)
+
+    Queries issued directly in the block (e.g. calling a service) count too.
+    """
+    collected: list = []
+    with _collectors_lock:
+        _budget_collectors.append(collected)
+    try:
+        with track_queries() as direct:
+            yield collected
+    finally:
+        with _collectors_lock:
+            _budget_collectors.remove(collected)
+
+    if direct.count:
+        collected.append(("<direct>", direct))
+    over = [(path, stats) for path, stats in collected if stats.count > max_queries]
+    if over:
+        lines = []
+        for path, stats in over:
+            lines.append(f"{path}: {stats.count} queries (budget {max_queries})")
+            lines.extend(f"    {n}x {sql[:200]}" for sql, n in sorted(stats.statements.items(), key=lambda item: -item[1]))
+        raise QueryBudgetExceeded("Query budget exceeded\n" + "\n".join(lines))
@@ -0,0 +1,48 @@
+"""
+Per-request deadlines.
+
+DeadlineMiddleware stamps each HTTP request with an absolute deadline taken
+from its route budget. Downstream code reads the time left with remaining():
+HubtelService caps its HTTP timeout with it, and sessions cap
+statement_timeout with statement_budget() (src.db.main), so abandoned work
+stops holding pool slots.
+"""
+
+import re
+import time
+from contextvars import ContextVar
+from typing import Optional
+from src.config import Config
+
+request_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+# Set for money-movement routes (see src.loadshed.classify)
+request_critical: ContextVar[bool] = ContextVar("request_critical", default=False)
+
+_BUDGETS = [(re.compile(pattern), seconds) for pattern, seconds in Config.REQUEST_TIMEOUT_OVERRIDES.items()]
+
+
+def budget_for(path: str) -> Optional[float]:
+    """Seconds allowed for a request path; None means no deadline."""
+    for pattern, seconds in _BUDGETS:
+        if pattern.search(path):
+            return seconds or None
+    return Config.REQUEST_TIMEOUT_SECONDS or None
+
+
+def remaining() -> Optional[float]:
+    """Seconds left before the current request's deadline (None outside a request)."""
+    deadline = request_deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def statement_budget() -> Optional[float]:
+    """Seconds a DB statement may run, or None for no cap.
+
+    Money-movement routes get no cap: once Hubtel has accepted a payment the
+    ledger write that follows must finish even if the budget is spent.
+    """
+    if request_critical.get():
+        return None
+    return remaining()
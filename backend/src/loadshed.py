@@ -0,0 +1,96 @@
+"""
+Event-loop lag sampling and load shedding.
+
+LoopLagMonitor measures how late a periodic timer fires: on a healthy loop
+the lag is near zero, while blocking work (bcrypt on the loop, large
+serialisations, sync I/O) shows up directly as lag. LoadShedder combines the
+lag with the number of in-flight requests to decide when low-priority
+traffic should be turned away with 503 + Retry-After.
+"""
+
+import asyncio
+import re
+import time
+from typing import Optional
+from src.config import Config
+from src.metrics import REGISTRY, Counter, Gauge
+
+# Never shed: money movement and provider callbacks
+CRITICAL_PATHS = [re.compile(p) for p in (
+    r"/wallet/hubtel/webhook$",
+    r"/wallet/(deposit|withdraw|transfer)$",
+    r"/groups/[^/]+/(contribute|disburse)$",
+    r"/auth/(login|register)$",
+)]
+
+# Shed first: history reads and bulk exports that clients can retry later
+LOW_PRIORITY_PATHS = [re.compile(p) for p in (
+    r"/groups/[^/]+/messages(/archive)?$",
+    r"/messages/search$",
+    r"/groups/[^/]+/transactions(/export)?$",
+    r"/transactions$",
+    r"/wallet/statement$",
+)]
+
+CRITICAL, NORMAL, LOW = "critical", "normal", "low"
+
+
+def classify(path: str) -> str:
+    if any(p.search(path) for p in CRITICAL_PATHS):
+        return CRITICAL
+    if any(p.search(path) for p in LOW_PRIORITY_PATHS):
+        return LOW
+    return NORMAL
+
+
+class LoopLagMonitor:
+    def __init__(self, interval: float = 0.1, decay: float = 0.8):
+        self.interval = interval
+        self.decay = decay
+        self.lag = 0.0  # smoothed seconds
+        self.max_lag = 0.0  # worst sample since last read of max
+        self._task: Optional[asyncio.Task] = None
+
+    def ensure_started(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        while True:
+            expected = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            sample = max(0.0, time.perf_counter() - expected)
+            self.lag = self.decay * self.lag + (1 - self.decay) * sample
+            self.max_lag = max(self.max_lag, sample)
+
+    def take_max(self) -> float:
+        value, self.max_lag = self.max_lag, 0.0
+        return value
+
+
+class LoadShedder:
+    def __init__(self, monitor: LoopLagMonitor):
+        self.monitor = monitor
+        self.in_flight = 0
+
+    def overloaded(self) -> Optional[str]:
+        """Reason the process is overloaded, or None."""
+        if self.monitor.lag * 1000 >= Config.LOADSHED_LAG_MS:
+            return "loop_lag"
+        if self.in_flight >= Config.LOADSHED_MAX_IN_FLIGHT:
+            return "in_flight"
+        return None
+
+    def should_shed(self, priority: str) -> Optional[str]:
+        if not Config.LOADSHED_ENABLED or priority != LOW:
+            return None
+        return self.overloaded()
+
+
+loop_monitor = LoopLagMonitor(Config.LOOP_LAG_SAMPLE_SECONDS)
+load_shedder = LoadShedder(loop_monitor)
+
+requests_shed_total = REGISTRY.register(Counter(
+    "http_requests_shed_total", "Requests rejected by load shedding.", ("reason",)))
+REGISTRY.register(Gauge("event_loop_lag_seconds", "Smoothed event-loop lag.", callback=lambda: {(): loop_monitor.lag}))
+REGISTRY.register(Gauge("event_loop_lag_max_seconds", "Worst event-loop lag since the previous scrape.", callback=lambda: {(): loop_monitor.take_max()}))
@@ -0,0 +1,163 @@
+"""
+Minimal Prometheus-compatible metrics.
+
+Counters, gauges and histograms keep plain dicts keyed by label-value tuples,
+so recording costs a dict lookup and (for histograms) a bisect. Gauges that
+mirror existing state (pool usage, socket counts) are computed at scrape time
+from callbacks instead of being updated on every change.
+"""
+
+from bisect import bisect_left
+from typing import Callable, Iterable, Optional
+
+# Seconds; tuned for API latencies from ~1ms to tens of seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def header(self) -> list:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    def samples(self) -> list:
+        raise NotImplementedError
+
+    def render(self) -> list:
+        return self.header() + self.samples()
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self.values: dict = {}
+
+    def inc(self, *labels, amount: float = 1.0):
+        self.values[labels] = self.values.get(labels, 0.0) + amount
+
+    def samples(self) -> list:
+        return [f"{self.name}{_format_labels(self.labelnames, labels)} {value}" for labels, value in self.values.items()]
+
+
+class Gauge(Metric):
+    """Gauge set directly, or computed by `callback` returning {label tuple: value}."""
+
+    kind = "gauge"
+
+    def __init__(self, name, documentation, labelnames=(), callback: Optional[Callable[[], dict]] = None):
+        super().__init__(name, documentation, labelnames)
+        self.values: dict = {}
+        self.callback = callback
+
+    def set(self, value: float, *labels):
+        self.values[labels] = value
+
+    def inc(self, *labels, amount: float = 1.0):
+        self.values[labels] = self.values.get(labels, 0.0) + amount
+
+    def dec(self, *labels, amount: float = 1.0):
+        self.inc(*labels, amount=-amount)
+
+    def get(self, *labels) -> float:
+        return self.values.get(labels, 0.0)
+
+    def samples(self) -> list:
+        values = self.callback() if self.callback else self.values
+        return [f"{self.name}{_format_labels(self.labelnames, labels)} {value}" for labels, value in values.items()]
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self.series: dict = {}  # labels -> [bucket counts..., +Inf count, sum]
+
+    def observe(self, value: float, *labels):
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def samples(self) -> list:
+        lines = []
+        for labels, series in self.series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series[:-1]):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {series[-1]}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: list = []
+
+    def register(self, metric: Metric) -> Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+# HTTP
+http_requests_total = REGISTRY.register(Counter(
+    "http_requests_total", "HTTP requests by route template and status code.", ("method", "route", "status")))
+http_request_duration_seconds = REGISTRY.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template.", ("method", "route")))
+http_requests_in_flight = REGISTRY.register(Gauge(
+    "http_requests_in_flight", "HTTP requests currently being served."))
+http_requests_abandoned_total = REGISTRY.register(Counter(
+    "http_requests_abandoned_total", "Requests stopped early (deadline, statement timeout, client disconnect).", ("reason",)))
+
+# Database
+db_queries_per_request = REGISTRY.register(Histogram(
+    "db_queries_per_request", "Queries issued per HTTP request.", ("route",),
+    buckets=(1, 2, 3, 5, 8, 13, 21, 50, 100)))
+db_time_per_request_seconds = REGISTRY.register(Histogram(
+    "db_time_per_request_seconds", "Time spent in the database per HTTP request.", ("route",)))
+
+# Hubtel
+hubtel_request_duration_seconds = REGISTRY.register(Histogram(
+    "hubtel_request_duration_seconds", "Hubtel API call latency.", ("operation", "outcome")))
+hubtel_request_errors_total = REGISTRY.register(Counter(
+    "hubtel_request_errors_total", "Hubtel API calls that failed, by error kind.", ("operation", "kind")))
+hubtel_settlement_lag_seconds = REGISTRY.register(Histogram(
+    "hubtel_settlement_lag_seconds", "Time from transaction creation to webhook settlement.", ("type", "status"),
+    buckets=(1, 5, 15, 30, 60, 120, 300, 900, 1800, 3600, 21600, 86400)))
+
+# Password hashing executor
+bcrypt_in_flight = REGISTRY.register(Gauge(
+    "bcrypt_in_flight", "Password hash/verify jobs submitted and not yet finished."))
@@ -1,15 +1,364 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
+import asyncio
+import hmac
 import logging 
+import random
+import threading
+import time
+import uuid
 from src.config import Config
+from src.db.query_stats import track_queries, publish_request_stats
+from src.logging_config import request_id_var
+from src.loadshed import CRITICAL, classify, load_shedder, loop_monitor, requests_shed_total
+from src.deadline import budget_for, request_critical, request_deadline
+from src.profiler import SamplingProfiler, store_profile
+from src.metrics import (
+    http_requests_total, http_request_duration_seconds, http_requests_in_flight,
+    http_requests_abandoned_total, db_queries_per_request, db_time_per_request_seconds,
+)
+from sqlalchemy.exc import DBAPIError
 
+# Replaced by AccessLogMiddleware's structured summary lines
 logger = logging.getLogger("uvicorn.access")
 logger.disabled = True
 
+access_logger = logging.getLogger("src.access")
+
+query_logger = logging.getLogger("src.db.queries")
+
+# Postgres query_canceled, raised when statement_timeout fires
+QUERY_CANCELED = "57014"
+
+
+class QueryStatsMiddleware:
+    """Attribute DB queries to each HTTP request.
+
+    Adds a Server-Timing header (db time, query count, slowest statement),
+    exposes the stats as request.state.query_stats and warns about slow
+    statements and statements repeated enough to look like N+1 loops.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        with track_queries() as stats:
+            scope.setdefault("state", {})["query_stats"] = stats
+
+            async def send_wrapper(message):
+                if message["type"] == "http.response.start" and Config.SERVER_TIMING_ENABLED:
+                    elapsed = (time.perf_counter() - started) * 1000
+                    timing = f"{stats.server_timing()}, app;dur={elapsed:.2f}"
+                    message.setdefault("headers", []).append((b"server-timing", timing.encode()))
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                self._report(scope, stats)
+
+    def _report(self, scope, stats):
+        path = scope.get("path", "")
+        publish_request_stats(path, stats)
+
+        if stats.slowest_seconds * 1000 >= Config.DB_SLOW_QUERY_MS:
+            query_logger.warning(
+                "Slow query on %s %s: %.1fms %s",
+                scope.get("method"), path, stats.slowest_seconds * 1000, stats.slowest_statement,
+            )
+        for statement, times in stats.repeated(Config.DB_N_PLUS_ONE_THRESHOLD):
+            query_logger.warning(
+                "Possible N+1 on %s %s: %d executions of %s",
+                scope.get("method"), path, times, statement[:300],
+            )
+
+
+class MetricsMiddleware:
+    """Per-route latency histogram, status counts and per-request DB usage.
+
+    Labels use the matched route template (not the raw path) so cardinality
+    stays bounded; requests that match no route share one label.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        http_requests_in_flight.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            http_requests_in_flight.dec()
+            route = scope.get("route")
+            template = getattr(route, "path", None) or "<unmatched>"
+            method = scope.get("method", "")
+            http_request_duration_seconds.observe(time.perf_counter() - started, method, template)
+            http_requests_total.inc(method, template, str(status_code))
+
+            stats = scope.get("state", {}).get("query_stats")
+            if stats is not None:
+                db_queries_per_request.observe(stats.count, template)
+                db_time_per_request_seconds.observe(stats.total_seconds, template)
+
+
+class AccessLogMiddleware:
+    """Assign a request id and log one structured summary line per request.
+
+    The id comes from X-Request-ID when the client sends a sane one, is echoed
+    back on the response and is attached to every log record emitted while
+    the request is served. High-volume routes are sampled (LOG_SAMPLE_RATES).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope.get("headers", []):
+            if name == b"x-request-id" and 0 < len(value) <= 128:
+                request_id = value.decode("latin-1")
+                break
+        request_id = request_id or uuid.uuid4().hex
+        token = request_id_var.set(request_id)
+
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message.setdefault("headers", []).append((b"x-request-id", request_id.encode()))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if scope["type"] == "http":
+                self._log(scope, status_code, (time.perf_counter() - started) * 1000)
+            request_id_var.reset(token)
+
+    def _log(self, scope, status_code: int, duration_ms: float):
+        route = getattr(scope.get("route"), "path", None)
+        if status_code < 500 and duration_ms < Config.LOG_SLOW_REQUEST_MS:
+            rate = Config.LOG_SAMPLE_RATES.get(route, 1.0)
+            if rate < 1.0 and random.random() >= rate:
+                return
+
+        fields = {
+            "method": scope.get("method"),
+            "path": scope.get("path"),
+            "route": route,
+            "status": status_code,
+            "duration_ms": round(duration_ms, 2),
+        }
+        stats = scope.get("state", {}).get("query_stats")
+        if stats is not None:
+            fields["db_queries"] = stats.count
+            fields["db_ms"] = round(stats.total_seconds * 1000, 2)
+        client = scope.get("client")
+        if client:
+            fields["client"] = client[0]
+
+        level = logging.ERROR if status_code >= 500 else logging.INFO
+        access_logger.log(level, "%s %s %s", fields["method"], fields["path"], status_code, extra=fields)
+
+
+class LoadSheddingMiddleware:
+    """Reject low-priority HTTP requests with 503 while the process is overloaded.
+
+    Webhooks and money-movement routes are always admitted (see src.loadshed).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        loop_monitor.ensure_started()
+        reason = load_shedder.should_shed(classify(scope.get("path", "")))
+        if reason:
+            requests_shed_total.inc(reason)
+            await send({
+                "type": "http.response.start",
+                "status": 503,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"retry-after", str(Config.LOADSHED_RETRY_AFTER_SECONDS).encode()),
+                ],
+            })
+            await send({"type": "http.response.body", "body": b'{"detail":"Server busy, retry later"}'})
+            return
+
+        load_shedder.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            load_shedder.in_flight -= 1
+
+
+class RequestProfilingMiddleware:
+    """Profile a single request when it carries X-Profile: <PROFILE_HEADER_TOKEN>.
+
+    Only samples taken while the request's own task is running are counted.
+    The response gets an X-Profile-Id; admins fetch the collapsed stacks from
+    /api/admin/profile/{id}.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not Config.PROFILE_HEADER_TOKEN:
+            await self.app(scope, receive, send)
+            return
+
+        supplied = dict(scope.get("headers", [])).get(b"x-profile")
+        if supplied is None or not hmac.compare_digest(supplied, Config.PROFILE_HEADER_TOKEN.encode()):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = uuid.uuid4().hex
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message.setdefault("headers", []).append((b"x-profile-id", profile_id.encode()))
+            await send(message)
+
+        profiler = SamplingProfiler(
+            threading.get_ident(), 0.001, loop=asyncio.get_running_loop(), task=asyncio.current_task()
+        )
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profiler.stop()
+            store_profile(profile_id, profiler.collapsed())
+
+
+class DeadlineMiddleware:
+    """Enforce per-route request deadlines and stop work for vanished clients.
+
+    The deadline is published through src.deadline so DB transactions and
+    Hubtel calls inherit it. The handler runs in a child task that is
+    cancelled when the deadline passes (504 if nothing was sent yet) or when
+    the client disconnects. Money-movement routes are never cancelled
+    mid-flight and get no statement_timeout; only their Hubtel calls inherit
+    the budget, and their own error paths handle timeouts.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        path = scope.get("path", "")
+        budget = budget_for(path)
+        cancellable = classify(path) != CRITICAL
+        token = request_deadline.set(time.monotonic() + budget if budget else None)
+        critical_token = request_critical.set(not cancellable)
+
+        response_started = False
+        abandoned = None
+        messages: asyncio.Queue = asyncio.Queue()
+
+        async def send_wrapper(message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        handler = asyncio.create_task(self.app(scope, messages.get, send_wrapper))
+        request_deadline.reset(token)
+        request_critical.reset(critical_token)
+
+        async def listen():
+            # Forward request messages; a disconnect means nobody is waiting any more
+            nonlocal abandoned
+            while True:
+                message = await receive()
+                await messages.put(message)
+                if message["type"] == "http.disconnect":
+                    if cancellable and not handler.done():
+                        abandoned = "disconnect"
+                        handler.cancel()
+                    return
+
+        listener = asyncio.create_task(listen())
+        try:
+            done, _ = await asyncio.wait({handler}, timeout=budget if cancellable else None)
+            if handler not in done:
+                abandoned = "deadline"
+                handler.cancel()
+            try:
+                await handler
+            except asyncio.CancelledError:
+                if abandoned is None:
+                    raise
+            except DBAPIError as e:
+                if getattr(e.orig, "sqlstate", None) != QUERY_CANCELED:
+                    raise
+                abandoned = "statement_timeout"
+        finally:
+            listener.cancel()
+            if not handler.done():
+                handler.cancel()
+
+        if abandoned:
+            http_requests_abandoned_total.inc(abandoned)
+            if abandoned != "disconnect" and not response_started:
+                await send({
+                    "type": "http.response.start",
+                    "status": 504,
+                    "headers": [(b"content-type", b"application/json")],
+                })
+                await send({"type": "http.response.body", "body": b'{"detail":"Request deadline exceeded"}'})
+
 
 def register_middleware(app: FastAPI):
 
+    app.add_middleware(RequestProfilingMiddleware)
+
+    app.add_middleware(DeadlineMiddleware)
+
+    app.add_middleware(QueryStatsMiddleware)
+
+    app.add_middleware(MetricsMiddleware)
+
+    app.add_middleware(LoadSheddingMiddleware)
+
+    app.add_middleware(AccessLogMiddleware)
+
     app.add_middleware(
         CORSMiddleware,
         allow_origins=["*"],
@@ -0,0 +1,78 @@
+"""
+Low-overhead statistical profiler.
+
+A background thread reads the event-loop thread's current frame every
+`interval` seconds (sys._current_frames) and counts stacks. Output is the
+collapsed-stack format understood by flamegraph.pl, speedscope and friends:
+one "root;...;leaf count" line per distinct stack. The profiled code runs
+unmodified, so the cost is one stack walk per sample on the sampler thread.
+"""
+
+import asyncio
+import os
+import sys
+import threading
+from collections import Counter, OrderedDict
+from typing import Optional
+
+_CWD = os.getcwd() + os.sep
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    filename = code.co_filename
+    if filename.startswith(_CWD):
+        filename = filename[len(_CWD):]
+    name = getattr(code, "co_qualname", code.co_name)
+    return f"{name} ({filename}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """Sample one thread's stack; with `task`, only while that task is running."""
+
+    def __init__(self, thread_id: int, interval: float = 0.005, loop=None, task: Optional[asyncio.Task] = None):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.loop = loop
+        self.task = task
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            if self.task is not None and asyncio.current_task(self.loop) is not self.task:
+                continue
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+# Per-request profiles kept for retrieval by id (see the X-Profile header)
+RECENT_PROFILES_MAX = 20
+recent_profiles: OrderedDict = OrderedDict()
+
+
+def store_profile(profile_id: str, collapsed: str):
+    recent_profiles[profile_id] = collapsed
+    while len(recent_profiles) > RECENT_PROFILES_MAX:
+        recent_profiles.popitem(last=False)
@@ -0,0 +1,59 @@
+import time
+from collections import OrderedDict
+from typing import Hashable
+
+
+class TokenBucket:
+    """Classic token bucket: `rate` tokens per second, holding at most `burst`."""
+
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def allow(self, cost: float = 1.0) -> bool:
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return True
+        return False
+
+
+class KeyedRateLimiter:
+    """One token bucket per key (e.g. (user, group)), at most `max_keys` of them.
+
+    Buckets are kept in least-recently-used order. Idle buckets that have
+    refilled completely carry no state worth keeping and are dropped first;
+    if the table is still full, the least recently used bucket is evicted,
+    which at worst hands that key a fresh burst.
+    """
+
+    def __init__(self, rate: float, burst: float, max_keys: int = 100_000):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self.buckets: OrderedDict = OrderedDict()
+
+    def allow(self, key: Hashable, cost: float = 1.0) -> bool:
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            if len(self.buckets) >= self.max_keys:
+                self.prune()
+                while len(self.buckets) >= self.max_keys:
+                    self.buckets.popitem(last=False)
+            bucket = self.buckets[key] = TokenBucket(self.rate, self.burst)
+        else:
+            self.buckets.move_to_end(key)
+        return bucket.allow(cost)
+
+    def prune(self) -> None:
+        # LRU order is also `updated` order, so refilled buckets sit at the front
+        refill_seconds = self.burst / self.rate if self.rate > 0 else 0
+        cutoff = time.monotonic() - refill_seconds
+        while self.buckets and next(iter(self.buckets.values())).updated <= cutoff:
+            self.buckets.popitem(last=False)
@@ -1,7 +1,9 @@
 import uuid
-from fastapi import Depends,status, APIRouter, HTTPException
+from fastapi import Depends,status, APIRouter, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import List, Literal, Optional
+from datetime import datetime
 from dotenv import load_dotenv
 import json
 from src.auth.dependencies import get_current_user,AccessTokenBearer
@@ -9,15 +11,19 @@ from src.db.main import get_db, init_db
 from src.db.models import User
 from src.schema.schemas import (
     GroupCreate, GroupResponse, ContributionRequest, DisbursementRequest,
-    TransactionResponse,MessageResponse
+    TransactionResponse,MessageResponse,MessageSearchResponse,RetentionUpdate
 )
 from src.service.group_service import GroupService
+from src.service.archive_service import ArchiveService
+from src.service.statement_service import MEDIA_TYPES
+from src.utils import CONDITIONAL_CACHE_CONTROL, make_etag, etag_matches, not_modified
 
 load_dotenv() 
 
 
 group_router = APIRouter()
 group_service = GroupService()
+archive_service = ArchiveService()
 acccess_token_bearer = AccessTokenBearer()  
 
 @group_router.post("/api/groups", response_model=GroupResponse, status_code=status.HTTP_201_CREATED)
@@ -42,9 +48,19 @@ async def get_user_groups(
 @group_router.get("/api/groups/{group_uid}")
 async def get_group(
     group_uid: str,
+    request: Request,
+    response: Response,
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
+    version = await group_service.get_group_version(group_uid,current_user,db)
+    if version is not None:
+        etag = make_etag(*version)
+        if etag_matches(request.headers.get("If-None-Match"), etag):
+            return not_modified(etag)
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = CONDITIONAL_CACHE_CONTROL
+
     group = await group_service.get_group(group_uid,current_user,db)
     
     return group
@@ -110,6 +126,16 @@ async def update_group_policies(
     result = await group_service.update_group_policies(group_uid, pol_text, current_user, db)
     return result
 
+@group_router.patch("/api/groups/{group_uid}/retention")
+async def update_message_retention(
+    group_uid: str,
+    retention: RetentionUpdate,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    result = await group_service.update_message_retention(group_uid, retention.message_retention_days, current_user, db)
+    return result
+
 @group_router.get("/api/groups/{group_uid}/transactions", response_model=List[TransactionResponse])
 async def get_group_transactions(
     group_uid: str,
@@ -120,6 +146,23 @@ async def get_group_transactions(
     
     return transactions
 
+@group_router.get("/api/groups/{group_uid}/transactions/export")
+async def export_group_transactions(
+    group_uid: str,
+    format: Literal["csv", "ndjson"] = "csv",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    rows = await group_service.export_group_transactions(group_uid, format, start, end, current_user, db)
+
+    return StreamingResponse(
+        rows,
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="group-{group_uid}-statement.{format}"'},
+    )
+
 @group_router.get("/api/transactions", response_model=List[TransactionResponse])
 async def get_user_transactions(
     current_user: User = Depends(get_current_user),
@@ -133,9 +176,47 @@ async def get_user_transactions(
 @group_router.get("/api/groups/{group_uid}/messages", response_model=List[MessageResponse])
 async def get_group_messages(
     group_uid: str,
+    request: Request,
+    response: Response,
+    after_seq: Optional[int] = None,
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    messages = await group_service.get_group_messages(group_uid,current_user,db)
-    
-    return messages
\ No newline at end of file
+    # Validate before loading the page: new messages move message_seq and
+    # archiving bumps the group version, so neither can serve a stale 304
+    state = await group_service.get_messages_version(group_uid,current_user,db)
+    if state is not None:
+        etag = make_etag(group_uid, *state, after_seq)
+        if etag_matches(request.headers.get("If-None-Match"), etag):
+            return not_modified(etag)
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = CONDITIONAL_CACHE_CONTROL
+
+    messages = await group_service.get_group_messages(group_uid,current_user,db,after_seq)
+
+    return messages
+
+@group_router.get("/api/groups/{group_uid}/messages/archive", response_model=List[MessageResponse])
+async def get_archived_messages(
+    group_uid: str,
+    before_seq: Optional[int] = None,
+    limit: int = Query(default=100, ge=1, le=500),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    messages = await archive_service.get_archived_messages(group_uid, before_seq, limit, current_user, db)
+
+    return messages
+
+@group_router.get("/api/messages/search", response_model=MessageSearchResponse)
+async def search_messages(
+    q: str = Query(min_length=1, max_length=200),
+    group_uid: Optional[uuid.UUID] = None,
+    limit: int = Query(default=20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    results = await group_service.search_messages(q, current_user, db, group_uid, limit, cursor)
+
+    return results
@@ -0,0 +1,81 @@
+import hmac
+from fastapi import APIRouter, HTTPException, Request, Response
+from src.config import Config
+from src.db.main import async_engine, AsyncSessionLocal
+from src.auth.auth import bcrypt_queue_depth
+from src.auth.dependencies import manager, notifier
+from src.metrics import REGISTRY, CONTENT_TYPE, Gauge
+
+metrics_router = APIRouter()
+
+# Upper bounds of the group-size buckets used for websocket gauges
+GROUP_SIZE_BUCKETS = ((1, "1"), (10, "2-10"), (100, "11-100"), (1000, "101-1000"))
+
+ENGINES = {
+    "request": async_engine,
+    "background": AsyncSessionLocal.kw["bind"],
+}
+
+
+def _pool_stats() -> dict:
+    values = {}
+    for name, engine in ENGINES.items():
+        pool = engine.pool
+        if not hasattr(pool, "checkedout"):
+            continue
+        values[(name, "size")] = pool.size()
+        values[(name, "checked_out")] = pool.checkedout()
+        values[(name, "overflow")] = pool.overflow()
+        values[(name, "checked_in")] = pool.checkedin()
+    return values
+
+
+def _group_size_bucket(size: int) -> str:
+    for bound, label in GROUP_SIZE_BUCKETS:
+        if size <= bound:
+            return label
+    return "1000+"
+
+
+def _ws_groups() -> dict:
+    values = {}
+    for connections in manager.active_connections.values():
+        key = (_group_size_bucket(len(connections)),)
+        values[key] = values.get(key, 0) + 1
+    return values
+
+
+def _ws_group_connections() -> dict:
+    values = {}
+    for connections in manager.active_connections.values():
+        key = (_group_size_bucket(len(connections)),)
+        values[key] = values.get(key, 0) + len(connections)
+    return values
+
+
+REGISTRY.register(Gauge("db_pool_connections", "Connection pool usage per engine.", ("engine", "state"), callback=_pool_stats))
+REGISTRY.register(Gauge("ws_connections", "Open websockets per channel.", ("channel",), callback=lambda: {
+    ("chat",): manager.live_connections,
+    ("notifications",): notifier.live_connections,
+}))
+REGISTRY.register(Gauge("ws_groups", "Groups with open chat sockets, by group connection count.", ("size",), callback=_ws_groups))
+REGISTRY.register(Gauge("ws_group_connections", "Open chat sockets, by group connection count.", ("size",), callback=_ws_group_connections))
+REGISTRY.register(Gauge("bcrypt_queue_depth", "Password hash/verify jobs waiting for a worker.", callback=lambda: {(): bcrypt_queue_depth()}))
+
+
+def metrics_enabled() -> bool:
+    if Config.METRICS_ENABLED is not None:
+        return Config.METRICS_ENABLED
+    return bool(Config.METRICS_TOKEN)
+
+
+@metrics_router.get("/api/metrics", include_in_schema=False)
+async def metrics(request: Request):
+    if not metrics_enabled():
+        raise HTTPException(status_code=404, detail="Not Found")
+    if Config.METRICS_TOKEN:
+        supplied = request.headers.get("Authorization", "")
+        if not hmac.compare_digest(supplied, f"Bearer {Config.METRICS_TOKEN}"):
+            raise HTTPException(status_code=401, detail="Invalid metrics token")
+
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
@@ -0,0 +1,54 @@
+import asyncio
+import threading
+from fastapi import Depends, HTTPException, APIRouter
+from fastapi.responses import PlainTextResponse
+from src.auth.dependencies import get_current_user
+from src.config import Config
+from src.db.models import User, UserRole
+from src.profiler import SamplingProfiler, recent_profiles
+
+profile_router = APIRouter()
+
+# One process-wide profile at a time; overlapping runs would double the overhead
+_profile_lock = asyncio.Lock()
+
+
+def require_admin(current_user: User):
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Admin access required")
+
+
+@profile_router.get("/api/admin/profile", response_class=PlainTextResponse)
+async def profile_process(
+    seconds: float = 10.0,
+    interval_ms: float = 5.0,
+    current_user: User = Depends(get_current_user),
+):
+    """Sample the event-loop thread for `seconds`; returns collapsed stacks."""
+    require_admin(current_user)
+    if not 0 < seconds <= Config.PROFILER_MAX_SECONDS:
+        raise HTTPException(status_code=400, detail=f"seconds must be in (0, {Config.PROFILER_MAX_SECONDS}]")
+    if not 1 <= interval_ms <= 1000:
+        raise HTTPException(status_code=400, detail="interval_ms must be between 1 and 1000")
+    if _profile_lock.locked():
+        raise HTTPException(status_code=409, detail="A profile is already running")
+
+    async with _profile_lock:
+        profiler = SamplingProfiler(threading.get_ident(), interval_ms / 1000)
+        profiler.start()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            profiler.stop()
+
+    return PlainTextResponse(profiler.collapsed(), headers={"X-Profile-Samples": str(profiler.samples)})
+
+
+@profile_router.get("/api/admin/profile/{profile_id}", response_class=PlainTextResponse)
+async def get_request_profile(profile_id: str, current_user: User = Depends(get_current_user)):
+    """Collapsed stacks captured for a request sent with the X-Profile header."""
+    require_admin(current_user)
+    collapsed = recent_profiles.get(profile_id)
+    if collapsed is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return PlainTextResponse(collapsed)
@@ -1,23 +1,178 @@
 import uuid
-from fastapi import WebSocket, WebSocketDisconnect,APIRouter
+import asyncio
+import time
+from typing import Optional, Union
+from fastapi import Depends, HTTPException, WebSocket, WebSocketDisconnect,APIRouter
 from sqlalchemy import select, and_
 from dotenv import load_dotenv
 import json
+import logging
 from src.auth.dependencies import AccessTokenBearer
 from src.db.main import get_db
-from src.db.models import User,GroupMember,Message
+from src.config import Config
+from src.ratelimit import KeyedRateLimiter
+from src.wire import JSON, EncodedEvent, decode, negotiate, send_frame
+from src.db.models import User,UserRole,GroupMember,Message
+from src.service.group_service import GroupService
+from src.service.read_state import ReadWatermark
+from src.loadshed import load_shedder
 from src.auth.auth import verify_token 
-from src.auth.dependencies import manager
+from src.auth.dependencies import manager, notifier, live_socket_count, get_current_user
 
 
 
 load_dotenv() 
 
+logger = logging.getLogger(__name__)
+
 socket_router = APIRouter()
+group_service = GroupService()
 acccess_token_bearer = AccessTokenBearer() 
 
+# Upper bound on messages replayed during a resume handshake; beyond this the
+# client is told to reload history over HTTP instead.
+RESUME_REPLAY_LIMIT = 500
+
+PING_EVENT = EncodedEvent({"type": "ping"})
+# Pongs are dropped without decoding; browsers serialise without spaces
+PONG_FRAMES = {json.dumps({"type": "pong"}), json.dumps({"type": "pong"}, separators=(",", ":"))}
+RATE_LIMITED_EVENT = EncodedEvent({"type": "error", "reason": "rate_limited"})
+MESSAGE_TOO_LARGE_EVENT = EncodedEvent({"type": "error", "reason": "message_too_large"})
+
+chat_limiter = KeyedRateLimiter(Config.WS_MESSAGES_PER_SECOND, Config.WS_MESSAGE_BURST)
+
+
+def message_payload(message: Message, sender_name: str) -> dict:
+    # UUIDs and timestamps are rendered by the wire encoding (see src.wire)
+    return {
+        "id": message.uid,
+        "seq": message.seq,
+        "sender_id": message.sender_uid,
+        "sender_name": sender_name,
+        "content": message.content,
+        "created_at": message.created_at
+    }
+
+
+async def receive_data(websocket: WebSocket) -> Union[str, bytes]:
+    """Receive one text or binary frame."""
+    message = await websocket.receive()
+    if message["type"] == "websocket.disconnect":
+        raise WebSocketDisconnect(message.get("code", 1000))
+    if message.get("text") is not None:
+        return message["text"]
+    return message.get("bytes") or b""
+
+
+async def receive_frames(websocket: WebSocket, encoding: str = JSON):
+    """Yield client frames, pinging quiet sockets and closing idle ones.
+
+    Any inbound frame (including pongs) counts as activity. Sockets that stay
+    silent past WS_IDLE_TIMEOUT_SECONDS are closed so half-open mobile
+    connections don't pile up in the connection managers.
+    """
+    last_seen = time.monotonic()
+    while True:
+        try:
+            data = await asyncio.wait_for(receive_data(websocket), timeout=Config.WS_HEARTBEAT_SECONDS)
+        except asyncio.TimeoutError:
+            if time.monotonic() - last_seen >= Config.WS_IDLE_TIMEOUT_SECONDS:
+                await websocket.close(code=1001)
+                return
+            await send_frame(websocket, PING_EVENT.frame(encoding))
+            continue
+
+        last_seen = time.monotonic()
+        if data in PONG_FRAMES:
+            continue
+        yield data
+
+
+async def parse_frame(websocket: WebSocket, data: Union[str, bytes]) -> Optional[dict]:
+    """Size-check and decode a client frame; rejected frames are answered and dropped."""
+    if len(data) > Config.WS_MAX_FRAME_BYTES:
+        await manager.send_event(websocket, {"type": "error", "reason": "frame_too_large"})
+        return None
+    try:
+        frame = decode(data)
+    except ValueError:
+        await manager.send_event(websocket, {"type": "error", "reason": "invalid_frame"})
+        return None
+    if not isinstance(frame, dict):
+        await manager.send_event(websocket, {"type": "error", "reason": "invalid_frame"})
+        return None
+    return frame
+
+
+def is_chat_message(frame: dict) -> bool:
+    return frame.get("type") in (None, "message")
+
+
+def message_bytes(content: str) -> int:
+    return len(content.encode("utf-8"))
+
+
+async def accept_content(websocket: WebSocket, frame: dict, sender_key, encoding: str = JSON) -> Optional[str]:
+    """Return a chat frame's content if it may be stored, charging the sender's bucket.
+
+    Blank messages are dropped silently; oversize and rate-limited ones are
+    answered with an error frame. Every chat message costs an insert plus a
+    fan-out, so each one is charged, merged or not.
+    """
+    content = frame.get("content")
+    if not isinstance(content, str) or not content.strip():
+        return None
+    if message_bytes(content) > Config.WS_MAX_MESSAGE_BYTES:
+        await send_frame(websocket, MESSAGE_TOO_LARGE_EVENT.frame(encoding))
+        return None
+    if not chat_limiter.allow(sender_key):
+        await send_frame(websocket, RATE_LIMITED_EVENT.frame(encoding))
+        return None
+    return content
+
+
+async def collect_burst(websocket: WebSocket, first: str, sender_key, encoding: str, on_control) -> list:
+    """Merge chat messages that follow within WS_MERGE_WINDOW_MS into few inserts.
+
+    Returns the message bodies to store: consecutive messages are joined with
+    newlines while the result stays within WS_MAX_MESSAGE_BYTES, then a new
+    body is started. Control frames seen while collecting are handled
+    immediately.
+    """
+    deadline = time.monotonic() + Config.WS_MERGE_WINDOW_MS / 1000
+    bodies = [first]
+    size = message_bytes(first)
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        try:
+            data = await asyncio.wait_for(receive_data(websocket), timeout=remaining)
+        except asyncio.TimeoutError:
+            break
+
+        frame = await parse_frame(websocket, data)
+        if frame is None:
+            continue
+        if not is_chat_message(frame):
+            await on_control(frame)
+            continue
+
+        content = await accept_content(websocket, frame, sender_key, encoding)
+        if content is None:
+            continue
+        added = message_bytes(content) + 1  # joining newline
+        if size + added > Config.WS_MAX_MESSAGE_BYTES:
+            bodies.append(content)
+            size = added - 1
+        else:
+            bodies[-1] += "\n" + content
+            size += added
+    return bodies
+
+
 @socket_router.websocket("/api/ws/chat/{group_uid}")
-async def websocket_chat(websocket: WebSocket, group_uid: uuid.UUID, token: str):
+async def websocket_chat(websocket: WebSocket, group_uid: uuid.UUID, token: str, last_seq: Optional[int] = None, encoding: Optional[str] = None):
     # Verify token
     payload = verify_token(token)
     if not payload:
@@ -28,6 +183,11 @@ async def websocket_chat(websocket: WebSocket, group_uid: uuid.UUID, token: str)
     if not user_id:
         await websocket.close(code=1008)
         return
+
+    # Refuse before touching the database when a budget is exhausted
+    if manager.exceeded_budget(group_uid, user_id):
+        await websocket.close(code=1013)
+        return
     
     # Get database session
     async for db in get_db():
@@ -47,38 +207,117 @@ async def websocket_chat(websocket: WebSocket, group_uid: uuid.UUID, token: str)
         result = await db.execute(select(User).where(User.uid == user_id))
         user = result.scalar_one()
         
-        await manager.connect(websocket, group_uid)
+        # Register before replaying so nothing sent in between is lost;
+        # clients drop duplicates by seq.
+        wire_encoding = negotiate(encoding)
+        await manager.connect(websocket, group_uid, user_id, wire_encoding)
+        watermark = ReadWatermark(group_uid, user.uid)
         
         try:
-            while True:
-                data = await websocket.receive_text()
-                message_data = json.loads(data)
-                
-                # Save message to database
-                message = Message(
-                    group_uid=group_uid,
-                    sender_uid=user_id,
-                    content=message_data["content"]
-                )
-                
-                db.add(message)
-                await db.commit()
-                await db.refresh(message)
-                
-                # Broadcast to all group members (convert UUIDs to strings for JSON)
-                broadcast_data = {
-                    "id": str(message.uid),
-                    "sender_id": str(user_id),
-                    "sender_name": user.name,
-                    "content": message.content,
-                    "created_at": message.created_at.isoformat()
-                }
-
-                await manager.broadcast(json.dumps(broadcast_data), group_uid)
+            if last_seq is not None and load_shedder.overloaded():
+                # Skip the backfill under load; the client reloads history over HTTP later
+                await manager.send_event(websocket, {"type": "resync", "last_seq": last_seq})
+            elif last_seq is not None:
+                missed = await group_service.get_messages_after(group_uid, last_seq, RESUME_REPLAY_LIMIT + 1, db)
+                if len(missed) > RESUME_REPLAY_LIMIT:
+                    await manager.send_event(websocket, {"type": "resync", "last_seq": last_seq})
+                else:
+                    for message, sender_name in missed:
+                        await manager.send_event(websocket, message_payload(message, sender_name))
+
+            # End the handshake transaction so an idle socket doesn't pin a pooled connection
+            await db.commit()
+
+            async def handle_control(frame: dict):
+                frame_type = frame.get("type")
+
+                if frame_type == "typing":
+                    # In-memory only; coalesced per group by the manager
+                    manager.typing(group_uid, user_id, user.name)
+                elif frame_type == "read" and isinstance(frame.get("seq"), int):
+                    # Read receipt: remember the highest seq, write it lazily
+                    watermark.mark(frame["seq"])
+                    await watermark.maybe_flush(db)
+
+            async for data in receive_frames(websocket, wire_encoding):
+                message_data = await parse_frame(websocket, data)
+                if message_data is None:
+                    continue
+
+                if not is_chat_message(message_data):
+                    await handle_control(message_data)
+                    continue
+
+                sender_key = (user_id, group_uid)
+                content = await accept_content(websocket, message_data, sender_key, wire_encoding)
+                if content is None:
+                    continue
+
+                bodies = [content]
+                if Config.WS_MERGE_WINDOW_MS > 0:
+                    bodies = await collect_burst(websocket, content, sender_key, wire_encoding, handle_control)
+
+                for body in bodies:
+                    # Save message to database
+                    message = await group_service.create_message(group_uid, user.uid, body, db)
+                    watermark.mark(message.seq)
+
+                    # Broadcast to all group members; encoded once per wire encoding
+                    broadcast_data = message_payload(message, user.name)
+
+                    await manager.broadcast_event(broadcast_data, group_uid)
+                await watermark.maybe_flush(db)
                 
         except WebSocketDisconnect:
+            pass
+        except Exception:
+            logger.exception("Chat socket error in group %s", group_uid)
+        finally:
             manager.disconnect(websocket, group_uid)
-        except Exception as e:
-            print(f"WebSocket error: {e}")
-            manager.disconnect(websocket, group_uid)
+            try:
+                await watermark.flush(db)
+            except Exception:
+                logger.exception("Read watermark flush failed for group %s", group_uid)
+
+
+@socket_router.websocket("/api/ws/notifications")
+async def websocket_notifications(websocket: WebSocket, token: str):
+    # Push-only channel: transaction status changes and balances for the user
+    payload = verify_token(token)
+    if not payload:
+        await websocket.close(code=1008)
+        return
+
+    user_id = payload.get("sub")
+    if not user_id:
+        await websocket.close(code=1008)
+        return
+
+    if notifier.exceeded_budget(user_id):
+        await websocket.close(code=1013)
+        return
+
+    await notifier.connect(websocket, user_id)
+
+    try:
+        # Client frames are ignored; reading keeps disconnects detectable
+        async for _ in receive_frames(websocket):
+            pass
+    except WebSocketDisconnect:
+        pass
+    except Exception:
+        logger.exception("Notification socket error")
+    finally:
+        notifier.disconnect(websocket, user_id)
+
+
+@socket_router.get("/api/ws/stats")
+async def websocket_stats(current_user: User = Depends(get_current_user)):
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Admin access required")
 
+    return {
+        "live_sockets": live_socket_count(),
+        "chat": manager.stats(),
+        "notifications": notifier.stats(),
+    }
@@ -1,22 +1,28 @@
 from fastapi import Depends, HTTPException,APIRouter
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, and_
 from datetime import datetime, timezone
+from typing import Literal, Optional
 import os
 from dotenv import load_dotenv
-from src.auth.dependencies import get_current_user,AccessTokenBearer
+from src.auth.dependencies import get_current_user,AccessTokenBearer,notifier
 from src.db.main import get_db
-from src.db.models import User, Wallet,Transaction,TransactionStatus, TransactionType
+from src.db.models import User, Wallet,Transaction,TransactionExternalRef,TransactionStatus, TransactionType
 from src.schema.schemas import ( WalletResponse,
     DepositRequest, WithdrawRequest, TransferRequest,
     TransactionResponse
 )
-from fastapi import Request 
+from fastapi import Request, Response
 from src.service.wallet_service import WalletService 
 from src.service.hubtel_service import HubtelService 
 from src.service.hubtel_service import verify_hubtel_signature 
-from src.service.hubtel_audit import log_hubtel_event
+from src.service.hubtel_audit import log_hubtel_event, dedup_key_for, is_duplicate_event, is_stale_transition, seen_events, TERMINAL_STATUSES
+from src.service.statement_service import MEDIA_TYPES
+from src.utils import CONDITIONAL_CACHE_CONTROL, make_etag, etag_matches, not_modified
+from src.metrics import hubtel_settlement_lag_seconds
 from decimal import Decimal 
+import json
 import logging  
 
 logger = logging.getLogger(__name__)
@@ -28,11 +34,64 @@ wallet_service = WalletService()
 hubtel_service = HubtelService()
 acccess_token_bearer = AccessTokenBearer() 
 
+
+async def publish_transaction_status(tx: Transaction, wallet=None):
+    """Push a settled transaction (and new balance) to its owner's notification socket."""
+    owner_uid = tx.to_user_uid if tx.transaction_type == TransactionType.DEPOSIT else tx.from_user_uid
+    if owner_uid is None:
+        return
+
+    event = {
+        "type": "transaction_status",
+        "transaction_id": str(tx.uid),
+        "transaction_type": tx.transaction_type.value,
+        "status": tx.status.value,
+        "amount": tx.amount,
+        "updated_at": tx.updated_at.isoformat() if tx.updated_at else None,
+    }
+    if wallet is not None:
+        event["balance"] = wallet.balance
+        event["locked_balance"] = wallet.locked_balance
+
+    try:
+        await notifier.send_to_user(json.dumps(event), owner_uid)
+    except Exception:
+        # Notifications are best-effort; settlement already committed
+        logger.exception("Failed to publish status for tx %s", tx.uid)
+
 @wallet_router.get("/api/wallet", response_model=WalletResponse)
-async def get_wallet(current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+async def get_wallet(
+    request: Request,
+    response: Response,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    version = await wallet_service.get_wallet_version(current_user,db)
+    if version is not None:
+        etag = make_etag(*version)
+        if etag_matches(request.headers.get("If-None-Match"), etag):
+            return not_modified(etag)
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = CONDITIONAL_CACHE_CONTROL
+
     wallet = await wallet_service.get_wallet(current_user,db)
     return wallet
 
+@wallet_router.get("/api/wallet/statement")
+async def export_wallet_statement(
+    format: Literal["csv", "ndjson"] = "csv",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    current_user: User = Depends(get_current_user),
+):
+    rows = wallet_service.export_statement(format, start, end, current_user)
+
+    return StreamingResponse(
+        rows,
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="wallet-statement.{format}"'},
+    )
+
 @wallet_router.post("/api/wallet/deposit", response_model=TransactionResponse)
 async def deposit_money(
     deposit_data: DepositRequest,
@@ -50,8 +109,12 @@ async def hubtel_webhook(
     request: Request,
     db: AsyncSession = Depends(get_db),
 ):
+    # Read and parse the body once; the raw bytes are needed for the signature
     body = await request.body()
-    payload = await request.json()
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        raise HTTPException(400, "Invalid JSON body")
 
     secret = os.getenv("HUBTEL_WEBHOOK_SECRET")
     signature = request.headers.get("X-Hubtel-Signature")
@@ -73,11 +136,21 @@ async def hubtel_webhook(
     transaction_id = data.get("TransactionId")
     status_str = data.get("Status")
     amount = Decimal(str(data.get("Amount", "0")))
+    dedup_key = dedup_key_for(transaction_id, status_str)
+
+    # Repeated delivery of an already-settled status: nothing to audit or settle.
+    # The in-memory set answers most retries without touching the database.
+    if (signature_valid or not secret) and dedup_key is not None:
+        if dedup_key in seen_events:
+            return {"success": True, "message": "no change"}
+        if await is_duplicate_event(db, dedup_key):
+            seen_events.add(dedup_key)
+            return {"success": True, "message": "no change"}
 
     # ---------------------------------------------------
     # 2. AUDIT LOG (ALWAYS)
     # ---------------------------------------------------
-    await log_hubtel_event(
+    event = await log_hubtel_event(
         db,
         payload=payload,
         signature_valid=signature_valid,
@@ -111,10 +184,19 @@ async def hubtel_webhook(
 
     new_status = status_map.get(status_str.lower(), TransactionStatus.PENDING)
 
+    # Resolve through the claim table so the lookup prunes to one partition
     tx = (
         await db.execute(
             select(Transaction)
-            .where(Transaction.external_reference == external_id)
+            .join(
+                TransactionExternalRef,
+                and_(
+                    Transaction.uid == TransactionExternalRef.transaction_uid,
+                    Transaction.created_at == TransactionExternalRef.created_at,
+                ),
+            )
+            .where(TransactionExternalRef.external_reference == external_id)
+            .with_for_update(of=Transaction)
         )
     ).scalar_one_or_none()
 
@@ -133,8 +215,16 @@ async def hubtel_webhook(
         await db.commit()
         raise HTTPException(400, "Amount mismatch")
 
-    # Idempotency
+    # Idempotency (the row lock above serialises concurrent deliveries)
     if tx.status == new_status:
+        event.processed = True
+        await db.commit()
+        return {"success": True, "message": "no change"}
+
+    # Forward-only: a late Pending/Failed must not reopen or flip a settled transaction
+    if is_stale_transition(tx.status, new_status):
+        event.processed = True
+        event.processing_error = f"stale: {tx.status.value} -> {new_status.value}"
         await db.commit()
         return {"success": True, "message": "no change"}
 
@@ -143,6 +233,7 @@ async def hubtel_webhook(
     # ---------------------------------------------------
     tx.status = new_status
     tx.updated_at = datetime.now(timezone.utc)
+    wallet = None
 
     if new_status == TransactionStatus.COMPLETED:
         tx.completed_at = datetime.now(timezone.utc)
@@ -174,19 +265,20 @@ async def hubtel_webhook(
             wallet.locked_balance -= tx.amount
 
     # ---------------------------------------------------
-    # 6. Mark audit event as processed
+    # 6. Mark this audit event as processed and claim its dedup key
     # ---------------------------------------------------
-    await db.execute(
-        """
-        UPDATE hubtel_events
-        SET processed = true
-        WHERE transaction_id = :tx_id
-          AND processed = false
-        """,
-        {"tx_id": transaction_id},
-    )
+    event.processed = True
+    event.dedup_key = dedup_key
 
     await db.commit()
+    # Only terminal states are final; caching anything else could mask a later retry
+    if new_status in TERMINAL_STATUSES:
+        seen_events.add(dedup_key)
+        hubtel_settlement_lag_seconds.observe(
+            (datetime.now(timezone.utc) - tx.created_at).total_seconds(),
+            tx.transaction_type.value, new_status.value,
+        )
+    await publish_transaction_status(tx, wallet)
     return {"success": True}
 
 
@@ -88,6 +88,7 @@ class GroupResponse(BaseModel):
     wallet_balance: Optional[float] = None
     members: Optional[List[GroupMemberResponse]] = None
     policies: Optional[str] = None
+    unread_count: Optional[int] = None
     
     class Config:
         from_attributes = True
@@ -106,6 +107,9 @@ class DisbursementRequest(BaseModel):
 class PoliciesUpdate(BaseModel):
     policies: str
 
+class RetentionUpdate(BaseModel):
+    message_retention_days: Optional[int] = Field(default=None, ge=1)
+
 class TransactionResponse(BaseModel):
     uid: uuid.UUID
     transaction_type: str
@@ -131,6 +135,14 @@ class MessageResponse(BaseModel):
     sender_name: Optional[str]
     content: str
     created_at: datetime
+    seq: Optional[int] = None
     
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class MessageSearchHit(MessageResponse):
+    rank: float
+
+class MessageSearchResponse(BaseModel):
+    results: List[MessageSearchHit]
+    next_cursor: Optional[str] = None
@@ -0,0 +1,177 @@
+"""
+Chat retention: moves old messages out of the hot `messages` table into
+gzip-compressed JSONL segments (`message_archive_segments`), one segment per
+run of consecutive sequence numbers, and reads them back on demand.
+
+Run the retention pass from the backend directory with:
+
+    python -m src.service.archive_service
+"""
+
+import asyncio
+import gzip
+import json
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from fastapi import Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, delete, update, and_
+from sqlalchemy.orm import defer
+from src.config import Config
+from src.db.main import get_db, get_db_session
+from src.db.models import User, Group, GroupMember, Message, MessageArchiveSegment
+from src.schema.schemas import MessageResponse
+from src.auth.dependencies import get_current_user
+
+
+def _encode_segment(messages: list) -> bytes:
+    lines = []
+    for message in messages:
+        lines.append(json.dumps({
+            "uid": str(message.uid),
+            "seq": message.seq,
+            "sender_uid": str(message.sender_uid),
+            "content": message.content,
+            "created_at": message.created_at.isoformat(),
+        }))
+    return gzip.compress(("\n".join(lines) + "\n").encode())
+
+
+def _decode_segment(data: bytes) -> list:
+    return [json.loads(line) for line in gzip.decompress(data).decode().splitlines() if line]
+
+
+class ArchiveService:
+    async def compact_group(self, group_uid: uuid.UUID, cutoff: datetime, db: AsyncSession) -> int:
+        """Archive a group's messages created before `cutoff`; returns how many moved."""
+        archived = 0
+        while True:
+            result = await db.execute(
+                select(Message)
+                .where(and_(
+                    Message.group_uid == group_uid,
+                    Message.created_at < cutoff,
+                    Message.seq.is_not(None),
+                ))
+                .order_by(Message.seq.asc())
+                .limit(Config.MESSAGE_ARCHIVE_SEGMENT_SIZE)
+                .options(defer(Message.search_vector))
+            )
+            messages = result.scalars().all()
+            if not messages:
+                break
+
+            db.add(MessageArchiveSegment(
+                group_uid=group_uid,
+                first_seq=messages[0].seq,
+                last_seq=messages[-1].seq,
+                first_created_at=messages[0].created_at,
+                last_created_at=messages[-1].created_at,
+                message_count=len(messages),
+                data=_encode_segment(messages),
+            ))
+            await db.execute(
+                delete(Message)
+                .where(Message.uid.in_([m.uid for m in messages]))
+                .execution_options(synchronize_session=False)
+            )
+            # Cached message pages (ETag includes Group.version) must revalidate
+            await db.execute(
+                update(Group)
+                .where(Group.uid == group_uid)
+                .values(version=Group.version + 1)
+                .execution_options(synchronize_session=False)
+            )
+            # One segment per transaction keeps locks short and progress durable
+            await db.commit()
+            db.expunge_all()
+
+            archived += len(messages)
+            if len(messages) < Config.MESSAGE_ARCHIVE_SEGMENT_SIZE:
+                break
+
+        return archived
+
+    async def run_retention(self, db: AsyncSession) -> dict:
+        """Apply every group's retention policy; returns archived counts by group."""
+        default_days = Config.MESSAGE_RETENTION_DEFAULT_DAYS
+        query = select(Group.uid, Group.message_retention_days)
+        if default_days is None:
+            query = query.where(Group.message_retention_days.is_not(None))
+
+        policies = (await db.execute(query)).all()
+        await db.commit()
+
+        now = datetime.now(timezone.utc)
+        summary = {}
+        for group_uid, days in policies:
+            days = days if days is not None else default_days
+            moved = await self.compact_group(group_uid, now - timedelta(days=days), db)
+            if moved:
+                summary[str(group_uid)] = moved
+        return summary
+
+    async def get_archived_messages(self, group_uid: uuid.UUID, before_seq: Optional[int] = None, limit: int = 100, current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+        # Check membership
+        result = await db.execute(
+            select(GroupMember).where(
+                and_(GroupMember.group_uid == group_uid, GroupMember.user_uid == current_user.uid)
+            )
+        )
+        membership = result.scalar_one_or_none()
+
+        if not membership:
+            raise HTTPException(status_code=403, detail="Not a member of this group")
+
+        conditions = [MessageArchiveSegment.group_uid == group_uid]
+        if before_seq is not None:
+            conditions.append(MessageArchiveSegment.first_seq < before_seq)
+
+        # Walk segments newest-first until enough messages are collected
+        result = await db.stream_scalars(
+            select(MessageArchiveSegment)
+            .where(and_(*conditions))
+            .order_by(MessageArchiveSegment.last_seq.desc())
+        )
+        rows = []
+        async for segment in result:
+            for row in reversed(_decode_segment(segment.data)):
+                if before_seq is not None and row["seq"] >= before_seq:
+                    continue
+                rows.append(row)
+                if len(rows) >= limit:
+                    break
+            if len(rows) >= limit:
+                break
+        await result.close()
+
+        sender_uids = {uuid.UUID(row["sender_uid"]) for row in rows}
+        names = {}
+        if sender_uids:
+            name_rows = await db.execute(select(User.uid, User.name).where(User.uid.in_(sender_uids)))
+            names = {str(uid): name for uid, name in name_rows.all()}
+
+        messages = []
+        for row in reversed(rows):
+            messages.append(MessageResponse(
+                uid=row["uid"],
+                group_uid=group_uid,
+                sender_uid=row["sender_uid"],
+                sender_name=names.get(row["sender_uid"]),
+                content=row["content"],
+                created_at=row["created_at"],
+                seq=row["seq"],
+            ))
+
+        return messages
+
+
+async def main():
+    async with get_db_session() as db:
+        summary = await ArchiveService().run_retention(db)
+    print(json.dumps({"archived": summary}))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -9,7 +9,7 @@ from src.db.models import User, Wallet
 from src.schema.schemas import (
     UserCreate, UserLogin,
 )
-from src.auth.auth import verify_password, get_password_hash, create_access_token,ACCESS_TOKEN_EXPIRE_MINUTES
+from src.auth.auth import verify_password_async, get_password_hash_async, create_access_token,ACCESS_TOKEN_EXPIRE_MINUTES
 
 load_dotenv()
 class AuthService:
@@ -24,7 +24,7 @@ class AuthService:
             raise HTTPException(status_code=400, detail="Email or phone already registered")
 
         # Create user
-        hashed_password = get_password_hash(user_data.password)
+        hashed_password = await get_password_hash_async(user_data.password)
         new_user = User(
             email=user_data.email,
             phone=user_data.phone,
@@ -47,7 +47,7 @@ class AuthService:
         result = await db.execute(select(User).where(User.email == user_data.email))
         user = result.scalar_one_or_none()
 
-        if not user or not verify_password(user_data.password, user.hashed_password):
+        if not user or not await verify_password_async(user_data.password, user.hashed_password):
             raise HTTPException(status_code=401, detail="Invalid credentials")
 
         access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
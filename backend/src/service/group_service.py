@@ -1,8 +1,11 @@
 import uuid
+import base64
 from fastapi import Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, and_
+from sqlalchemy import select, update, func, and_, or_
+from sqlalchemy.orm import defer
 from datetime import datetime
+from typing import Optional
 from dotenv import load_dotenv
 from src.db.main import get_db
 from src.db.models import (
@@ -22,12 +25,20 @@ from src.schema.schemas import (
     ContributionRequest,
     DisbursementRequest,
     MessageResponse,
+    MessageSearchHit,
+    MessageSearchResponse,
 )
 from src.utils import generate_invite_code
 from src.auth.dependencies import get_current_user
+from src.service.statement_service import StatementService
 
 load_dotenv()
 
+statement_service = StatementService()
+
+# Text search configuration; 'simple' avoids English-only stemming in mixed-language chats
+SEARCH_CONFIG = "simple"
+
 
 class GroupService:
     def _utc_now_naive(self) -> datetime:
@@ -89,8 +100,12 @@ class GroupService:
             .scalar_subquery()
         )
 
+        # Sequence numbers are gap-free per group, so the unread count is just
+        # the distance between the group's counter and the member's watermark.
+        unread_count = (Group.message_seq - GroupMember.last_read_seq).label("unread_count")
+
         result = await db.execute(
-            select(Group, GroupWallet, member_count_subq.label("member_count"))
+            select(Group, GroupWallet, member_count_subq.label("member_count"), unread_count)
             .join(GroupMember, Group.uid == GroupMember.group_uid)
             .join(GroupWallet, Group.uid == GroupWallet.group_uid)
             .where(GroupMember.user_uid == current_user.uid)
@@ -99,7 +114,7 @@ class GroupService:
         groups_data = result.all()
 
         groups = []
-        for group, wallet, member_count in groups_data:
+        for group, wallet, member_count, unread in groups_data:
             group_dict = {
                 "uid": group.uid,
                 "name": group.name,
@@ -111,6 +126,7 @@ class GroupService:
                 "created_at": group.created_at,
                 "member_count": int(member_count) if member_count is not None else 0,
                 "wallet_balance": wallet.balance,
+                "unread_count": max(int(unread or 0), 0),
             }
             groups.append(GroupResponse(**group_dict))
 
@@ -176,6 +192,23 @@ class GroupService:
 
         return group_dict
 
+    async def get_group_version(self, group_uid: uuid.UUID, current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+        # Single indexed lookup that also proves membership; returns None when
+        # the caller is not a member so the full path raises the right error.
+        result = await db.execute(
+            select(Group.uid, Group.version, GroupWallet.version)
+            .join(GroupMember, Group.uid == GroupMember.group_uid)
+            .outerjoin(GroupWallet, Group.uid == GroupWallet.group_uid)
+            .where(and_(Group.uid == group_uid, GroupMember.user_uid == current_user.uid))
+        )
+        return result.first()
+
+    async def _touch_group(self, group_uid: uuid.UUID, db: AsyncSession):
+        # Membership rows live in another table, so bump the group version explicitly
+        await db.execute(
+            update(Group).where(Group.uid == group_uid).values(version=Group.version + 1)
+        )
+
     async def join_group(self, invite_code: str, current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
         # Find group
         result = await db.execute(select(Group).where(Group.invite_code == invite_code))
@@ -195,15 +228,17 @@ class GroupService:
         if existing_member:
             raise HTTPException(status_code=400, detail="Already a member")
 
-        # Add member (set joined_at naive UTC)
+        # Add member (set joined_at naive UTC); history before joining counts as read
         member = GroupMember(
             group_uid=group.uid,
             user_uid=current_user.uid,
             is_admin=False,
+            last_read_seq=group.message_seq,
             joined_at=self._utc_now_naive(),
         )
 
         db.add(member)
+        await self._touch_group(group.uid, db)
         await db.commit()
 
         return {"message": "Successfully joined group", "group_id": group.uid}
@@ -328,6 +363,20 @@ class GroupService:
 
         return transactions
 
+    async def export_group_transactions(self, group_uid: uuid.UUID, fmt: str, start: Optional[datetime] = None, end: Optional[datetime] = None, current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+        # Check membership before handing back the streaming body
+        result = await db.execute(
+            select(GroupMember).where(
+                and_(GroupMember.group_uid == group_uid, GroupMember.user_uid == current_user.uid)
+            )
+        )
+        membership = result.scalar_one_or_none()
+
+        if not membership:
+            raise HTTPException(status_code=403, detail="Not a member of this group")
+
+        return statement_service.stream(statement_service.group_filter(group_uid), fmt, start, end)
+
     async def get_user_transactions(self, current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
         result = await db.execute(
             select(Transaction)
@@ -364,6 +413,7 @@ class GroupService:
             raise HTTPException(status_code=404, detail="Member not found")
 
         db.delete(member)
+        await self._touch_group(group_uid, db)
         await db.commit()
 
         return {"message": "Member removed"}
@@ -393,8 +443,31 @@ class GroupService:
 
         return {"message": "Policies updated", "policies": group.policies}
 
+    async def update_message_retention(self, group_uid: uuid.UUID, days: Optional[int], current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+        # Only admins can change how long chat history stays hot
+        result = await db.execute(
+            select(GroupMember).where(
+                and_(GroupMember.group_uid == group_uid, GroupMember.user_uid == current_user.uid, GroupMember.is_admin == True)
+            )
+        )
+        admin_membership = result.scalar_one_or_none()
+
+        if not admin_membership:
+            raise HTTPException(status_code=403, detail="Only admins can update message retention")
+
+        result = await db.execute(select(Group).where(Group.uid == group_uid))
+        group = result.scalar_one_or_none()
+        if not group:
+            raise HTTPException(status_code=404, detail="Group not found")
+
+        group.message_retention_days = days
+        db.add(group)
+        await db.commit()
+
+        return {"message": "Retention updated", "message_retention_days": group.message_retention_days}
+
     # Chat/Messages endpoints
-    async def get_group_messages(self, group_uid: uuid.UUID, current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    async def get_group_messages(self, group_uid: uuid.UUID, current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db), after_seq: Optional[int] = None):
         # Check membership
         result = await db.execute(
             select(GroupMember).where(
@@ -406,15 +479,19 @@ class GroupService:
         if not membership:
             raise HTTPException(status_code=403, detail="Not a member of this group")
 
-        result = await db.execute(
-            select(Message, User.name)
-            .join(User, Message.sender_uid == User.uid)
-            .where(Message.group_uid == group_uid)
-            .order_by(Message.created_at.asc())
-            .limit(100)
-        )
-
-        messages_data = result.all()
+        if after_seq is not None:
+            # Incremental fetch for reconnecting clients
+            messages_data = await self.get_messages_after(group_uid, after_seq, 100, db)
+        else:
+            result = await db.execute(
+                select(Message, User.name)
+                .join(User, Message.sender_uid == User.uid)
+                .where(Message.group_uid == group_uid)
+                .order_by(Message.created_at.asc())
+                .limit(100)
+                .options(defer(Message.search_vector))
+            )
+            messages_data = result.all()
 
         messages = []
         for message, sender_name in messages_data:
@@ -425,7 +502,126 @@ class GroupService:
                 "sender_name": sender_name,
                 "content": message.content,
                 "created_at": message.created_at,
+                "seq": message.seq,
             }
             messages.append(MessageResponse(**msg_dict))
 
         return messages
+
+    async def get_messages_version(self, group_uid: uuid.UUID, current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+        # (Group.version, Group.message_seq) for a member, None otherwise;
+        # archiving bumps the version and every new message the seq
+        result = await db.execute(
+            select(Group.version, Group.message_seq)
+            .join(GroupMember, Group.uid == GroupMember.group_uid)
+            .where(and_(Group.uid == group_uid, GroupMember.user_uid == current_user.uid))
+        )
+        return result.first()
+
+    async def create_message(self, group_uid: uuid.UUID, sender_uid: uuid.UUID, content: str, db: AsyncSession):
+        # Allocate the next per-group sequence number atomically; the row lock on
+        # the group serialises concurrent senders so seq values are gap-free.
+        result = await db.execute(
+            update(Group)
+            .where(Group.uid == group_uid)
+            .values(message_seq=Group.message_seq + 1)
+            .returning(Group.message_seq)
+            .execution_options(synchronize_session=False)
+        )
+        seq = result.scalar_one()
+
+        message = Message(
+            group_uid=group_uid,
+            sender_uid=sender_uid,
+            seq=seq,
+            content=content,
+        )
+
+        db.add(message)
+        await db.commit()
+        await db.refresh(message)
+
+        return message
+
+    async def get_messages_after(self, group_uid: uuid.UUID, after_seq: int, limit: int, db: AsyncSession):
+        # Used by the websocket resume handshake; membership is checked by the caller
+        result = await db.execute(
+            select(Message, User.name)
+            .join(User, Message.sender_uid == User.uid)
+            .where(and_(Message.group_uid == group_uid, Message.seq > after_seq))
+            .order_by(Message.seq.asc())
+            .limit(limit)
+            .options(defer(Message.search_vector))
+        )
+        return result.all()
+
+    async def update_read_watermark(self, group_uid: uuid.UUID, user_uid: uuid.UUID, seq: int, db: AsyncSession):
+        # Watermarks only move forward, even if flushes arrive out of order, and
+        # never past the group's last allocated seq (receipts are client input)
+        await db.execute(
+            update(GroupMember)
+            .where(and_(
+                GroupMember.group_uid == group_uid,
+                GroupMember.user_uid == user_uid,
+                Group.uid == GroupMember.group_uid,
+            ))
+            .values(last_read_seq=func.greatest(GroupMember.last_read_seq, func.least(seq, Group.message_seq)))
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+
+    async def search_messages(self, query: str, current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db), group_uid: Optional[uuid.UUID] = None, limit: int = 20, cursor: Optional[str] = None):
+        # Matches come from the GIN index; the join on GroupMember restricts
+        # results to groups the caller belongs to in the same statement.
+        ts_query = func.websearch_to_tsquery(SEARCH_CONFIG, query)
+        rank = func.ts_rank(Message.search_vector, ts_query).label("rank")
+
+        conditions = [
+            Message.search_vector.op("@@")(ts_query),
+            GroupMember.user_uid == current_user.uid,
+        ]
+        if group_uid is not None:
+            conditions.append(Message.group_uid == group_uid)
+
+        if cursor:
+            # Keyset pagination on (rank desc, uid desc)
+            try:
+                last_rank, last_uid = base64.urlsafe_b64decode(cursor.encode()).decode().split(":", 1)
+                last_rank = float(last_rank)
+                last_uid = uuid.UUID(last_uid)
+            except (ValueError, UnicodeDecodeError):
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+            conditions.append(
+                or_(rank < last_rank, and_(rank == last_rank, Message.uid < last_uid))
+            )
+
+        result = await db.execute(
+            select(Message, User.name, rank)
+            .join(GroupMember, GroupMember.group_uid == Message.group_uid)
+            .join(User, Message.sender_uid == User.uid)
+            .where(and_(*conditions))
+            .order_by(rank.desc(), Message.uid.desc())
+            .limit(limit + 1)
+            .options(defer(Message.search_vector))
+        )
+        rows = result.all()
+
+        hits = []
+        for message, sender_name, score in rows[:limit]:
+            hits.append(MessageSearchHit(
+                uid=message.uid,
+                group_uid=message.group_uid,
+                sender_uid=message.sender_uid,
+                sender_name=sender_name,
+                content=message.content,
+                created_at=message.created_at,
+                seq=message.seq,
+                rank=score,
+            ))
+
+        next_cursor = None
+        if len(rows) > limit and hits:
+            last = hits[-1]
+            next_cursor = base64.urlsafe_b64encode(f"{last.rank!r}:{last.uid}".encode()).decode()
+
+        return MessageSearchResponse(results=hits, next_cursor=next_cursor)
@@ -1,7 +1,75 @@
+import asyncio
+import json
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
 from typing import Optional, Dict, Any
+from sqlalchemy import select, text
 from sqlmodel.ext.asyncio.session import AsyncSession
 
-from src.db.models import HubtelEvent
+from src.config import Config
+from src.db.main import get_db_session
+from src.db.models import HubtelEvent, TransactionStatus
+
+# A transaction in one of these states never changes again
+TERMINAL_STATUSES = {TransactionStatus.COMPLETED, TransactionStatus.FAILED}
+
+
+def dedup_key_for(transaction_id: Optional[str], status: Optional[str]) -> Optional[str]:
+    """Key identifying one (transaction, status) delivery; None if either is missing."""
+    if not transaction_id or not status:
+        return None
+    return f"{transaction_id}:{status.lower()}"
+
+
+def is_stale_transition(current: TransactionStatus, new: TransactionStatus) -> bool:
+    """True if moving from `current` to `new` would go backwards.
+
+    Callbacks can arrive late or out of order: nothing leaves a terminal
+    state, and nothing goes back to PENDING.
+    """
+    if current == new:
+        return False
+    return current in TERMINAL_STATUSES or new == TransactionStatus.PENDING
+
+
+class SeenEventCache:
+    """
+    Bounded in-process set of dedup keys already settled.
+
+    Consulted before any DB work so retried deliveries are answered without a
+    round-trip; the unique dedup_key column remains the source of truth.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._keys: OrderedDict = OrderedDict()
+
+    def __contains__(self, key: Optional[str]) -> bool:
+        if key is None or key not in self._keys:
+            return False
+        self._keys.move_to_end(key)
+        return True
+
+    def add(self, key: Optional[str]) -> None:
+        if key is None:
+            return
+        self._keys[key] = None
+        self._keys.move_to_end(key)
+        while len(self._keys) > self.max_size:
+            self._keys.popitem(last=False)
+
+
+seen_events = SeenEventCache(Config.HUBTEL_SEEN_EVENTS_MAX)
+
+
+async def is_duplicate_event(db: AsyncSession, dedup_key: Optional[str]) -> bool:
+    """True if an earlier delivery already settled this (transaction, status)."""
+    if dedup_key is None:
+        return False
+    result = await db.execute(
+        select(HubtelEvent.uid).where(HubtelEvent.dedup_key == dedup_key).limit(1)
+    )
+    return result.first() is not None
 
 
 async def log_hubtel_event(
@@ -34,3 +102,60 @@ async def log_hubtel_event(
     await db.flush()   # Do NOT commit here
 
     return event
+
+
+async def archive_hubtel_events(
+    db: AsyncSession,
+    *,
+    older_than: datetime,
+    batch_size: Optional[int] = None,
+) -> int:
+    """
+    Move events created before `older_than` into hubtel_events_archive.
+
+    Works in batches, committing each one, so the live table is never locked
+    for long. Returns the number of rows moved.
+    """
+    batch_size = batch_size or Config.HUBTEL_EVENT_ARCHIVE_BATCH
+    moved = 0
+    while True:
+        result = await db.execute(
+            text(
+                """
+                WITH moved AS (
+                    DELETE FROM hubtel_events
+                    WHERE uid IN (
+                        SELECT uid FROM hubtel_events
+                        WHERE created_at < :cutoff
+                        ORDER BY created_at
+                        LIMIT :batch
+                        FOR UPDATE SKIP LOCKED
+                    )
+                    RETURNING uid, external_id, transaction_id, status, signature_valid,
+                              processed, processing_error, dedup_key, payload, created_at
+                )
+                INSERT INTO hubtel_events_archive (
+                    uid, external_id, transaction_id, status, signature_valid,
+                    processed, processing_error, dedup_key, payload, created_at
+                )
+                SELECT * FROM moved
+                """
+            ),
+            {"cutoff": older_than, "batch": batch_size},
+        )
+        await db.commit()
+
+        moved += result.rowcount
+        if result.rowcount < batch_size:
+            return moved
+
+
+async def main():
+    cutoff = datetime.now(timezone.utc) - timedelta(days=Config.HUBTEL_EVENT_RETENTION_DAYS)
+    async with get_db_session() as db:
+        moved = await archive_hubtel_events(db, older_than=cutoff)
+    print(json.dumps({"archived": moved}))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,169 @@
+"""
+Local Hubtel stand-in for benchmarks and tests.
+
+An ASGI app implementing the merchant-account receive/send endpoints that
+HubtelService calls, with configurable response latency, error rate and
+delayed, HMAC-signed status callbacks to the app's webhook. No network access
+is needed: callbacks can be delivered in-process through an httpx transport.
+
+Standalone (from the backend directory):
+
+    MOCK_HUBTEL_CALLBACK_URL=http://127.0.0.1:8000/api/api/wallet/hubtel/webhook \\
+    MOCK_HUBTEL_WEBHOOK_SECRET=secret \\
+    uvicorn src.service.hubtel_mock_server:app --port 9100
+
+and point the app at it:
+
+    HUBTEL_RECEIVE_URL=http://127.0.0.1:9100/merchantaccount/merchants/M/receive/mobilemoney
+    HUBTEL_SEND_URL=http://127.0.0.1:9100/api/merchants/M/send-mobilemoney
+"""
+
+import asyncio
+import hashlib
+import hmac
+import json
+import random
+import uuid
+from typing import Optional
+
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+class MockHubtelSettings(BaseSettings):
+    # Response latency: "fixed:<ms>", "uniform:<lo>,<hi>" or "lognormal:<median_ms>,<sigma>"
+    LATENCY: str = "fixed:200"
+    # Fraction of initiate calls answered with HTTP 500
+    ERROR_RATE: float = 0.0
+    # Fraction of callbacks reporting success (the rest report failure)
+    SUCCESS_RATE: float = 1.0
+    # Delay before the status callback is sent, same syntax as LATENCY
+    CALLBACK_DELAY: str = "fixed:1000"
+    # Webhook to call back; callbacks are disabled when unset
+    CALLBACK_URL: Optional[str] = None
+    # Shared secret for X-Hubtel-Signature (HMAC-SHA1 of the raw body)
+    WEBHOOK_SECRET: Optional[str] = None
+    SEED: Optional[int] = None
+
+    model_config = SettingsConfigDict(env_prefix="MOCK_HUBTEL_", extra="ignore")
+
+
+def sample_ms(spec: str, rng: random.Random) -> float:
+    """Draw a delay in milliseconds from a distribution spec."""
+    kind, _, args = spec.partition(":")
+    values = [float(v) for v in args.split(",") if v]
+    if kind == "fixed":
+        return values[0]
+    if kind == "uniform":
+        return rng.uniform(values[0], values[1])
+    if kind == "lognormal":
+        median, sigma = values
+        return rng.lognormvariate(0.0, sigma) * median
+    raise ValueError(f"Unknown latency distribution: {spec}")
+
+
+def sign(body: bytes, secret: str) -> str:
+    """Signature compatible with verify_hubtel_signature."""
+    return hmac.new(secret.encode(), body, hashlib.sha1).hexdigest()
+
+
+def callback_payload(external_id: str, transaction_id: str, status: str, amount) -> dict:
+    """Status callback body in the shape hubtel_webhook parses."""
+    return {
+        "ResponseCode": "0000" if status == "Success" else "2001",
+        "Data": {
+            "ExternalId": external_id,
+            "TransactionId": transaction_id,
+            "Status": status,
+            "Amount": amount,
+        },
+    }
+
+
+class MockHubtel:
+    """State and behaviour behind the mock endpoints."""
+
+    def __init__(self, settings: Optional[MockHubtelSettings] = None, callback_transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.settings = settings or MockHubtelSettings()
+        self.rng = random.Random(self.settings.SEED)
+        self.callback_client = httpx.AsyncClient(transport=callback_transport, timeout=30.0)
+        self.pending: set = set()
+        self.stats = {
+            "receive": 0,
+            "send": 0,
+            "errors": 0,
+            "callbacks_sent": 0,
+            "callbacks_failed": 0,
+        }
+
+    async def initiate(self, kind: str, payload: dict) -> JSONResponse:
+        self.stats[kind] += 1
+        await asyncio.sleep(sample_ms(self.settings.LATENCY, self.rng) / 1000)
+
+        if self.rng.random() < self.settings.ERROR_RATE:
+            self.stats["errors"] += 1
+            return JSONResponse({"message": "mock upstream error"}, status_code=500)
+
+        external_id = payload.get("externalId") or str(uuid.uuid4())
+        transaction_id = uuid.uuid4().hex
+        if self.settings.CALLBACK_URL:
+            task = asyncio.create_task(self.callback(external_id, transaction_id, payload.get("amount")))
+            self.pending.add(task)
+            task.add_done_callback(self.pending.discard)
+
+        key = "checkoutId" if kind == "receive" else "transactionId"
+        return JSONResponse({"responseCode": "0001", "message": "Pending", key: transaction_id, "externalId": external_id})
+
+    async def callback(self, external_id: str, transaction_id: str, amount):
+        await asyncio.sleep(sample_ms(self.settings.CALLBACK_DELAY, self.rng) / 1000)
+
+        status = "Success" if self.rng.random() < self.settings.SUCCESS_RATE else "Failed"
+        body = json.dumps(callback_payload(external_id, transaction_id, status, amount)).encode()
+
+        headers = {"Content-Type": "application/json"}
+        if self.settings.WEBHOOK_SECRET:
+            headers["X-Hubtel-Signature"] = sign(body, self.settings.WEBHOOK_SECRET)
+
+        try:
+            resp = await self.callback_client.post(self.settings.CALLBACK_URL, content=body, headers=headers)
+            self.stats["callbacks_sent" if resp.status_code < 500 else "callbacks_failed"] += 1
+        except httpx.HTTPError:
+            self.stats["callbacks_failed"] += 1
+
+    async def drain(self):
+        """Wait for every scheduled callback to finish."""
+        while self.pending:
+            await asyncio.gather(*list(self.pending), return_exceptions=True)
+
+    async def close(self):
+        await self.drain()
+        await self.callback_client.aclose()
+
+
+def create_app(settings: Optional[MockHubtelSettings] = None, callback_transport: Optional[httpx.AsyncBaseTransport] = None) -> FastAPI:
+    mock_app = FastAPI(title="Mock Hubtel")
+    mock = MockHubtel(settings, callback_transport)
+    mock_app.state.mock = mock
+
+    @mock_app.post("/merchantaccount/merchants/{merchant}/receive/mobilemoney")
+    async def receive_money(merchant: str, request: Request):
+        return await mock.initiate("receive", await request.json())
+
+    @mock_app.post("/api/merchants/{merchant}/send-mobilemoney")
+    async def send_money(merchant: str, request: Request):
+        return await mock.initiate("send", await request.json())
+
+    @mock_app.get("/_mock/stats")
+    async def stats():
+        return {**mock.stats, "pending_callbacks": len(mock.pending)}
+
+    @mock_app.on_event("shutdown")
+    async def shutdown():
+        await mock.close()
+
+    return mock_app
+
+
+app = create_app()
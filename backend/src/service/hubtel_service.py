@@ -22,6 +22,9 @@ from src.provider import normalize_provider
 from decimal import ROUND_HALF_UP
 
 import httpx
+import time
+from src.metrics import hubtel_request_duration_seconds, hubtel_request_errors_total
+from src.deadline import remaining
 
 logger = logging.getLogger(__name__)
 
@@ -58,8 +61,33 @@ class HubtelService:
 
         self._client = httpx.AsyncClient(timeout=self.timeout) 
     
-    def to_hubtel_amount(amount: Decimal) -> str:
-        return str(amount.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP))
+    @staticmethod
+    def to_hubtel_amount(amount) -> str:
+        # Callers pass floats from the request schemas; go through str to avoid binary noise
+        return str(Decimal(str(amount)).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP))
+
+    async def _post(self, operation: str, endpoint: str, payload: Dict[str, Any]) -> httpx.Response:
+        """POST to Hubtel, recording latency and failures per operation."""
+        started = time.perf_counter()
+        outcome = "error"
+        # Never wait on Hubtel past the caller's request deadline
+        timeout = self.timeout
+        left = remaining()
+        if left is not None:
+            timeout = min(timeout, left)
+        try:
+            if timeout <= 0:
+                raise httpx.TimeoutException("Request deadline exceeded before calling Hubtel")
+            resp = await self._client.post(endpoint, json=payload, headers=self._headers(), timeout=timeout)
+            outcome = f"{resp.status_code // 100}xx"
+            if resp.status_code >= 400:
+                hubtel_request_errors_total.inc(operation, f"http_{resp.status_code}")
+            return resp
+        except httpx.HTTPError as e:
+            hubtel_request_errors_total.inc(operation, type(e).__name__)
+            raise
+        finally:
+            hubtel_request_duration_seconds.observe(time.perf_counter() - started, operation, outcome)
 
     def _headers(self) -> Dict[str, str]:
         return {
@@ -103,9 +131,7 @@ class HubtelService:
         }
 
         try:
-            resp = await self._client.post(
-                endpoint, json=payload, headers=self._headers()
-            )
+            resp = await self._post("deposit", endpoint, payload)
             # If Hubtel returns a non-2xx, raise to enter the HTTPStatusError handler
             resp.raise_for_status()
             data = resp.json()
@@ -184,9 +210,7 @@ class HubtelService:
         }
 
         try:
-            resp = await self._client.post(
-                endpoint, json=payload, headers=self._headers()
-            )
+            resp = await self._post("withdrawal", endpoint, payload)
             resp.raise_for_status()
             data = resp.json()
 
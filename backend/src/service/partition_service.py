@@ -0,0 +1,115 @@
+"""
+Maintenance for the monthly-partitioned `transactions` table.
+
+Creates partitions ahead of time and detaches months older than the retention
+window so they can be dumped and dropped without touching live data. There is
+no default partition: an insert into a month without a partition fails, so the
+app runs `ensure_partitions` at startup and the full pass should also run
+daily, for workers that stay up longer than the months created ahead:
+
+    # crontab, from the backend directory
+    15 3 * * * python -m src.service.partition_service
+"""
+
+import asyncio
+import json
+import re
+from datetime import date, datetime, timezone
+from typing import List, Optional
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.config import Config
+from src.db.main import get_db_session
+
+PARTITION_NAME = re.compile(r"^transactions_(\d{4})_(\d{2})$")
+
+
+def _months_before(day: date, months: int) -> date:
+    index = day.year * 12 + (day.month - 1) - months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _partition_name(month_start: date) -> str:
+    return f"transactions_{month_start:%Y_%m}"
+
+
+class PartitionService:
+    async def ensure_partitions(self, db: AsyncSession, months_ahead: Optional[int] = None) -> int:
+        """Create any missing partitions from this month through `months_ahead`.
+
+        Plain DDL rather than the migration's `ensure_transaction_partitions()`
+        so it also works on a schema built by `init_db()`. Bounds are UTC month
+        starts, matching the migration.
+        """
+        months_ahead = Config.TRANSACTION_PARTITION_MONTHS_AHEAD if months_ahead is None else months_ahead
+        existing = set(await self.list_partitions(db))
+        this_month = datetime.now(timezone.utc).date().replace(day=1)
+        created = 0
+        for offset in range(months_ahead + 1):
+            month_start = _months_before(this_month, -offset)
+            name = _partition_name(month_start)
+            if name in existing:
+                continue
+            # IF NOT EXISTS: several workers run this at startup concurrently
+            await db.execute(
+                text(
+                    f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF transactions '
+                    f"FOR VALUES FROM ('{month_start} 00:00+00') TO ('{_months_before(month_start, -1)} 00:00+00')"
+                )
+            )
+            created += 1
+        await db.commit()
+        return created
+
+    async def list_partitions(self, db: AsyncSession) -> List[str]:
+        result = await db.execute(
+            text(
+                """
+                SELECT child.relname
+                FROM pg_inherits
+                JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+                JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+                WHERE parent.relname = 'transactions'
+                ORDER BY child.relname
+                """
+            )
+        )
+        return [row[0] for row in result.all()]
+
+    async def detach_partitions_before(self, cutoff: date, db: AsyncSession) -> List[str]:
+        """Detach monthly partitions that end on or before `cutoff`.
+
+        Detached partitions stay as ordinary tables for archiving; queries on
+        `transactions` no longer see them.
+        """
+        detached = []
+        for name in await self.list_partitions(db):
+            match = PARTITION_NAME.match(name)
+            if not match:
+                continue
+            month_start = date(int(match.group(1)), int(match.group(2)), 1)
+            if _months_before(month_start, -1) <= cutoff:
+                await db.execute(text(f'ALTER TABLE transactions DETACH PARTITION "{name}"'))
+                detached.append(name)
+        await db.commit()
+        return detached
+
+    async def run_maintenance(self, db: AsyncSession) -> dict:
+        created = await self.ensure_partitions(db)
+        detached = []
+        months = Config.TRANSACTION_PARTITION_RETENTION_MONTHS
+        if months is not None:
+            today = datetime.now(timezone.utc).date()
+            cutoff = _months_before(today.replace(day=1), months)
+            detached = await self.detach_partitions_before(cutoff, db)
+        return {"created": created, "detached": detached}
+
+
+async def main():
+    async with get_db_session() as db:
+        summary = await PartitionService().run_maintenance(db)
+    print(json.dumps(summary))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
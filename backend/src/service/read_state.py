@@ -0,0 +1,42 @@
+import time
+import uuid
+from typing import Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.config import Config
+from src.service.group_service import GroupService
+
+group_service = GroupService()
+
+
+class ReadWatermark:
+    """Coalesces read receipts from one chat connection into periodic writes.
+
+    Clients may acknowledge every message they render; only the highest seq
+    is kept in memory and written at most once per flush interval (and once
+    more when the connection closes).
+    """
+
+    def __init__(self, group_uid: uuid.UUID, user_uid: uuid.UUID, flush_interval: Optional[float] = None):
+        self.group_uid = group_uid
+        self.user_uid = user_uid
+        self.flush_interval = Config.READ_WATERMARK_FLUSH_SECONDS if flush_interval is None else flush_interval
+        self.pending: Optional[int] = None
+        self.last_flush = 0.0
+
+    def mark(self, seq: int) -> None:
+        if self.pending is None or seq > self.pending:
+            self.pending = seq
+
+    def due(self) -> bool:
+        return self.pending is not None and time.monotonic() - self.last_flush >= self.flush_interval
+
+    async def flush(self, db: AsyncSession) -> None:
+        if self.pending is None:
+            return
+        seq, self.pending = self.pending, None
+        self.last_flush = time.monotonic()
+        await group_service.update_read_watermark(self.group_uid, self.user_uid, seq, db)
+
+    async def maybe_flush(self, db: AsyncSession) -> None:
+        if self.due():
+            await self.flush(db)
@@ -0,0 +1,120 @@
+import csv
+import io
+import json
+import uuid
+from datetime import datetime
+from typing import AsyncIterator, Optional
+from sqlalchemy import select, and_
+from src.db.main import get_db_session
+from src.db.models import Transaction
+
+# Rows pulled per round-trip from the server-side cursor, and rows buffered
+# before a chunk is handed to the StreamingResponse.
+STATEMENT_FETCH_SIZE = 500
+STATEMENT_CHUNK_ROWS = 200
+
+STATEMENT_COLUMNS = [
+    "uid",
+    "created_at",
+    "completed_at",
+    "transaction_type",
+    "status",
+    "amount",
+    "description",
+    "from_user_uid",
+    "to_user_uid",
+    "group_uid",
+    "external_reference",
+]
+
+MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+# Spreadsheets evaluate a cell starting with one of these as a formula
+CSV_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def _row_values(tx: Transaction) -> dict:
+    def _fmt(value):
+        if value is None:
+            return None
+        if isinstance(value, datetime):
+            return value.isoformat()
+        if isinstance(value, uuid.UUID):
+            return str(value)
+        if hasattr(value, "value"):
+            return value.value
+        return value
+
+    return {column: _fmt(getattr(tx, column)) for column in STATEMENT_COLUMNS}
+
+
+def _csv_safe(row: dict) -> dict:
+    # Descriptions are user-controlled; quote would-be formulas so a statement
+    # opened in a spreadsheet shows them as text
+    return {
+        column: "'" + value if isinstance(value, str) and value.startswith(CSV_FORMULA_PREFIXES) else value
+        for column, value in row.items()
+    }
+
+
+class StatementService:
+    """Streams transaction statements straight from a server-side cursor.
+
+    The export runs on its own session because FastAPI tears down request
+    dependencies before a StreamingResponse body is iterated.
+    """
+
+    def group_filter(self, group_uid: uuid.UUID):
+        return Transaction.group_uid == group_uid
+
+    def user_filter(self, user_uid: uuid.UUID):
+        return (Transaction.from_user_uid == user_uid) | (Transaction.to_user_uid == user_uid)
+
+    def build_query(self, criteria, start: Optional[datetime] = None, end: Optional[datetime] = None):
+        conditions = [criteria]
+        if start is not None:
+            conditions.append(Transaction.created_at >= start)
+        if end is not None:
+            conditions.append(Transaction.created_at < end)
+
+        return (
+            select(Transaction)
+            .where(and_(*conditions))
+            .order_by(Transaction.created_at.asc(), Transaction.uid.asc())
+            .execution_options(yield_per=STATEMENT_FETCH_SIZE)
+        )
+
+    async def stream(self, criteria, fmt: str, start: Optional[datetime] = None, end: Optional[datetime] = None) -> AsyncIterator[str]:
+        query = self.build_query(criteria, start, end)
+
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=STATEMENT_COLUMNS) if fmt == "csv" else None
+        if writer is not None:
+            writer.writeheader()
+
+        pending = 0
+        async with get_db_session() as db:
+            result = await db.stream_scalars(query)
+            async for tx in result:
+                row = _row_values(tx)
+                if writer is not None:
+                    writer.writerow(_csv_safe(row))
+                else:
+                    buffer.write(json.dumps(row))
+                    buffer.write("\n")
+
+                pending += 1
+                if pending >= STATEMENT_CHUNK_ROWS:
+                    yield buffer.getvalue()
+                    buffer.seek(0)
+                    buffer.truncate(0)
+                    pending = 0
+                    # Drop the emitted ORM objects so memory stays flat
+                    db.expunge_all()
+
+        tail = buffer.getvalue()
+        if tail:
+            yield tail
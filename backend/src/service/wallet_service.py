@@ -2,16 +2,19 @@ from fastapi import Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from datetime import  datetime, timezone
+from typing import Optional
 from dotenv import load_dotenv
 from src.db.main import get_db
 from src.db.models import User, Wallet,Transaction,TransactionStatus, TransactionType
 from src.schema.schemas import (DepositRequest, WithdrawRequest, TransferRequest)
 from src.utils import format_phone_number
 from src.service.hubtel_service import HubtelService
+from src.service.statement_service import StatementService
 from src.auth.dependencies import get_current_user
 load_dotenv() 
 
 hubtel_service = HubtelService()
+statement_service = StatementService()
 class WalletService:
 
  async def get_wallet(self,current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
@@ -24,6 +27,24 @@ class WalletService:
     return wallet
 
 
+ async def get_wallet_version(self, current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    # Cheap lookup used for ETag revalidation before loading the full wallet
+    result = await db.execute(
+        select(Wallet.uid, Wallet.version).where(Wallet.user_uid == current_user.uid)
+    )
+    return result.first()
+
+
+ def export_statement(
+    self,
+    fmt: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    current_user: User = Depends(get_current_user),
+):
+    return statement_service.stream(statement_service.user_filter(current_user.uid), fmt, start, end)
+
+
  async def deposit_money( 
     self,
     deposit_data: DepositRequest,
@@ -1,5 +1,9 @@
 import secrets
 import string
+from fastapi import Response
+
+# Cached copies must be revalidated with If-None-Match on every use
+CONDITIONAL_CACHE_CONTROL = "private, no-cache"
 
 def generate_invite_code(length: int = 8) -> str:
     """Generate a random invite code for groups"""
@@ -24,4 +28,19 @@ def format_phone_number(phone: str) -> str:
 def validate_mobile_money_provider(provider: str) -> bool:
     """Validate mobile money provider"""
     valid_providers = ['MTN', 'Vodafone', 'AirtelTigo']
-    return provider in valid_providers
\ No newline at end of file
+    return provider in valid_providers
+
+def make_etag(*parts) -> str:
+    """Build a weak ETag from version components"""
+    return 'W/"' + "-".join(str(p) for p in parts) + '"'
+
+def etag_matches(if_none_match, etag: str) -> bool:
+    """Check an If-None-Match header value against an ETag"""
+    if not if_none_match:
+        return False
+    candidates = [c.strip() for c in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+def not_modified(etag: str) -> Response:
+    """Bodiless 304 carrying the validator the client already holds"""
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": CONDITIONAL_CACHE_CONTROL})
@@ -0,0 +1,86 @@
+"""
+Websocket wire encodings.
+
+Chat sockets speak JSON text frames by default. Clients may negotiate
+MessagePack binary frames (``?encoding=msgpack``), which carry UUIDs as 16 raw
+bytes and timestamps as epoch milliseconds. Broadcast payloads are encoded at
+most once per encoding and the same bytes are reused for every recipient.
+"""
+
+import json
+import uuid
+from datetime import datetime
+from typing import Optional, Union
+
+from fastapi import WebSocket
+
+try:
+    import msgpack
+except ImportError:  # optional dependency; JSON is always available
+    msgpack = None
+
+JSON = "json"
+MSGPACK = "msgpack"
+
+
+def negotiate(requested: Optional[str]) -> str:
+    if requested == MSGPACK and msgpack is not None:
+        return MSGPACK
+    return JSON
+
+
+def _json_default(value):
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _msgpack_default(value):
+    if isinstance(value, uuid.UUID):
+        return value.bytes
+    if isinstance(value, datetime):
+        return int(value.timestamp() * 1000)
+    raise TypeError(f"Object of type {type(value).__name__} is not MessagePack serializable")
+
+
+def encode(event: dict, encoding: str = JSON) -> Union[str, bytes]:
+    if encoding == MSGPACK:
+        return msgpack.packb(event, default=_msgpack_default)
+    return json.dumps(event, default=_json_default)
+
+
+def decode(data: Union[str, bytes]):
+    """Decode a client frame; text is JSON, binary is MessagePack. Raises ValueError."""
+    if isinstance(data, bytes):
+        if msgpack is None:
+            raise ValueError("binary frames are not supported")
+        try:
+            return msgpack.unpackb(data)
+        except Exception as e:
+            raise ValueError(str(e))
+    return json.loads(data)
+
+
+class EncodedEvent:
+    """An event plus its lazily built, cached encodings."""
+
+    __slots__ = ("event", "_frames")
+
+    def __init__(self, event: dict):
+        self.event = event
+        self._frames: dict = {}
+
+    def frame(self, encoding: str) -> Union[str, bytes]:
+        data = self._frames.get(encoding)
+        if data is None:
+            data = self._frames[encoding] = encode(self.event, encoding)
+        return data
+
+
+async def send_frame(websocket: WebSocket, data: Union[str, bytes]):
+    if isinstance(data, bytes):
+        await websocket.send_bytes(data)
+    else:
+        await websocket.send_text(data)
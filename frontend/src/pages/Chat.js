@@ -91,9 +91,23 @@ export default function Chat() {
     socket.onmessage = (event) => {
 <<<<<<< HEAD
       const message = JSON.parse(event.data);
+      // Answer the server's heartbeat; it closes sockets that stay silent
+      if (message.type === 'ping') {
+        socket.send(JSON.stringify({ type: 'pong' }));
+        return;
+      }
+      // Chat messages carry no type; presence, typing, errors etc. are control frames
+      if (message.type && message.type !== 'message') return;
       setMessages((prev) => [...prev, message]);
 =======
       const raw = JSON.parse(event.data);
+      // Answer the server's heartbeat; it closes sockets that stay silent
+      if (raw.type === 'ping') {
+        socket.send(JSON.stringify({ type: 'pong' }));
+        return;
+      }
+      // Chat messages carry no type; presence, typing, errors etc. are control frames
+      if (raw.type && raw.type !== 'message') return;
       const message = {
         ...raw,
         id: raw.id ?? raw.uid,
@@ -0,0 +1,79 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy.sql.dml import Delete, Update
+
+from src.config import Config
+from src.db.models import Group, Message, MessageArchiveSegment
+from src.service.archive_service import ArchiveService, _decode_segment, _encode_segment
+
+
+class FakeScalars:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def all(self):
+        return self.rows
+
+
+class FakeResult:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def scalars(self):
+        return FakeScalars(self.rows)
+
+
+class FakeSession:
+    def __init__(self, batches):
+        self.batches = list(batches)
+        self.added = []
+        self.statements = []
+        self.commits = 0
+
+    async def execute(self, statement):
+        if isinstance(statement, (Delete, Update)):
+            self.statements.append(statement)
+            return FakeResult([])
+        return FakeResult(self.batches.pop(0) if self.batches else [])
+
+    def add(self, obj):
+        self.added.append(obj)
+
+    async def commit(self):
+        self.commits += 1
+
+    def expunge_all(self):
+        pass
+
+
+def make_messages(group_uid, seqs):
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    return [
+        Message(uid=uuid.uuid4(), group_uid=group_uid, sender_uid=uuid.uuid4(), seq=s,
+                content=f"m{s}", created_at=start + timedelta(minutes=s))
+        for s in seqs
+    ]
+
+
+def test_segment_round_trip():
+    messages = make_messages(uuid.uuid4(), [1, 2, 3])
+    decoded = _decode_segment(_encode_segment(messages))
+    assert [m["seq"] for m in decoded] == [1, 2, 3]
+    assert decoded[0]["content"] == "m1"
+    assert decoded[0]["created_at"] == messages[0].created_at.isoformat()
+
+
+def test_compact_group_bumps_group_version_with_each_segment(monkeypatch):
+    monkeypatch.setattr(Config, "MESSAGE_ARCHIVE_SEGMENT_SIZE", 2)
+    group_uid = uuid.uuid4()
+    db = FakeSession([make_messages(group_uid, [1, 2]), make_messages(group_uid, [3])])
+
+    moved = asyncio.run(ArchiveService().compact_group(group_uid, datetime.now(timezone.utc), db))
+
+    assert moved == 3
+    assert db.commits == 2
+    assert [(s.first_seq, s.last_seq) for s in db.added if isinstance(s, MessageArchiveSegment)] == [(1, 2), (3, 3)]
+    bumps = [s for s in db.statements if isinstance(s, Update) and s.table.name == Group.__tablename__]
+    assert len(bumps) == 2
@@ -0,0 +1,107 @@
+import asyncio
+import json
+import uuid
+
+from src.auth.dependencies import ConnectionManager, UserConnectionManager
+from src.config import Config
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, data):
+        self.sent.append(json.loads(data))
+
+
+def types(websocket):
+    return [event["type"] for event in websocket.sent]
+
+
+def test_presence_leave_task_is_tracked_until_sent():
+    async def scenario():
+        manager = ConnectionManager()
+        group = uuid.uuid4()
+        alice, bob = FakeWebSocket(), FakeWebSocket()
+        await manager.connect(alice, group, "alice")
+        await manager.connect(bob, group, "bob")
+
+        manager.disconnect(bob, group)
+        assert len(manager.background_tasks) == 1
+        await asyncio.gather(*manager.background_tasks)
+        return manager, alice
+
+    manager, alice = asyncio.run(scenario())
+    assert types(alice) == ["presence", "presence_join", "presence_leave"]
+    assert alice.sent[-1]["user_id"] == "bob"
+    assert not manager.background_tasks
+
+
+def test_typing_is_coalesced_and_cancelled_when_group_empties(monkeypatch):
+    monkeypatch.setattr(Config, "WS_TYPING_BROADCAST_MS", 10)
+
+    async def scenario():
+        manager = ConnectionManager()
+        group = uuid.uuid4()
+        alice, bob = FakeWebSocket(), FakeWebSocket()
+        await manager.connect(alice, group, "alice")
+        await manager.connect(bob, group, "bob")
+
+        manager.typing(group, "alice", "Alice")
+        manager.typing(group, "bob", "Bob")
+        assert len(manager.typing_timers) == 1
+        await asyncio.sleep(0.05)
+        first = [e for e in alice.sent if e["type"] == "typing"]
+
+        manager.typing(group, "alice", "Alice")
+        manager.disconnect(alice, group)
+        manager.disconnect(bob, group)
+        await asyncio.sleep(0.05)
+        return manager, first, alice
+
+    manager, first, alice = asyncio.run(scenario())
+    assert len(first) == 1
+    assert {u["name"] for u in first[0]["users"]} == {"Alice", "Bob"}
+    assert not manager.typing_timers
+    assert types(alice).count("typing") == 1
+
+
+def test_failed_background_task_is_logged(caplog):
+    async def boom():
+        raise RuntimeError("send failed")
+
+    async def scenario():
+        manager = ConnectionManager()
+        task = manager._spawn(boom())
+        await asyncio.gather(task, return_exceptions=True)
+        await asyncio.sleep(0)
+        return manager
+
+    manager = asyncio.run(scenario())
+    assert not manager.background_tasks
+    assert "Chat background task failed" in caplog.text
+
+
+def test_exceeded_budget_names_the_limit_hit(monkeypatch):
+    monkeypatch.setattr(Config, "WS_MAX_CONNECTIONS_PER_GROUP", 2)
+    monkeypatch.setattr(Config, "WS_MAX_CONNECTIONS_PER_USER", 1)
+
+    async def scenario():
+        manager = ConnectionManager()
+        group = uuid.uuid4()
+        assert manager.exceeded_budget(group, "alice") is None
+        await manager.connect(FakeWebSocket(), group, "alice")
+        assert manager.exceeded_budget(group, "alice") == "user"
+        await manager.connect(FakeWebSocket(), group, "bob")
+        assert manager.exceeded_budget(group, "carol") == "group"
+        assert manager.exceeded_budget(uuid.uuid4(), "carol") is None
+
+        notifier = UserConnectionManager()
+        assert notifier.exceeded_budget("alice") is None
+        await notifier.connect(FakeWebSocket(), "alice")
+        assert notifier.exceeded_budget("alice") == "user"
+
+    asyncio.run(scenario())
@@ -0,0 +1,96 @@
+import asyncio
+
+import pytest
+
+from src.db.main import _apply_request_deadline
+from src.deadline import budget_for, remaining, request_critical, request_deadline, statement_budget
+from src.loadshed import CRITICAL, LOW, NORMAL, classify
+from src.middleware import DeadlineMiddleware
+
+
+@pytest.mark.parametrize(
+    "path, expected",
+    [
+        ("/api/api/wallet/hubtel/webhook", CRITICAL),
+        ("/api/api/wallet/deposit", CRITICAL),
+        ("/api/api/wallet/transfer", CRITICAL),
+        ("/api/api/groups/abc/contribute", CRITICAL),
+        ("/api/api/auth/login", CRITICAL),
+        ("/api/api/wallet", NORMAL),
+        ("/api/api/groups/abc", NORMAL),
+        ("/api/api/groups/abc/messages", LOW),
+        ("/api/api/wallet/statement", LOW),
+    ],
+)
+def test_classify(path, expected):
+    assert classify(path) == expected
+
+
+@pytest.mark.parametrize(
+    "path, expected",
+    [
+        ("/api/api/wallet/hubtel/webhook", 10),
+        ("/api/api/groups/abc/messages", 5),
+        ("/api/api/groups/abc/messages/archive", 5),
+        ("/api/api/wallet/statement", None),
+        ("/api/api/wallet", 30.0),
+    ],
+)
+def test_budget_for(path, expected):
+    assert budget_for(path) == expected
+
+
+class RecordingConnection:
+    def __init__(self):
+        self.statements = []
+
+    def exec_driver_sql(self, sql):
+        self.statements.append(sql)
+
+
+def test_statement_timeout_follows_the_request_budget():
+    connection = RecordingConnection()
+    _apply_request_deadline(None, None, connection)
+    assert connection.statements == []
+
+    token = request_deadline.set(1e12)
+    try:
+        _apply_request_deadline(None, None, connection)
+    finally:
+        request_deadline.reset(token)
+    assert connection.statements[0].startswith("SET LOCAL statement_timeout = ")
+
+
+def test_critical_requests_get_no_statement_timeout():
+    connection = RecordingConnection()
+    deadline_token = request_deadline.set(0.0)  # budget already spent
+    critical_token = request_critical.set(True)
+    try:
+        assert remaining() < 0
+        _apply_request_deadline(None, None, connection)
+    finally:
+        request_critical.reset(critical_token)
+        request_deadline.reset(deadline_token)
+    assert connection.statements == []
+
+
+@pytest.mark.parametrize("path, capped", [("/api/api/wallet/deposit", False), ("/api/api/wallet", True)])
+def test_middleware_marks_critical_requests(path, capped):
+    seen = {}
+
+    async def app(scope, receive, send):
+        seen["remaining"] = remaining()
+        seen["statement_budget"] = statement_budget()
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def receive():
+        await asyncio.sleep(10)
+
+    async def send(message):
+        pass
+
+    asyncio.run(DeadlineMiddleware(app)({"type": "http", "path": path}, receive, send))
+
+    assert seen["remaining"] is not None
+    assert (seen["statement_budget"] is not None) is capped
@@ -0,0 +1,113 @@
+import uuid
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src import app
+from src.auth.dependencies import get_current_user
+from src.db.main import get_db
+from src.route import group_route
+from src.schema.schemas import MessageResponse
+from src.utils import etag_matches, make_etag
+
+
+def test_make_etag_is_weak_and_joins_parts():
+    assert make_etag("abc", 3, None) == 'W/"abc-3-None"'
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        (None, False),
+        ("", False),
+        ('W/"a-1"', True),
+        ('W/"a-2"', False),
+        ('"x", W/"a-1"', True),
+        ("*", True),
+    ],
+)
+def test_etag_matches(header, expected):
+    assert etag_matches(header, 'W/"a-1"') is expected
+
+
+class FakeGroupService:
+    def __init__(self):
+        self.version = 0
+        self.seqs = list(range(1, 101))
+        self.page_loads = 0
+
+    async def get_group_messages(self, group_uid, current_user, db, after_seq=None):
+        self.page_loads += 1
+        seqs = self.seqs if after_seq is None else [s for s in self.seqs if s > after_seq]
+        return [
+            MessageResponse(
+                uid=uuid.uuid4(),
+                group_uid=group_uid,
+                sender_uid=uuid.uuid4(),
+                sender_name="Ama",
+                content="hi",
+                created_at=datetime.now(timezone.utc),
+                seq=s,
+            )
+            for s in seqs[:100]
+        ]
+
+    async def get_messages_version(self, group_uid, current_user, db):
+        return self.version, max(self.seqs, default=0)
+
+
+@pytest.fixture
+def messages(monkeypatch):
+    service = FakeGroupService()
+    monkeypatch.setattr(group_route, "group_service", service)
+
+    async def fake_db():
+        yield None
+
+    app.dependency_overrides[get_db] = fake_db
+    app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(uid=uuid.uuid4())
+    yield service
+    app.dependency_overrides.clear()
+
+
+def test_messages_not_modified_skips_the_page_query(messages):
+    client = TestClient(app)
+    url = f"/api/api/groups/{uuid.uuid4()}/messages"
+
+    etag = client.get(url).headers["ETag"]
+    assert messages.page_loads == 1
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+    assert messages.page_loads == 1
+
+
+def test_messages_etag_changes_on_new_and_archived_messages(messages):
+    client = TestClient(app)
+    url = f"/api/api/groups/{uuid.uuid4()}/messages"
+
+    etag = client.get(url).headers["ETag"]
+
+    # A new message moves the group's message_seq
+    messages.seqs.append(101)
+    resp = client.get(url, headers={"If-None-Match": etag})
+    assert resp.status_code == 200
+    etag = resp.headers["ETag"]
+
+    # Archiving the oldest messages leaves message_seq but bumps the version
+    messages.seqs = messages.seqs[50:]
+    messages.version += 1
+    resp = client.get(url, headers={"If-None-Match": etag})
+    assert resp.status_code == 200
+    assert resp.json()[0]["seq"] == 51
+    assert resp.headers["ETag"] != etag
+
+
+def test_messages_etag_differs_per_incremental_page(messages):
+    client = TestClient(app)
+    url = f"/api/api/groups/{uuid.uuid4()}/messages"
+
+    full = client.get(url).headers["ETag"]
+    tail = client.get(url, params={"after_seq": 90}).headers["ETag"]
+    assert full != tail
+    assert client.get(url, params={"after_seq": 90}, headers={"If-None-Match": full}).status_code == 200
@@ -0,0 +1,36 @@
+import pytest
+
+from benchmarks.harness import LatencyRecorder, percentile
+
+
+@pytest.mark.parametrize(
+    "values, pct, expected",
+    [
+        ([], 50, 0.0),
+        ([7], 99, 7),
+        (list(range(1, 101)), 50, 50),
+        (list(range(1, 101)), 95, 95),
+        (list(range(1, 101)), 99, 99),
+        (list(range(1, 101)), 100, 100),
+        (list(range(1, 101)), 0, 1),
+        ([15, 20, 35, 40, 50], 30, 20),
+        ([15, 20, 35, 40, 50], 40, 20),
+        ([15, 20, 35, 40, 50], 50, 35),
+        ([50, 15, 40, 20, 35], 100, 50),
+    ],
+)
+def test_nearest_rank_percentile(values, pct, expected):
+    assert percentile(values, pct) == expected
+
+
+def test_summary_counts_errors_per_endpoint():
+    recorder = LatencyRecorder()
+    recorder.record("GET /wallet", 0.010)
+    recorder.record("GET /wallet", 0.030, ok=False)
+    recorder.stop()
+
+    row = recorder.summary()["GET /wallet"]
+    assert row["count"] == 2
+    assert row["errors"] == 1
+    assert row["mean_ms"] == 20.0
+    assert row["p50_ms"] == 10.0
@@ -0,0 +1,49 @@
+from src.db.models import TransactionStatus
+from src.service.hubtel_audit import SeenEventCache, dedup_key_for, is_stale_transition
+
+
+def test_dedup_key_normalises_status_case():
+    assert dedup_key_for("abc", "Success") == "abc:success"
+    assert dedup_key_for("abc", "SUCCESS") == dedup_key_for("abc", "success")
+
+
+def test_dedup_key_requires_both_parts():
+    assert dedup_key_for(None, "Success") is None
+    assert dedup_key_for("abc", None) is None
+    assert dedup_key_for("", "Success") is None
+
+
+def test_seen_event_cache_evicts_least_recently_used():
+    cache = SeenEventCache(2)
+    cache.add("a")
+    cache.add("b")
+    assert "a" in cache  # refreshes "a"
+    cache.add("c")
+    assert "a" in cache
+    assert "b" not in cache
+    assert "c" in cache
+
+
+def test_seen_event_cache_ignores_none():
+    cache = SeenEventCache(2)
+    cache.add(None)
+    assert None not in cache
+
+
+def test_transitions_only_move_forward():
+    pending, completed, failed = TransactionStatus.PENDING, TransactionStatus.COMPLETED, TransactionStatus.FAILED
+    assert not is_stale_transition(pending, completed)
+    assert not is_stale_transition(pending, failed)
+    assert not is_stale_transition(completed, completed)
+    assert is_stale_transition(completed, pending)
+    assert is_stale_transition(completed, failed)
+    assert is_stale_transition(failed, completed)
+    assert is_stale_transition(failed, pending)
+
+
+def test_dedup_key_constraint_is_named_like_the_migration():
+    from sqlalchemy import UniqueConstraint
+    from src.db.models import HubtelEvent
+
+    names = {c.name for c in HubtelEvent.__table__.constraints if isinstance(c, UniqueConstraint)}
+    assert "uq_hubtel_events_dedup_key" in names
@@ -0,0 +1,162 @@
+import json
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src import app
+from src.db.main import get_db
+from src.db.models import HubtelEvent, Transaction, TransactionStatus, TransactionType, Wallet
+from src.route import wallet_route
+from src.service.hubtel_audit import SeenEventCache
+
+
+class FakeResult:
+    def __init__(self, value):
+        self.value = value
+
+    def first(self):
+        return self.value
+
+    def scalar_one_or_none(self):
+        return self.value
+
+    def scalar_one(self):
+        assert self.value is not None
+        return self.value
+
+
+class FakeSession:
+    """Just enough AsyncSession for hubtel_webhook: one transaction, one wallet."""
+
+    def __init__(self, tx: Transaction, wallet: Wallet):
+        self.tx = tx
+        self.wallet = wallet
+        self.events: list = []
+        self.claimed: set = set()
+
+    def add(self, obj):
+        if isinstance(obj, HubtelEvent):
+            self.events.append(obj)
+
+    async def flush(self):
+        pass
+
+    async def commit(self):
+        self.claimed = {e.dedup_key for e in self.events if e.dedup_key}
+
+    async def close(self):
+        pass
+
+    async def execute(self, statement):
+        entity = statement.column_descriptions[0]["entity"]
+        if entity is HubtelEvent:
+            key = statement.whereclause.right.value
+            return FakeResult(("uid",) if key in self.claimed else None)
+        if entity is Transaction:
+            return FakeResult(self.tx)
+        if entity is Wallet:
+            return FakeResult(self.wallet)
+        raise AssertionError(f"unexpected query on {entity}")
+
+
+@pytest.fixture
+def deposit(monkeypatch):
+    monkeypatch.delenv("HUBTEL_WEBHOOK_SECRET", raising=False)
+    monkeypatch.setattr(wallet_route, "seen_events", SeenEventCache(100))
+
+    user_uid = uuid.uuid4()
+    tx = Transaction(
+        transaction_type=TransactionType.DEPOSIT,
+        amount=10.0,
+        status=TransactionStatus.PENDING,
+        to_user_uid=user_uid,
+        external_reference=str(uuid.uuid4()),
+    )
+    wallet = Wallet(user_uid=user_uid, balance=0.0, locked_balance=0.0)
+    session = FakeSession(tx, wallet)
+
+    async def fake_db():
+        yield session
+
+    app.dependency_overrides[get_db] = fake_db
+    yield session
+    app.dependency_overrides.pop(get_db, None)
+
+
+def deliver(client, session: FakeSession, status: str, transaction_id: str = "hubtel-1"):
+    body = {
+        "Data": {
+            "ExternalId": session.tx.external_reference,
+            "TransactionId": transaction_id,
+            "Status": status,
+            "Amount": "10.00",
+        }
+    }
+    resp = client.post("/api/api/wallet/hubtel/webhook", content=json.dumps(body), headers={"Content-Type": "application/json"})
+    assert resp.status_code == 200
+    return resp.json()
+
+
+def test_success_then_stale_pending_then_retry_stays_completed(deposit):
+    client = TestClient(app)
+
+    assert deliver(client, deposit, "Success") == {"success": True}
+    assert deposit.tx.status == TransactionStatus.COMPLETED
+    assert deposit.wallet.balance == 10.0
+
+    assert deliver(client, deposit, "Pending")["message"] == "no change"
+    assert deposit.tx.status == TransactionStatus.COMPLETED
+    assert deposit.events[-1].processed
+    assert deposit.events[-1].processing_error.startswith("stale")
+
+    assert deliver(client, deposit, "Success")["message"] == "no change"
+    assert deposit.tx.status == TransactionStatus.COMPLETED
+    assert deposit.wallet.balance == 10.0
+
+
+def test_late_failure_does_not_flip_a_credited_deposit(deposit):
+    client = TestClient(app)
+
+    deliver(client, deposit, "Success")
+    assert deliver(client, deposit, "Failed")["message"] == "no change"
+    assert deposit.tx.status == TransactionStatus.COMPLETED
+    assert deposit.wallet.balance == 10.0
+
+
+def test_stale_pending_before_success_still_settles(deposit):
+    client = TestClient(app)
+
+    assert deliver(client, deposit, "Pending")["message"] == "no change"
+    assert "hubtel-1:pending" not in wallet_route.seen_events
+
+    assert deliver(client, deposit, "Success") == {"success": True}
+    assert deposit.tx.status == TransactionStatus.COMPLETED
+    assert deposit.wallet.balance == 10.0
+    assert "hubtel-1:success" in wallet_route.seen_events
+
+
+def test_default_replay_stream_settles_once(deposit):
+    """The webhook_replay benchmark's default stream (duplicates plus stale
+    Pending re-deliveries, shuffled) must leave one completed credit."""
+    import random
+    from benchmarks.webhook_replay import build_stream, check_synthetic, parse_args
+    from src.service.hubtel_mock_server import callback_payload
+
+    payload = callback_payload(deposit.tx.external_reference, "hubtel-1", "Success", "10.00")
+    args = parse_args([])
+    # Force the stale Pending the default 5% rate would only sometimes add
+    stream = build_stream([payload], args.duplicate_rate, 1.0, args.window, random.Random(7))
+    assert any(p["Data"]["Status"] == "Pending" for p in stream)
+
+    client = TestClient(app)
+    for _ in range(2):  # the benchmark replays everything a second time
+        for p in stream:
+            deliver(client, deposit, p["Data"]["Status"])
+
+    tx, wallet = deposit.tx, deposit.wallet
+    state = {
+        "transactions": {tx.external_reference: (tx.status, tx.amount, tx.to_user_uid)},
+        "wallets": {wallet.user_uid: (wallet.balance, wallet.locked_balance)},
+    }
+    assert check_synthetic(state, [tx.external_reference]) == []
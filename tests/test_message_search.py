@@ -0,0 +1,32 @@
+"""Message search over a create_all schema (needs TEST_DATABASE_URL)."""
+
+import uuid
+
+from src.db import main
+from tests.conftest import needs_db, register_user
+
+pytestmark = needs_db
+
+
+def test_sent_message_is_found_by_search(db_client):
+    headers, token = register_user(db_client, "Searcher")
+    group = db_client.post("/api/api/groups", json={"name": "Search group"}, headers=headers).json()
+    word = f"needle{uuid.uuid4().hex[:8]}"
+
+    with db_client.websocket_connect(f"/api/api/ws/chat/{group['uid']}?token={token}") as ws:
+        ws.send_json({"type": "message", "content": f"the {word} is here"})
+        # Presence and other events may arrive first; wait for the broadcast
+        frame = ws.receive_json()
+        while frame.get("type") not in (None, "message"):
+            frame = ws.receive_json()
+        assert frame["content"] == f"the {word} is here"
+
+    # The test client cancels the socket handler mid-cleanup on exit, which can
+    # leave a dead connection in the pool; start the next request on a fresh one
+    db_client.portal.call(main.async_engine.dispose)
+
+    resp = db_client.get("/api/api/messages/search", params={"q": word}, headers=headers)
+    assert resp.status_code == 200, resp.text
+    results = resp.json()["results"]
+    assert [r["content"] for r in results] == [f"the {word} is here"]
+    assert results[0]["group_uid"] == group["uid"]
@@ -0,0 +1,47 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from src import app
+from src.auth import auth
+from src.config import Config
+from src.metrics import Gauge
+
+URL = "/api/api/metrics"
+
+
+@pytest.mark.parametrize(
+    "enabled, token, headers, expected",
+    [
+        (None, None, {}, 404),
+        (None, "s3cret", {}, 401),
+        (None, "s3cret", {"Authorization": "Bearer wrong"}, 401),
+        (None, "s3cret", {"Authorization": "Bearer s3cret"}, 200),
+        (False, "s3cret", {"Authorization": "Bearer s3cret"}, 404),
+        (True, None, {}, 200),
+    ],
+)
+def test_metrics_access(monkeypatch, enabled, token, headers, expected):
+    monkeypatch.setattr(Config, "METRICS_ENABLED", enabled)
+    monkeypatch.setattr(Config, "METRICS_TOKEN", token)
+
+    resp = TestClient(app).get(URL, headers=headers)
+
+    assert resp.status_code == expected
+    if expected == 200:
+        assert "bcrypt_queue_depth 0" in resp.text
+
+
+def test_gauge_get_defaults_to_zero():
+    gauge = Gauge("test_gauge", "doc", ("state",))
+    assert gauge.get("busy") == 0.0
+    gauge.inc("busy")
+    gauge.inc("busy")
+    gauge.dec("busy")
+    assert gauge.get("busy") == 1.0
+
+
+def test_bcrypt_queue_depth_counts_jobs_beyond_the_workers(monkeypatch):
+    monkeypatch.setattr(auth.bcrypt_in_flight, "values", {})
+    assert auth.bcrypt_queue_depth() == 0
+    auth.bcrypt_in_flight.inc(amount=auth.BCRYPT_WORKERS + 3)
+    assert auth.bcrypt_queue_depth() == 3
@@ -0,0 +1,72 @@
+import asyncio
+from datetime import date
+
+import pytest
+
+from src.service import partition_service
+from src.service.partition_service import PartitionService, _months_before, _partition_name
+
+
+@pytest.mark.parametrize(
+    "day, months, expected",
+    [
+        (date(2026, 10, 19), 0, date(2026, 10, 1)),
+        (date(2026, 10, 1), 3, date(2026, 7, 1)),
+        (date(2026, 1, 31), 1, date(2025, 12, 1)),
+        (date(2026, 3, 1), 15, date(2024, 12, 1)),
+        (date(2026, 11, 1), -2, date(2027, 1, 1)),
+        (date(2026, 12, 1), -1, date(2027, 1, 1)),
+    ],
+)
+def test_months_before(day, months, expected):
+    assert _months_before(day, months) == expected
+
+
+def test_partition_name():
+    assert _partition_name(date(2027, 1, 1)) == "transactions_2027_01"
+
+
+class FakeResult:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def all(self):
+        return self.rows
+
+
+class FakeSession:
+    def __init__(self, existing):
+        self.existing = existing
+        self.statements = []
+        self.commits = 0
+
+    async def execute(self, statement, params=None):
+        sql = str(statement)
+        if "pg_inherits" in sql:
+            return FakeResult([(name,) for name in self.existing])
+        self.statements.append(sql)
+        return FakeResult([])
+
+    async def commit(self):
+        self.commits += 1
+
+
+def test_ensure_partitions_creates_only_missing_months(monkeypatch):
+    class FrozenDatetime(partition_service.datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return cls(2026, 11, 20, tzinfo=tz)
+
+    monkeypatch.setattr(partition_service, "datetime", FrozenDatetime)
+    db = FakeSession(existing=["transactions_2026_11", "transactions_2026_12"])
+
+    created = asyncio.run(PartitionService().ensure_partitions(db, months_ahead=3))
+
+    assert created == 2
+    assert db.commits == 1
+    assert db.statements == [
+        'CREATE TABLE IF NOT EXISTS "transactions_2027_01" PARTITION OF transactions '
+        "FOR VALUES FROM ('2027-01-01 00:00+00') TO ('2027-02-01 00:00+00')",
+        'CREATE TABLE IF NOT EXISTS "transactions_2027_02" PARTITION OF transactions '
+        "FOR VALUES FROM ('2027-02-01 00:00+00') TO ('2027-03-01 00:00+00')",
+    ]
@@ -0,0 +1,41 @@
+"""Pin the query counts of hot read routes (needs TEST_DATABASE_URL)."""
+
+import pytest
+
+from src.db.query_stats import QueryBudgetExceeded, query_budget
+from tests.conftest import needs_db, register_user
+
+pytestmark = needs_db
+
+
+@pytest.fixture(scope="module")
+def member(db_client):
+    headers, _ = register_user(db_client, "Budget")
+    group = db_client.post("/api/api/groups", json={"name": "Budget group"}, headers=headers)
+    assert group.status_code == 201, group.text
+    return headers, group.json()["uid"]
+
+
+@pytest.mark.parametrize(
+    "route, budget",
+    [
+        ("/api/api/wallet", 4),
+        ("/api/api/groups", 3),
+        ("/api/api/groups/{group}", 8),
+        ("/api/api/groups/{group}/messages", 5),
+        ("/api/api/transactions", 3),
+    ],
+)
+def test_hot_route_query_budget(db_client, member, route, budget):
+    headers, group_uid = member
+    with query_budget(budget) as served:
+        resp = db_client.get(route.format(group=group_uid), headers=headers)
+    assert resp.status_code == 200, resp.text
+    assert len(served) == 1
+
+
+def test_budget_failure_lists_the_statements(db_client, member):
+    headers, group_uid = member
+    with pytest.raises(QueryBudgetExceeded, match="budget 0"):
+        with query_budget(0):
+            db_client.get(f"/api/api/groups/{group_uid}", headers=headers)
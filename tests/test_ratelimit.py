@@ -0,0 +1,61 @@
+import pytest
+
+from src import ratelimit
+from src.ratelimit import KeyedRateLimiter, TokenBucket
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(ratelimit.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_token_bucket_allows_a_burst_then_refills(clock):
+    bucket = TokenBucket(rate=2.0, burst=3.0)
+    assert [bucket.allow() for _ in range(4)] == [True, True, True, False]
+
+    clock[0] += 0.5  # one token back
+    assert bucket.allow()
+    assert not bucket.allow()
+
+    clock[0] += 60  # refill is capped at the burst
+    assert [bucket.allow() for _ in range(4)] == [True, True, True, False]
+
+
+def test_token_bucket_cost(clock):
+    bucket = TokenBucket(rate=1.0, burst=5.0)
+    assert bucket.allow(cost=4)
+    assert not bucket.allow(cost=2)
+    assert bucket.allow(cost=1)
+
+
+def test_keyed_limiter_separates_keys(clock):
+    limiter = KeyedRateLimiter(rate=1.0, burst=1.0)
+    assert limiter.allow(("alice", "g1"))
+    assert not limiter.allow(("alice", "g1"))
+    assert limiter.allow(("alice", "g2"))
+    assert limiter.allow(("bob", "g1"))
+
+
+def test_keyed_limiter_prunes_only_refilled_buckets(clock):
+    limiter = KeyedRateLimiter(rate=1.0, burst=2.0, max_keys=2)
+    limiter.allow("idle")
+    clock[0] += 10
+    limiter.allow("busy")
+    limiter.allow("new")  # table full: "idle" has refilled and is dropped
+
+    assert set(limiter.buckets) == {"busy", "new"}
+
+
+def test_keyed_limiter_evicts_least_recently_used_when_all_active(clock):
+    limiter = KeyedRateLimiter(rate=1.0, burst=5.0, max_keys=3)
+    for key in ("a", "b", "c"):
+        limiter.allow(key)
+    limiter.allow("a")  # "b" is now the least recently used
+
+    for key in ("d", "e"):
+        limiter.allow(key)  # nothing has refilled, so the oldest are evicted
+
+    assert len(limiter.buckets) == 3
+    assert list(limiter.buckets) == ["a", "d", "e"]
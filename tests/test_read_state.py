@@ -0,0 +1,50 @@
+import asyncio
+import uuid
+
+from sqlalchemy.dialects import postgresql
+
+from src.service import read_state
+from src.service.group_service import GroupService
+from src.service.read_state import ReadWatermark
+
+
+class RecordingSession:
+    def __init__(self):
+        self.statements = []
+        self.commits = 0
+
+    async def execute(self, statement):
+        self.statements.append(str(statement.compile(dialect=postgresql.dialect())))
+
+    async def commit(self):
+        self.commits += 1
+
+
+def test_watermark_update_is_clamped_to_the_group_seq():
+    db = RecordingSession()
+    asyncio.run(GroupService().update_read_watermark(uuid.uuid4(), uuid.uuid4(), 10**9, db))
+
+    (sql,) = db.statements
+    assert "greatest(group_members.last_read_seq, least(" in sql
+    assert "groups.message_seq" in sql
+    assert "groups.uid = group_members.group_uid" in sql
+    assert db.commits == 1
+
+
+def test_read_watermark_keeps_only_the_highest_seq(monkeypatch):
+    flushed = []
+
+    async def record(group_uid, user_uid, seq, db):
+        flushed.append(seq)
+
+    monkeypatch.setattr(read_state.group_service, "update_read_watermark", record)
+    watermark = ReadWatermark(uuid.uuid4(), uuid.uuid4(), flush_interval=3600)
+    for seq in (3, 9, 5):
+        watermark.mark(seq)
+
+    asyncio.run(watermark.flush(None))
+    watermark.mark(12)
+    asyncio.run(watermark.maybe_flush(None))  # within the interval: held back
+    asyncio.run(watermark.flush(None))
+
+    assert flushed == [9, 12]
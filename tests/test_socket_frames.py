@@ -0,0 +1,135 @@
+import asyncio
+import json
+
+import pytest
+
+from src.config import Config
+from src.ratelimit import KeyedRateLimiter
+from src.route import socket_route
+from src.route.socket_route import accept_content, collect_burst, parse_frame, receive_frames
+
+
+class FakeWebSocket:
+    """Feeds queued client frames; an empty queue blocks like a quiet client."""
+
+    def __init__(self, frames=()):
+        self.inbox = asyncio.Queue()
+        for frame in frames:
+            self.inbox.put_nowait(frame)
+        self.sent = []
+        self.closed_with = None
+
+    async def receive(self):
+        return {"type": "websocket.receive", "text": await self.inbox.get()}
+
+    async def send_text(self, data):
+        self.sent.append(data)
+
+    async def send_bytes(self, data):
+        self.sent.append(data)
+
+    async def close(self, code=1000):
+        self.closed_with = code
+
+
+async def collect(websocket):
+    return [frame async for frame in receive_frames(websocket)]
+
+
+def test_pongs_are_swallowed_and_idle_sockets_closed(monkeypatch):
+    monkeypatch.setattr(Config, "WS_HEARTBEAT_SECONDS", 0.01)
+    monkeypatch.setattr(Config, "WS_IDLE_TIMEOUT_SECONDS", 0.03)
+    websocket = FakeWebSocket(['{"type":"pong"}', '{"type": "pong"}', '{"content":"hi"}'])
+
+    frames = asyncio.run(collect(websocket))
+
+    assert frames == ['{"content":"hi"}']
+    assert json.loads(websocket.sent[0]) == {"type": "ping"}
+    assert websocket.closed_with == 1001
+
+
+def test_answered_pings_keep_the_socket_open(monkeypatch):
+    monkeypatch.setattr(Config, "WS_HEARTBEAT_SECONDS", 0.01)
+    monkeypatch.setattr(Config, "WS_IDLE_TIMEOUT_SECONDS", 0.05)
+
+    class AnsweringWebSocket(FakeWebSocket):
+        async def send_text(self, data):
+            await super().send_text(data)
+            if json.loads(data)["type"] == "ping" and len(self.sent) < 10:
+                self.inbox.put_nowait('{"type":"pong"}')
+
+    websocket = AnsweringWebSocket()
+    asyncio.run(collect(websocket))
+
+    # Ten pings answered spans well past the idle timeout before it closes
+    assert len(websocket.sent) >= 10
+    assert websocket.closed_with == 1001
+
+
+@pytest.mark.parametrize(
+    "data, expected, error",
+    [
+        ('{"content": "hi"}', {"content": "hi"}, None),
+        ("not json", None, "invalid_frame"),
+        ("[1, 2]", None, "invalid_frame"),
+        ("x" * (Config.WS_MAX_FRAME_BYTES + 1), None, "frame_too_large"),
+    ],
+)
+def test_parse_frame(data, expected, error):
+    websocket = FakeWebSocket()
+    assert asyncio.run(parse_frame(websocket, data)) == expected
+    assert [json.loads(f)["reason"] for f in websocket.sent] == ([error] if error else [])
+
+
+@pytest.fixture
+def limiter(monkeypatch):
+    limiter = KeyedRateLimiter(rate=0.001, burst=3)
+    monkeypatch.setattr(socket_route, "chat_limiter", limiter)
+    return limiter
+
+
+def errors(websocket):
+    return [json.loads(f)["reason"] for f in websocket.sent]
+
+
+def test_accept_content_rejects_oversize_by_encoded_bytes(monkeypatch, limiter):
+    monkeypatch.setattr(Config, "WS_MAX_MESSAGE_BYTES", 10)
+    websocket = FakeWebSocket()
+
+    assert asyncio.run(accept_content(websocket, {"content": "0123456789"}, "k")) == "0123456789"
+    # Six characters, twelve bytes
+    assert asyncio.run(accept_content(websocket, {"content": "\u00e9" * 6}, "k")) is None
+    assert asyncio.run(accept_content(websocket, {"content": "   "}, "k")) is None
+    assert errors(websocket) == ["message_too_large"]
+
+
+def test_accept_content_charges_the_sender(limiter):
+    websocket = FakeWebSocket()
+    results = [asyncio.run(accept_content(websocket, {"content": "hi"}, "k")) for _ in range(4)]
+    assert results == ["hi", "hi", "hi", None]
+    assert errors(websocket) == ["rate_limited"]
+
+
+def test_collect_burst_charges_and_splits_merged_messages(monkeypatch, limiter):
+    monkeypatch.setattr(Config, "WS_MERGE_WINDOW_MS", 50)
+    monkeypatch.setattr(Config, "WS_MAX_MESSAGE_BYTES", 12)
+    controls = []
+
+    async def on_control(frame):
+        controls.append(frame["type"])
+
+    async def scenario():
+        websocket = FakeWebSocket([
+            '{"content": "bbbb"}',
+            '{"type": "typing"}',
+            '{"content": "cccccc"}',
+            '{"content": "dd"}',  # over the bucket: rejected
+        ])
+        assert limiter.allow("k")  # the first message was charged by the caller
+        bodies = await collect_burst(websocket, "aaaa", "k", "json", on_control)
+        return websocket, bodies
+
+    websocket, bodies = asyncio.run(scenario())
+    assert bodies == ["aaaa\nbbbb", "cccccc"]
+    assert controls == ["typing"]
+    assert errors(websocket) == ["rate_limited"]
@@ -0,0 +1,102 @@
+"""Statement exports: CSV escaping, both formats, date filters and membership."""
+
+import csv
+import io
+import json
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from src.db.main import get_db_session
+from src.db.models import Transaction, TransactionStatus, TransactionType
+from src.service.statement_service import _csv_safe
+from tests.conftest import needs_db, register_user
+
+
+@pytest.mark.parametrize("value", ["=SUM(A1:A9)", "+1", "-1", "@cmd", "\tx", "\rx"])
+def test_csv_safe_quotes_formula_prefixes(value):
+    assert _csv_safe({"description": value}) == {"description": "'" + value}
+
+
+def test_csv_safe_leaves_plain_values():
+    row = {"description": "rent", "amount": -5.0, "group_uid": None}
+    assert _csv_safe(row) == row
+
+
+@pytest.fixture(scope="module")
+def statement(db_client):
+    """A group with three contributions a minute apart, newest first in `times`."""
+    headers, _ = register_user(db_client, "Owner")
+    me = db_client.get("/api/api/auth/me", headers=headers).json()
+    group = db_client.post("/api/api/groups", json={"name": "Statement group"}, headers=headers).json()
+
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+    times = [now - timedelta(minutes=m) for m in (1, 2, 3)]
+    descriptions = ["=HYPERLINK(\"http://x\")", "dues", "@SUM(1)"]
+
+    async def seed():
+        async with get_db_session() as db:
+            for created_at, description in zip(times, descriptions):
+                db.add(Transaction(
+                    transaction_type=TransactionType.CONTRIBUTION,
+                    amount=10.0,
+                    status=TransactionStatus.COMPLETED,
+                    description=description,
+                    from_user_uid=uuid.UUID(me["uid"]),
+                    group_uid=uuid.UUID(group["uid"]),
+                    created_at=created_at,
+                ))
+            await db.commit()
+
+    db_client.portal.call(seed)
+    return headers, group["uid"], times
+
+
+def export(client, headers, group_uid, **params):
+    return client.get(f"/api/api/groups/{group_uid}/transactions/export", params=params, headers=headers)
+
+
+@needs_db
+def test_csv_export_escapes_descriptions(db_client, statement):
+    headers, group_uid, _ = statement
+    resp = export(db_client, headers, group_uid)
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/csv")
+
+    rows = list(csv.DictReader(io.StringIO(resp.text)))
+    assert [r["description"] for r in rows] == ["'@SUM(1)", "dues", "'=HYPERLINK(\"http://x\")"]
+    assert all(r["transaction_type"] == "contribution" for r in rows)
+
+
+@needs_db
+def test_ndjson_export_keeps_raw_values(db_client, statement):
+    headers, group_uid, _ = statement
+    resp = export(db_client, headers, group_uid, format="ndjson")
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+
+    rows = [json.loads(line) for line in resp.text.splitlines()]
+    assert [r["description"] for r in rows] == ["@SUM(1)", "dues", "=HYPERLINK(\"http://x\")"]
+
+
+@needs_db
+def test_export_date_range_is_half_open(db_client, statement):
+    headers, group_uid, times = statement
+    newest, middle, oldest = times
+
+    resp = export(db_client, headers, group_uid, format="ndjson", start=middle.isoformat(), end=newest.isoformat())
+    rows = [json.loads(line) for line in resp.text.splitlines()]
+    assert [r["description"] for r in rows] == ["dues"]
+
+    resp = export(db_client, headers, group_uid, format="ndjson", start=middle.isoformat())
+    assert len(resp.text.splitlines()) == 2
+    resp = export(db_client, headers, group_uid, format="ndjson", end=middle.isoformat())
+    assert len(resp.text.splitlines()) == 1
+
+
+@needs_db
+def test_non_member_cannot_export_group_statement(db_client, statement):
+    _, group_uid, _ = statement
+    outsider, _ = register_user(db_client, "Outsider")
+    assert export(db_client, outsider, group_uid).status_code == 403
@@ -0,0 +1,61 @@
+import uuid
+
+import pytest
+
+from benchmarks.wallet_stress import check_invariants, parse_args
+
+ALICE, BOB, GROUP = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+
+
+def snapshot(alice, bob, group):
+    return {"wallets": {ALICE: (alice, 0.0), BOB: (bob, 0.0)}, "group_wallets": {GROUP: group}}
+
+
+def deltas(alice=0.0, bob=0.0, group=0.0):
+    return {"wallets": {ALICE: alice, BOB: bob}, "group_wallets": {GROUP: group}}
+
+
+def test_consistent_run_has_no_violations():
+    # Alice contributes 5, the group disburses 2 to Bob
+    before = snapshot(100, 100, 50)
+    after = snapshot(95, 102, 53)
+    assert check_invariants(before, after, deltas(alice=-5, bob=2, group=3)) == []
+
+
+def test_lost_group_update_is_reported_even_when_totals_balance():
+    # Two contributions recorded, one group credit lost, and the money leaked elsewhere
+    before = snapshot(100, 100, 50)
+    after = snapshot(90, 105, 55)
+    violations = check_invariants(before, after, deltas(alice=-10, bob=5, group=10))
+    assert any("group wallet" in v and "diverged" in v for v in violations)
+    assert not any("not conserved" in v for v in violations)
+
+
+def test_negative_and_unconserved_balances_are_reported():
+    violations = check_invariants(snapshot(100, 100, 50), snapshot(-1, 100, 50), deltas(alice=-101))
+    assert any("negative" in v for v in violations)
+    assert any("not conserved" in v for v in violations)
+
+
+@pytest.mark.parametrize(
+    "argv",
+    [
+        ["--wallets", "1"],
+        ["--wallets", "10", "--groups", "11"],
+        ["--groups", "0"],
+        ["--operations", "0"],
+        ["--concurrency", "0"],
+        ["--amount", "0"],
+        ["--mix", "0", "0", "0"],
+        ["--mix", "1", "-1", "1"],
+        ["--max-retries", "-1"],
+    ],
+)
+def test_parse_args_rejects_unusable_pools(argv):
+    with pytest.raises(SystemExit):
+        parse_args(argv)
+
+
+def test_parse_args_defaults_are_valid():
+    args = parse_args([])
+    assert args.groups <= args.wallets
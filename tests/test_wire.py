@@ -0,0 +1,67 @@
+import json
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+
+from src import wire
+from src.wire import JSON, MSGPACK, EncodedEvent, decode, encode, negotiate
+
+UID = uuid.UUID("12345678-1234-5678-1234-567812345678")
+WHEN = datetime(2026, 10, 19, 12, 0, tzinfo=timezone.utc)
+
+
+def test_json_renders_uuids_and_timestamps_as_strings():
+    data = encode({"id": UID, "created_at": WHEN})
+    assert json.loads(data) == {"id": str(UID), "created_at": WHEN.isoformat()}
+
+
+def test_json_rejects_unknown_types():
+    with pytest.raises(TypeError):
+        encode({"x": object()})
+
+
+def test_decode_text_as_json():
+    assert decode('{"content": "hi"}') == {"content": "hi"}
+
+
+def test_negotiate_falls_back_to_json(monkeypatch):
+    assert negotiate(None) == JSON
+    assert negotiate("xml") == JSON
+    monkeypatch.setattr(wire, "msgpack", None)
+    assert negotiate(MSGPACK) == JSON
+
+
+def test_binary_frames_need_msgpack(monkeypatch):
+    monkeypatch.setattr(wire, "msgpack", None)
+    with pytest.raises(ValueError):
+        decode(b"\x81")
+
+
+def test_encoded_event_is_built_once_per_encoding(monkeypatch):
+    calls = []
+    real_encode = wire.encode
+
+    def counting_encode(event, encoding=JSON):
+        calls.append(encoding)
+        return real_encode(event, encoding)
+
+    monkeypatch.setattr(wire, "encode", counting_encode)
+    event = EncodedEvent({"type": "ping"})
+    assert event.frame(JSON) is event.frame(JSON)
+    assert calls == [JSON]
+
+
+@pytest.mark.skipif(wire.msgpack is None, reason="msgpack is an optional dependency")
+class TestMessagePack:
+    def test_negotiated_when_available(self):
+        assert negotiate(MSGPACK) == MSGPACK
+
+    def test_uuids_as_bytes_and_timestamps_as_epoch_millis(self):
+        data = encode({"id": UID, "created_at": WHEN, "content": "hi"}, MSGPACK)
+        assert isinstance(data, bytes)
+        assert decode(data) == {"id": UID.bytes, "created_at": int(WHEN.timestamp() * 1000), "content": "hi"}
+
+    def test_garbage_is_a_value_error(self):
+        with pytest.raises(ValueError):
+            decode(b"\xc1")
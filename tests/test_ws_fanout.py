@@ -0,0 +1,39 @@
+import asyncio
+import json
+import time
+
+from benchmarks.ws_fanout import MARKER, FanoutClient
+
+
+class FakeSocket:
+    def __init__(self, frames):
+        self.frames = frames
+        self.sent = []
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for frame in self.frames:
+            yield frame
+
+    async def send(self, data):
+        self.sent.append(json.loads(data))
+
+
+def test_read_answers_pings_and_times_marked_messages():
+    ws = FakeSocket([
+        json.dumps({"type": "ping"}),
+        json.dumps({"type": "presence", "online": ["a"]}),
+        json.dumps({"content": f"{MARKER}:{time.time_ns()}:0"}),
+        json.dumps({"type": "error", "reason": "rate_limited"}),
+        json.dumps({"type": "ping"}),
+    ])
+    client = FanoutClient(ws, "g")
+
+    asyncio.run(client.read())
+
+    assert ws.sent == [{"type": "pong"}, {"type": "pong"}]
+    assert client.received == 1
+    assert client.rate_limited == 1
+    assert 0 <= client.latencies[0] < 5